@@ -1,7 +1,10 @@
 from rest_framework import serializers
+from django.db import transaction
+from api.base.serializers import CamposDinamicosMixin
 from .models import Abastecimiento
 from api.manicuristas.models import Manicurista
 from api.manicuristas.serializers import ManicuristaSerializer
+from api.insumos.models import MovimientoInventario
 from api.insumoshasabastecimientos.models import InsumoHasAbastecimiento
 from api.insumoshasabastecimientos.serializers import (
     InsumoHasAbastecimientoSerializer,
@@ -21,28 +24,49 @@ class AbastecimientoSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("La cantidad debe ser mayor que cero")
         return value
     
+    @transaction.atomic
     def create(self, validated_data):
         insumos_data = validated_data.pop('insumos', [])
         abastecimiento = Abastecimiento.objects.create(**validated_data)
         
-        for insumo_data in insumos_data:
-            InsumoHasAbastecimiento.objects.create(abastecimiento=abastecimiento, **insumo_data)
+        # Descontar el stock primero: si algún insumo no alcanza se aborta sin insertar las líneas
+        MovimientoInventario.aplicar(
+            [(insumo_data['insumo'].pk, -insumo_data['cantidad']) for insumo_data in insumos_data],
+            'abastecimiento',
+            documento_id=abastecimiento.id
+        )
+        InsumoHasAbastecimiento.objects.bulk_create([
+            InsumoHasAbastecimiento(abastecimiento=abastecimiento, **insumo_data)
+            for insumo_data in insumos_data
+        ])
         
         return abastecimiento
     
+    @transaction.atomic
     def update(self, instance, validated_data):
         insumos_data = validated_data.pop('insumos', None)
         instance = super().update(instance, validated_data)
         
         if insumos_data is not None:
+            # Revertir lo descontado antes según el kardex (no las líneas: los abastecimientos
+            # anteriores al kardex nunca descontaron stock) y descontar lo nuevo
+            anteriores = MovimientoInventario.reversion_de_documento('abastecimiento', instance.id)
+            MovimientoInventario.aplicar(
+                anteriores + [(insumo_data['insumo'].pk, -insumo_data['cantidad']) for insumo_data in insumos_data],
+                'abastecimiento',
+                documento_id=instance.id,
+                observaciones="Modificación de abastecimiento"
+            )
             instance.insumos.all().delete()
-            for insumo_data in insumos_data:
-                InsumoHasAbastecimiento.objects.create(abastecimiento=instance, **insumo_data)
+            InsumoHasAbastecimiento.objects.bulk_create([
+                InsumoHasAbastecimiento(abastecimiento=instance, **insumo_data)
+                for insumo_data in insumos_data
+            ])
         
         return instance
 
 
-class AbastecimientoDetailSerializer(serializers.ModelSerializer):
+class AbastecimientoDetailSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     manicurista = ManicuristaSerializer(read_only=True)
     insumos = serializers.SerializerMethodField()
     
@@ -51,5 +75,5 @@ class AbastecimientoDetailSerializer(serializers.ModelSerializer):
         fields = ['id', 'fecha', 'cantidad', 'manicurista', 'insumos']
     
     def get_insumos(self, obj):
-        abastecimiento_insumos = InsumoHasAbastecimiento.objects.filter(abastecimiento=obj)
-        return InsumoHasAbastecimientoDetailSerializer(abastecimiento_insumos, many=True).data
\ No newline at end of file
+        # Usa el prefetch_related('insumos__insumo') del ViewSet
+        return InsumoHasAbastecimientoDetailSerializer(obj.insumos.all(), many=True).data
\ No newline at end of file
@@ -2,10 +2,12 @@ from rest_framework import viewsets, status, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
 
 from .models import Abastecimiento
 from .serializers import AbastecimientoSerializer, AbastecimientoDetailSerializer
 from api.manicuristas.models import Manicurista
+from api.insumos.models import MovimientoInventario, StockInsuficiente
 
 
 class AbastecimientoViewSet(viewsets.ModelViewSet):
@@ -15,7 +17,8 @@ class AbastecimientoViewSet(viewsets.ModelViewSet):
     Este ViewSet proporciona endpoints para listar, crear, actualizar y eliminar
     registros de abastecimientos de insumos a manicuristas.
     """
-    queryset = Abastecimiento.objects.all()
+    # Manicurista e insumos precargados: el listado no hace consultas por abastecimiento
+    queryset = Abastecimiento.objects.select_related('manicurista__usuario').prefetch_related('insumos__insumo')
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['fecha', 'manicurista']
     search_fields = ['manicurista__nombre']
@@ -35,11 +38,14 @@ class AbastecimientoViewSet(viewsets.ModelViewSet):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
+        try:
+            self.perform_create(serializer)
+        except StockInsuficiente as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         headers = self.get_success_headers(serializer.data)
         
         # Obtenemos el objeto recién creado con el serializer de detalle
-        abastecimiento = Abastecimiento.objects.get(pk=serializer.data['id'])
+        abastecimiento = self.get_queryset().get(pk=serializer.data['id'])
         detail_serializer = AbastecimientoDetailSerializer(abastecimiento)
         
         return Response(detail_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
@@ -49,14 +55,28 @@ class AbastecimientoViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
+        try:
+            self.perform_update(serializer)
+        except StockInsuficiente as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         # Obtenemos el objeto actualizado con el serializer de detalle
-        abastecimiento = Abastecimiento.objects.get(pk=instance.id)
+        abastecimiento = self.get_queryset().get(pk=instance.id)
         detail_serializer = AbastecimientoDetailSerializer(abastecimiento)
         
         return Response(detail_serializer.data)
     
+    def perform_destroy(self, instance):
+        # Al eliminar un abastecimiento vuelve al stock lo que el kardex registra como descontado
+        with transaction.atomic():
+            MovimientoInventario.aplicar(
+                MovimientoInventario.reversion_de_documento('abastecimiento', instance.id),
+                'abastecimiento',
+                documento_id=instance.id,
+                observaciones="Eliminación de abastecimiento"
+            )
+            instance.delete()
+    
     @action(detail=False, methods=['get'])
     def por_manicurista(self, request):
         """
@@ -80,7 +100,7 @@ class AbastecimientoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        abastecimientos = Abastecimiento.objects.filter(manicurista=manicurista)
+        abastecimientos = self.get_queryset().filter(manicurista=manicurista)
         serializer = AbastecimientoDetailSerializer(abastecimientos, many=True)
         return Response(serializer.data)
     
@@ -102,7 +122,7 @@ class AbastecimientoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        abastecimientos = Abastecimiento.objects.filter(
+        abastecimientos = self.get_queryset().filter(
             fecha__gte=fecha_inicio,
             fecha__lte=fecha_fin
         )
@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'api.authentication'
\ No newline at end of file
+    name = 'api.authentication'
+
+    def ready(self):
+        # Registrar señales que invalidan la caché de permisos
+        from . import permisos_cache  # noqa: F401
@@ -0,0 +1,20 @@
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .permisos_cache import claims_vigentes
+
+
+class JWTAutenticacion(JWTAuthentication):
+    """
+    JWTAuthentication que no busca el usuario en cada petición.
+
+    Si los claims del token están vigentes (ver tokens.py), request.user es un
+    objeto perezoso: el Usuario solo se consulta si la vista lo usa. Los tokens
+    viejos, o emitidos antes de un cambio en el usuario o en los permisos, se
+    validan como siempre (usuario existente y activo).
+    """
+
+    def get_user(self, validated_token):
+        if claims_vigentes(validated_token):
+            return SimpleLazyObject(lambda: super(JWTAutenticacion, self).get_user(validated_token))
+        return super().get_user(validated_token)
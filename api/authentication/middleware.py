@@ -1,10 +1,7 @@
-import jwt
-from django.conf import settings
 from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
-from rest_framework_simplejwt.tokens import AccessToken
-from api.roles.models import RolHasPermiso, Permiso, Modulo, Accion
-from api.usuarios.models import Usuario
+from .permisos_cache import AccesoNoAutorizado, permisos_desde_request
+from .rutas_permisos import ACCIONES_POR_METODO, MODULOS_POR_PREFIJO, metodo_equivalente, obtener_resolver
 
 class PermisosMiddleware(MiddlewareMixin):
     """
@@ -19,121 +16,65 @@ class PermisosMiddleware(MiddlewareMixin):
         # Permitir endpoints de autenticación
         if request.path.startswith('/api/auth/'):
             return None
+        
+        # Métricas: protegidas con METRICAS_TOKEN, no con JWT
+        if request.path == '/api/_metrics':
+            return None
             
         # Permitir métodos OPTIONS (CORS preflight)
         if request.method == 'OPTIONS':
             return None
             
-        # Obtener token del header Authorization
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return JsonResponse(
-                {'error': 'Token de acceso requerido'}, 
-                status=401
-            )
-            
-        token = auth_header.split(' ')[1]
-        
         try:
-            # Decodificar token JWT
-            access_token = AccessToken(token)
-            user_id = access_token['user_id']
-            
-            # Obtener usuario
-            try:
-                usuario = Usuario.objects.get(id=user_id)
-            except Usuario.DoesNotExist:
-                return JsonResponse(
-                    {'error': 'Usuario no encontrado'}, 
-                    status=401
-                )
-                
-            # Si es administrador, permitir acceso a todo
-            if usuario.rol and usuario.rol.nombre.lower() == 'administrador':
-                return None
-                
-            # Obtener permisos del usuario
-            permisos_usuario = RolHasPermiso.objects.filter(
-                rol=usuario.rol
-            ).values_list('permiso__nombre', flat=True)
-            
-            # Verificar si el usuario tiene permisos para la ruta y acción
-            ruta = request.path
-            metodo = request.method
-            
-            if self.usuario_tiene_acceso(ruta, metodo, permisos_usuario):
-                return None
-            else:
-                return JsonResponse(
-                    {'error': 'Acceso denegado. Permisos insuficientes'}, 
-                    status=403
-                )
-                
-        except jwt.InvalidTokenError:
-            return JsonResponse(
-                {'error': 'Token inválido'}, 
-                status=401
-            )
+            # Token decodificado una vez y permisos resueltos desde caché
+            permisos = permisos_desde_request(request)
+        except AccesoNoAutorizado as e:
+            return JsonResponse({'error': e.mensaje}, status=e.status)
         except Exception as e:
             return JsonResponse(
                 {'error': f'Error al verificar permisos: {str(e)}'}, 
                 status=500
             )
+            
+        # Si es administrador, permitir acceso a todo
+        if permisos.es_admin:
+            return None
+            
+        # Verificar si el usuario tiene permisos para la ruta y acción
+        if self.usuario_tiene_acceso(request.path, request.method, permisos.permisos):
+            return None
+        return JsonResponse(
+            {'error': 'Acceso denegado. Permisos insuficientes'}, 
+            status=403
+        )
     
     def usuario_tiene_acceso(self, ruta, metodo, permisos_usuario):
         """
-        Verifica si el usuario tiene acceso a la ruta basado en sus permisos
+        Verifica si el usuario tiene acceso a la ruta basado en sus permisos.
+        El permiso requerido se obtiene de la tabla precompilada de rutas
+        (ver rutas_permisos), que cubre también las @action de los ViewSets.
         """
-        # Mapeo de rutas a módulos
-        mapeo_rutas_modulos = {
-            '/api/usuarios/': 'usuarios',
-            '/api/clientes/': 'clientes',
-            '/api/manicuristas/': 'manicuristas',
-            '/api/roles/': 'roles',
-            '/api/citas/': 'citas',
-            '/api/servicios/': 'servicios',
-            '/api/insumos/': 'insumos',
-            '/api/categoria-insumos/': 'categoria_insumos',
-            '/api/compras/': 'compras',
-            '/api/proveedores/': 'proveedores',
-            '/api/abastecimientos/': 'abastecimientos',
-            '/api/venta-servicios/': 'venta_servicios',
-            '/api/liquidaciones/': 'liquidaciones',
-            '/api/novedades/': 'novedades',
-        }
+        conocida, permiso_requerido = obtener_resolver().permiso_requerido(ruta, metodo)
         
-        # Mapeo de métodos HTTP a acciones
-        mapeo_metodos_acciones = {
-            'GET': 'listar' if ruta.endswith('/') else 'ver_detalles',
-            'POST': 'crear',
-            'PUT': 'editar',
-            'PATCH': 'editar',
-            'DELETE': 'eliminar',
-        }
+        if not conocida:
+            # Ruta o método fuera del URLconf: se usa el prefijo para no abrir módulos protegidos
+            permiso_requerido = self._permiso_por_prefijo(ruta, metodo)
         
-        # Determinar el módulo
-        modulo = None
-        for ruta_patron, nombre_modulo in mapeo_rutas_modulos.items():
-            if ruta.startswith(ruta_patron):
-                modulo = nombre_modulo
-                break
-        
-        if not modulo:
-            # Si no es una ruta conocida, permitir acceso (para rutas nuevas)
+        if not permiso_requerido:
+            # Si no es una ruta de un módulo con permisos, permitir acceso (para rutas nuevas)
             return True
         
-        # Determinar la acción
-        accion = mapeo_metodos_acciones.get(metodo, 'listar')
-        
-        # Para rutas que terminan en / (listado), usar 'listar'
-        if ruta.endswith('/') and metodo == 'GET':
-            accion = 'listar'
-        # Para rutas con ID (detalle), usar 'ver_detalles'
-        elif metodo == 'GET' and not ruta.endswith('/'):
-            accion = 'ver_detalles'
-        
-        # Construir el nombre del permiso requerido
-        permiso_requerido = f"{modulo}_{accion}"
-        
         # Verificar si el usuario tiene el permiso
         return permiso_requerido in permisos_usuario
+    
+    def _permiso_por_prefijo(self, ruta, metodo):
+        segmentos = [s for s in ruta.split('/') if s]
+        modulo = MODULOS_POR_PREFIJO.get(segmentos[1]) if len(segmentos) > 1 else None
+        if not modulo:
+            return None
+        metodo = metodo_equivalente(metodo)
+        if metodo == 'GET':
+            accion = 'listar' if ruta.endswith('/') else 'ver_detalles'
+        else:
+            accion = ACCIONES_POR_METODO.get(metodo, 'listar')
+        return f"{modulo}_{accion}"
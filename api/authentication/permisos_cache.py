@@ -0,0 +1,229 @@
+"""
+Caché de permisos para PermisosMiddleware y los decoradores require_*.
+
+Los permisos se guardan por rol bajo una clave versionada
+('permisos:rol:<id>:v<version>'). Cualquier cambio en Rol, Permiso o
+RolHasPermiso incrementa la versión, con lo que todas las entradas anteriores
+quedan obsoletas sin tener que borrarlas una por una. El rol de cada usuario
+se guarda aparte y se borra cuando el usuario se guarda o elimina.
+
+El token JWT se decodifica una sola vez por petición y el resultado queda
+guardado en el request, para que middleware y decoradores no repitan el trabajo.
+Los tokens emitidos por el login (ver tokens.py) traen el rol, la versión de
+permisos y la versión del usuario ('permisos:usuario:<id>:version'): mientras
+ambas coincidan, el rol se toma del token sin buscar el usuario. La versión del
+usuario solo se incrementa cuando cambian su rol o is_active o cuando se
+elimina, así que editar otros datos no afecta los tokens emitidos.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_init, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken, Token
+
+from api.base.versiones import incrementar_version, leer_version, leer_versiones
+from api.roles.models import Rol, Permiso, RolHasPermiso
+from api.usuarios.models import Usuario
+
+
+VERSION_KEY = 'permisos:version'
+# Claims del token con las versiones de permisos y del usuario con las que se emitió
+CLAIM_VERSION = 'permisos_version'
+CLAIM_VERSION_USUARIO = 'usuario_version'
+# Campos de Usuario de los que dependen los claims de sus tokens
+CAMPOS_DE_AUTORIZACION = ('rol_id', 'is_active')
+TIMEOUT = getattr(settings, 'CACHE_TTL', 60 * 15)
+
+
+class AccesoNoAutorizado(Exception):
+    """Error de autenticación con el mensaje y status HTTP a devolver"""
+
+    def __init__(self, mensaje, status=401):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.status = status
+
+
+class PermisosUsuario(namedtuple(
+    'PermisosUsuario', ['user_id', 'rol_id', 'es_admin', 'permisos', 'tipo_usuario', 'perfil_id'],
+    defaults=(None, None),
+)):
+    """
+    Permisos efectivos de un usuario (permisos es un frozenset de nombres).
+    tipo_usuario y perfil_id vienen del token y son None si no trae esos claims o ya no están vigentes.
+    """
+
+    def tiene(self, permiso):
+        return self.es_admin or permiso in self.permisos
+
+    def tiene_alguno(self, permisos):
+        return self.es_admin or not self.permisos.isdisjoint(permisos)
+
+    def faltantes(self, permisos):
+        if self.es_admin:
+            return set()
+        return set(permisos) - self.permisos
+
+
+def obtener_version():
+    """Versión actual de la caché de permisos"""
+    return leer_version(VERSION_KEY)
+
+
+def invalidar_permisos():
+    """Invalida todos los permisos cacheados incrementando la versión"""
+    incrementar_version(VERSION_KEY)
+
+
+def permisos_de_rol(rol_id):
+    """Retorna (es_admin, frozenset de permisos) del rol, consultando la BD solo si no está en caché"""
+    key = f'permisos:rol:{rol_id}:v{obtener_version()}'
+    datos = cache.get(key)
+    if datos is None:
+        nombre_rol = Rol.objects.filter(id=rol_id).values_list('nombre', flat=True).first()
+        permisos = frozenset(
+            RolHasPermiso.objects.filter(rol_id=rol_id).values_list('permiso__nombre', flat=True)
+        )
+        datos = (bool(nombre_rol) and nombre_rol.lower() == 'administrador', permisos)
+        cache.set(key, datos, TIMEOUT)
+    return datos
+
+
+def rol_de_usuario(user_id):
+    """ID del rol del usuario o None si el usuario no existe"""
+    key = f'permisos:usuario:{user_id}'
+    rol_id = cache.get(key)
+    if rol_id is None:
+        rol_id = Usuario.objects.filter(id=user_id).values_list('rol_id', flat=True).first()
+        if rol_id is None:
+            return None
+        cache.set(key, rol_id, TIMEOUT)
+    return rol_id
+
+
+def permisos_de_usuario(user_id):
+    """PermisosUsuario del usuario o None si no existe"""
+    rol_id = rol_de_usuario(user_id)
+    if rol_id is None:
+        return None
+    es_admin, permisos = permisos_de_rol(rol_id)
+    return PermisosUsuario(user_id, rol_id, es_admin, permisos)
+
+
+def clave_version_usuario(user_id):
+    return f'permisos:usuario:{user_id}:version'
+
+
+def versiones_de_usuario(user_id):
+    """(versión de permisos, versión del rol e is_active del usuario) en una sola lectura"""
+    return tuple(leer_versiones([VERSION_KEY, clave_version_usuario(user_id)]))
+
+
+def claims_vigentes(token):
+    """True si el token trae rol y fue emitido con las versiones actuales de permisos y del usuario"""
+    if token is None or token.get('rol_id') is None or token.get(CLAIM_VERSION_USUARIO) is None:
+        return False
+    emitido = (token.get(CLAIM_VERSION), token[CLAIM_VERSION_USUARIO])
+    return emitido == versiones_de_usuario(token.get('user_id'))
+
+
+def perfil_desde_request(request):
+    """
+    (tipo_usuario, perfil_id) del token con el que se autenticó la petición DRF.
+    Retorna (None, None) si no hay token, fue emitido sin esos claims o ya no
+    están vigentes (el rol cambió después de emitirlo): el llamador los busca en la BD.
+    """
+    token = getattr(request, 'auth', None)
+    if not isinstance(token, Token) or 'tipo_usuario' not in token or not claims_vigentes(token):
+        return None, None
+    return token['tipo_usuario'], token.get('perfil_id')
+
+
+def permisos_desde_request(request):
+    """
+    Obtiene los permisos del usuario autenticado con el header Authorization.
+    El resultado se guarda en el HttpRequest para reutilizarlo en la misma petición.
+    Lanza AccesoNoAutorizado si falta el token, es inválido o el usuario no existe.
+    """
+    http_request = getattr(request, '_request', request)
+    if hasattr(http_request, '_permisos_usuario'):
+        return http_request._permisos_usuario
+
+    auth_header = http_request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        raise AccesoNoAutorizado('Token de acceso requerido')
+
+    try:
+        access_token = AccessToken(auth_header.split(' ')[1])
+        user_id = access_token['user_id']
+    except (TokenError, KeyError, IndexError):
+        raise AccesoNoAutorizado('Token inválido')
+
+    if claims_vigentes(access_token):
+        # Rol y perfil del token: sin buscar el usuario
+        rol_id = access_token['rol_id']
+        es_admin, permisos_rol = permisos_de_rol(rol_id)
+        permisos = PermisosUsuario(
+            user_id, rol_id, es_admin, permisos_rol,
+            tipo_usuario=access_token.get('tipo_usuario'), perfil_id=access_token.get('perfil_id'),
+        )
+    else:
+        # Claims ausentes o viejos: no se confía en el tipo de usuario ni el perfil del token
+        permisos = permisos_de_usuario(user_id)
+        if permisos is None:
+            raise AccesoNoAutorizado('Usuario no encontrado')
+
+    http_request._permisos_usuario = permisos
+    return permisos
+
+
+# Señales para invalidar la caché
+
+@receiver(post_save, sender=RolHasPermiso)
+@receiver(post_delete, sender=RolHasPermiso)
+@receiver(post_save, sender=Permiso)
+@receiver(post_delete, sender=Permiso)
+@receiver(post_save, sender=Rol)
+@receiver(post_delete, sender=Rol)
+def invalidar_por_cambio_de_permisos(sender, **kwargs):
+    invalidar_permisos()
+
+
+@receiver(m2m_changed, sender=Rol.permisos.through)
+def invalidar_por_cambio_de_permisos_m2m(sender, action, **kwargs):
+    if action in ['post_add', 'post_remove', 'post_clear']:
+        invalidar_permisos()
+
+
+_DESCONOCIDO = object()
+
+
+def _valores_de_autorizacion(instance):
+    # Desde __dict__: un campo diferido (only/defer) no se consulta, queda como desconocido
+    return tuple(instance.__dict__.get(campo, _DESCONOCIDO) for campo in CAMPOS_DE_AUTORIZACION)
+
+
+@receiver(post_init, sender=Usuario)
+def recordar_valores_de_autorizacion(sender, instance, **kwargs):
+    instance._autorizacion_original = _valores_de_autorizacion(instance)
+
+
+@receiver(post_save, sender=Usuario)
+def invalidar_rol_de_usuario(sender, instance, created=False, **kwargs):
+    cache.delete(f'permisos:usuario:{instance.pk}')
+    originales = getattr(instance, '_autorizacion_original', None)
+    actuales = _valores_de_autorizacion(instance)
+    instance._autorizacion_original = actuales
+    # Un usuario recién creado no tiene tokens emitidos; los demás solo si cambió el rol o is_active
+    if created or (originales == actuales and _DESCONOCIDO not in originales):
+        return
+    incrementar_version(clave_version_usuario(instance.pk))
+
+
+@receiver(post_delete, sender=Usuario)
+def invalidar_usuario_eliminado(sender, instance, **kwargs):
+    cache.delete(f'permisos:usuario:{instance.pk}')
+    incrementar_version(clave_version_usuario(instance.pk))
@@ -0,0 +1,207 @@
+"""
+Resolución de ruta + método HTTP al permiso requerido ('<modulo>_<accion>').
+
+La tabla se construye una sola vez recorriendo el URLconf (los routers de DRF
+incluidos desde api/urls.py) y se guarda como un árbol de segmentos: los
+segmentos fijos ('citas', 'disponibilidad') son claves de diccionario y los
+parámetros ('<pk>') un comodín. Resolver una ruta cuesta un acceso por segmento.
+
+Las acciones estándar de los ViewSets se traducen a list -> listar,
+retrieve -> ver_detalles, create -> crear, update/partial_update -> editar y
+destroy -> eliminar. Las @action personalizadas se traducen según el método
+HTTP, igual que antes en PermisosMiddleware, distinguiendo rutas de detalle.
+Un ViewSet puede sobrescribir la acción de permiso de sus @action con el
+atributo `acciones_permisos = {'nombre_action': 'listar'}`.
+
+HEAD se resuelve como GET. Un método que la ruta no declara se trata como una
+ruta desconocida, para que PermisosMiddleware aplique el permiso del prefijo en
+lugar de dejar pasar la petición.
+"""
+import re
+
+from django.urls import URLPattern, URLResolver, get_resolver
+
+
+# Prefijo bajo /api/ -> módulo de permisos
+MODULOS_POR_PREFIJO = {
+    'usuarios': 'usuarios',
+    'clientes': 'clientes',
+    'manicuristas': 'manicuristas',
+    'roles': 'roles',
+    'citas': 'citas',
+    'servicios': 'servicios',
+    'insumos': 'insumos',
+    'categoria-insumos': 'categoria_insumos',
+    'compras': 'compras',
+    'proveedores': 'proveedores',
+    'abastecimientos': 'abastecimientos',
+    'venta-servicios': 'venta_servicios',
+    'liquidaciones': 'liquidaciones',
+    'novedades': 'novedades',
+    'correos': 'correos',
+}
+
+ACCIONES_VIEWSET = {
+    'list': 'listar',
+    'retrieve': 'ver_detalles',
+    'create': 'crear',
+    'update': 'editar',
+    'partial_update': 'editar',
+    'destroy': 'eliminar',
+}
+
+# Métodos que requieren el mismo permiso que otro
+METODOS_EQUIVALENTES = {'HEAD': 'GET'}
+
+ACCIONES_POR_METODO = {
+    'POST': 'crear',
+    'PUT': 'editar',
+    'PATCH': 'editar',
+    'DELETE': 'eliminar',
+}
+
+COMODIN = '*'
+# Grupos con nombre de re_path ('(?P<pk>[^/.]+)') y conversores de path ('<int:pk>')
+_PARAMETRO = re.compile(r'\(\?P<\w+>[^)]*\)|<[^>]+>')
+
+
+class Ruta:
+    """Ruta de la API con el permiso requerido por cada método"""
+
+    def __init__(self, patron, modulo, metodos):
+        self.patron = patron
+        self.modulo = modulo
+        # {'GET': 'citas_listar', ...}; el permiso es None si el módulo no está mapeado
+        self.metodos = metodos
+
+    def __repr__(self):
+        return f'<Ruta {self.patron} {self.metodos}>'
+
+
+class ResolverPermisos:
+    """Árbol de segmentos de ruta -> Ruta"""
+
+    def __init__(self, rutas):
+        self.rutas = rutas
+        self._arbol = {}
+        for segmentos, ruta in rutas:
+            nodo = self._arbol
+            for segmento in segmentos:
+                nodo = nodo.setdefault(segmento, {})
+            nodo.setdefault(None, ruta)
+
+    @classmethod
+    def desde_urlconf(cls, urlconf=None):
+        rutas = []
+        _recorrer(get_resolver(urlconf).url_patterns, [], rutas)
+        return cls(rutas)
+
+    def buscar(self, ruta):
+        """Ruta que corresponde al path (ej. '/api/citas/5/') o None"""
+        segmentos = [s for s in ruta.split('/') if s]
+        return self._buscar(self._arbol, segmentos, 0)
+
+    def _buscar(self, nodo, segmentos, i):
+        if i == len(segmentos):
+            return nodo.get(None)
+        # Primero el segmento fijo y, si no hay coincidencia, el comodín
+        hijo = nodo.get(segmentos[i])
+        if hijo is not None:
+            encontrada = self._buscar(hijo, segmentos, i + 1)
+            if encontrada is not None:
+                return encontrada
+        hijo = nodo.get(COMODIN)
+        if hijo is not None:
+            return self._buscar(hijo, segmentos, i + 1)
+        return None
+
+    def permiso_requerido(self, ruta, metodo):
+        """
+        Retorna (conocida, permiso). 'conocida' indica si la ruta y el método están
+        en el URLconf; 'permiso' es None cuando la ruta no exige permiso (módulo sin mapear).
+        """
+        encontrada = self.buscar(ruta)
+        metodo = metodo_equivalente(metodo)
+        if encontrada is None or metodo not in encontrada.metodos:
+            return False, None
+        return True, encontrada.metodos[metodo]
+
+    def rutas_sin_cobertura(self, permisos_existentes=None):
+        """Rutas/métodos sin permiso asignado o cuyo permiso no existe en la BD"""
+        resultado = []
+        for _, ruta in self.rutas:
+            for metodo, permiso in ruta.metodos.items():
+                if permiso is None:
+                    resultado.append((ruta.patron, metodo, None, 'módulo sin mapear'))
+                elif permisos_existentes is not None and permiso not in permisos_existentes:
+                    resultado.append((ruta.patron, metodo, permiso, 'permiso inexistente'))
+        return resultado
+
+
+def metodo_equivalente(metodo):
+    """Método HTTP en mayúsculas con el que se busca el permiso (HEAD -> GET)"""
+    metodo = metodo.upper()
+    return METODOS_EQUIVALENTES.get(metodo, metodo)
+
+
+def _segmentos(patron):
+    """Convierte el patrón de una URL en segmentos fijos o comodines"""
+    texto = _PARAMETRO.sub(COMODIN, str(patron).lstrip('^').rstrip('$'))
+    return [segmento.replace('\\', '') for segmento in texto.split('/') if segmento]
+
+
+def _accion_permiso(view, accion_view, metodo, es_detalle):
+    if accion_view in ACCIONES_VIEWSET:
+        return ACCIONES_VIEWSET[accion_view]
+    sobrescritas = getattr(view.cls, 'acciones_permisos', {}) or {}
+    if accion_view in sobrescritas:
+        return sobrescritas[accion_view]
+    if metodo == 'GET':
+        return 'ver_detalles' if es_detalle else 'listar'
+    return ACCIONES_POR_METODO.get(metodo, 'listar')
+
+
+def _recorrer(patrones, prefijo, rutas):
+    for patron in patrones:
+        if isinstance(patron, URLResolver):
+            _recorrer(patron.url_patterns, prefijo + _segmentos(patron.pattern), rutas)
+            continue
+        if not isinstance(patron, URLPattern):
+            continue
+
+        texto = str(patron.pattern)
+        # Ignorar variantes con sufijo de formato (.json) de los routers
+        if '(?P<format>' in texto:
+            continue
+
+        view = patron.callback
+        acciones = getattr(view, 'actions', None)
+        if not acciones or not hasattr(view, 'cls'):
+            continue
+
+        segmentos = prefijo + _segmentos(patron.pattern)
+        if len(segmentos) < 2 or segmentos[0] != 'api':
+            continue
+
+        modulo = MODULOS_POR_PREFIJO.get(segmentos[1])
+        es_detalle = COMODIN in segmentos[2:]
+        metodos = {}
+        for metodo, accion_view in acciones.items():
+            metodo = metodo.upper()
+            if modulo is None:
+                metodos[metodo] = None
+            else:
+                metodos[metodo] = f"{modulo}_{_accion_permiso(view, accion_view, metodo, es_detalle)}"
+
+        rutas.append((segmentos, Ruta('/' + '/'.join(segmentos) + '/', modulo, metodos)))
+
+
+_resolver = None
+
+
+def obtener_resolver():
+    """Resolver construido una sola vez por proceso"""
+    global _resolver
+    if _resolver is None:
+        _resolver = ResolverPermisos.desde_urlconf()
+    return _resolver
@@ -0,0 +1,53 @@
+"""
+Tokens JWT con los datos de autorización del usuario.
+
+Además de user_id, el token lleva el rol (id y nombre), el tipo de usuario, el
+id de su perfil (Cliente o Manicurista) y las versiones de la caché de permisos
+y del usuario con las que se emitió. Mientras ambas sigan vigentes, la autenticación, el
+middleware, los decoradores y las vistas toman esos datos del token en lugar de
+consultar Usuario, Rol y el perfil en cada petición (ver
+permisos_cache.claims_vigentes).
+"""
+from django.core.exceptions import ObjectDoesNotExist
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .permisos_cache import CLAIM_VERSION, CLAIM_VERSION_USUARIO, versiones_de_usuario
+
+
+# Roles cuyo perfil está en la relación inversa uno a uno del mismo nombre (usuario.cliente, usuario.manicurista)
+ROLES_CON_PERFIL = ('cliente', 'manicurista')
+
+
+def perfil_de_usuario(usuario):
+    """
+    (tipo_usuario, perfil) según el rol del usuario; perfil es None si no tiene.
+    Para no hacer consultas extra, cargar el usuario con
+    select_related('rol', 'cliente', 'manicurista').
+    """
+    nombre_rol = usuario.rol.nombre.lower() if usuario.rol else None
+    if nombre_rol in ROLES_CON_PERFIL:
+        try:
+            return nombre_rol, getattr(usuario, nombre_rol)
+        except ObjectDoesNotExist:
+            return nombre_rol, None
+    return 'usuario', None
+
+
+def tokens_para_usuario(usuario, tipo_usuario=None, perfil=None):
+    """
+    RefreshToken (y su access token) con los claims de autorización.
+
+    Las versiones se leen al emitir, justo después de cargar el usuario: un
+    cambio de rol o de is_active guardado después las incrementa y el token
+    deja de usar sus claims.
+    """
+    if tipo_usuario is None:
+        tipo_usuario, perfil = perfil_de_usuario(usuario)
+
+    refresh = RefreshToken.for_user(usuario)
+    refresh['rol_id'] = usuario.rol_id
+    refresh['rol'] = usuario.rol.nombre if usuario.rol else None
+    refresh['tipo_usuario'] = tipo_usuario
+    refresh['perfil_id'] = perfil.pk if perfil else None
+    refresh[CLAIM_VERSION], refresh[CLAIM_VERSION_USUARIO] = versiones_de_usuario(usuario.pk)
+    return refresh
@@ -2,13 +2,13 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.db import transaction
 from api.usuarios.models import Usuario
 from api.clientes.models import Cliente
 from api.manicuristas.models import Manicurista
 from api.roles.models import Rol
+from .tokens import perfil_de_usuario, tokens_para_usuario
 from .serializers import (
     LoginUnificadoSerializer,
     RegistroUnificadoSerializer,
@@ -16,7 +16,7 @@ from .serializers import (
 )
 from api.codigorecuperacion.models import CodigoRecuperacion
 from api.codigorecuperacion.serializers import SolicitudCodigoSerializer, ConfirmarCodigoSerializer
-from django.core.mail import send_mail
+from api.correos.cola import encolar_correo
 from django.conf import settings
 import secrets
 import string
@@ -36,8 +36,8 @@ def login_unificado(request):
     contraseña = serializer.validated_data['contraseña']
     
     try:
-        # Buscar usuario por correo
-        usuario = Usuario.objects.get(correo_electronico=correo)
+        # Usuario, rol y perfil (cliente o manicurista) en una sola consulta
+        usuario = Usuario.objects.select_related('rol', 'cliente', 'manicurista').get(correo_electronico=correo)
         
         # Verificar contraseña
         if not usuario.check_password(contraseña):
@@ -56,31 +56,26 @@ def login_unificado(request):
         # Obtener información del rol
         rol = usuario.rol.nombre if usuario.rol else None
         
-        # Obtener información adicional según el tipo de usuario
+        # Obtener información adicional según el tipo de usuario (perfil ya cargado)
+        tipo_usuario, perfil = perfil_de_usuario(usuario)
         info_adicional = {}
-        if rol and rol.lower() == 'cliente':
-            try:
-                cliente = Cliente.objects.get(usuario=usuario)
+        if tipo_usuario == 'cliente':
+            if perfil:
                 info_adicional = {
                     'tipo_usuario': 'cliente',
-                    'debe_cambiar_contraseña': cliente.debe_cambiar_contraseña,
-                    'nombre_completo': cliente.nombre,
-                    'documento': cliente.documento
+                    'debe_cambiar_contraseña': perfil.debe_cambiar_contraseña,
+                    'nombre_completo': perfil.nombre,
+                    'documento': perfil.documento
                 }
-            except Cliente.DoesNotExist:
-                pass
-        elif rol and rol.lower() == 'manicurista':
-            try:
-                manicurista = Manicurista.objects.get(usuario=usuario)
+        elif tipo_usuario == 'manicurista':
+            if perfil:
                 info_adicional = {
                     'tipo_usuario': 'manicurista',
-                    'debe_cambiar_contraseña': manicurista.debe_cambiar_contraseña,
-                    'nombre_completo': manicurista.nombre,
-                    'documento': manicurista.numero_documento,
-                    'especialidad': manicurista.especialidad
+                    'debe_cambiar_contraseña': perfil.debe_cambiar_contraseña,
+                    'nombre_completo': perfil.nombre,
+                    'documento': perfil.numero_documento,
+                    'especialidad': perfil.especialidad
                 }
-            except Manicurista.DoesNotExist:
-                pass
         else:
             info_adicional = {
                 'tipo_usuario': 'usuario',
@@ -89,8 +84,8 @@ def login_unificado(request):
                 'documento': usuario.documento
             }
         
-        # Generar tokens JWT
-        refresh = RefreshToken.for_user(usuario)
+        # Generar tokens JWT con rol, tipo de usuario y perfil
+        refresh = tokens_para_usuario(usuario, tipo_usuario, perfil)
         access_token = str(refresh.access_token)
         refresh_token = str(refresh)
         
@@ -208,8 +203,8 @@ def registro_unificado(request):
                 
                 manicurista = Manicurista.objects.create(**manicurista_data)
             
-            # Generar tokens JWT
-            refresh = RefreshToken.for_user(usuario)
+            # Generar tokens JWT con rol, tipo de usuario y perfil
+            refresh = tokens_para_usuario(usuario)
             access_token = str(refresh.access_token)
             refresh_token = str(refresh)
             
@@ -448,13 +443,11 @@ def enviar_correo_contraseña_temporal(correo, nombre, contraseña, tipo_usuario
     </html>
     """
     
-    send_mail(
+    encolar_correo(
         asunto,
         f'Tu contraseña temporal es: {contraseña}',
-        settings.DEFAULT_FROM_EMAIL,
         [correo],
         html_message=mensaje_html,
-        fail_silently=False,
     )
 
 
@@ -499,17 +492,15 @@ def enviar_correo_codigo_recuperacion(correo, nombre, codigo):
         </html>
         """
         
-        print(f"🔍 Intentando enviar correo...")
-        resultado = send_mail(
+        print(f"🔍 Encolando correo...")
+        resultado = encolar_correo(
             asunto,
             f'Tu código de recuperación es: {codigo}',
-            settings.DEFAULT_FROM_EMAIL,
             [correo],
             html_message=mensaje_html,
-            fail_silently=False,
         )
         
-        print(f"✅ Correo enviado exitosamente. Resultado: {resultado}")
+        print(f"✅ Correo encolado exitosamente. ID: {resultado.id}")
         return True
         
     except Exception as e:
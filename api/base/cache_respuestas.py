@@ -0,0 +1,112 @@
+"""
+Caché de lectura para los endpoints de catálogo (servicios activos,
+manicuristas disponibles, roles, módulos, permisos...).
+
+Cada modelo tiene una versión en caché ('respuestas:version:servicios.servicio')
+que post_save/post_delete incrementan; la clave de una respuesta incluye la
+ruta, los parámetros y las versiones de los modelos de los que depende, así
+que cualquier cambio deja obsoletas todas sus respuestas sin borrarlas una por
+una. Los cambios con queryset.update() no envían señales: quien los haga debe
+llamar a invalidar_modelo().
+
+Las respuestas llevan ETag; si el cliente envía If-None-Match con el mismo
+valor se responde 304 sin cuerpo.
+"""
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .versiones import incrementar_version, leer_versiones
+
+
+TIMEOUT = getattr(settings, 'CACHE_TTL', 60 * 15)
+
+
+def clave_version(modelo):
+    return f'respuestas:version:{modelo._meta.label_lower}'
+
+
+def versiones(modelos):
+    """Versión actual de cada modelo (una sola lectura de la caché)"""
+    return leer_versiones([clave_version(modelo) for modelo in modelos])
+
+
+def invalidar_modelo(modelo):
+    """Deja obsoletas todas las respuestas que dependen del modelo"""
+    incrementar_version(clave_version(modelo))
+
+
+def _invalidar_por_senal(sender, **kwargs):
+    invalidar_modelo(sender)
+
+
+def registrar_modelo(modelo):
+    """Conecta las señales que invalidan las respuestas del modelo (una vez por modelo)"""
+    uid = f'cache_respuestas_{modelo._meta.label_lower}'
+    post_save.connect(_invalidar_por_senal, sender=modelo, dispatch_uid=uid)
+    post_delete.connect(_invalidar_por_senal, sender=modelo, dispatch_uid=uid)
+
+
+def calcular_etag(datos):
+    contenido = json.dumps(datos, cls=JSONEncoder, sort_keys=True, ensure_ascii=False)
+    return f'"{hashlib.md5(contenido.encode()).hexdigest()}"'
+
+
+def etag_coincide(request, etag):
+    """True si el If-None-Match del cliente incluye el ETag (o es '*')"""
+    encabezado = request.headers.get('If-None-Match')
+    if not encabezado:
+        return False
+    candidatos = {valor.strip().removeprefix('W/') for valor in encabezado.split(',')}
+    return '*' in candidatos or etag in candidatos
+
+
+def clave_respuesta(request, modelos):
+    parametros = '&'.join(
+        f'{clave}={valor}' for clave in sorted(request.query_params) for valor in request.query_params.getlist(clave)
+    )
+    resumen = hashlib.md5(f'{request.path}?{parametros}'.encode()).hexdigest()
+    return f"respuestas:{resumen}:{'.'.join(str(version) for version in versiones(modelos))}"
+
+
+def respuesta_en_cache(*modelos, timeout=TIMEOUT):
+    """
+    Decorador para acciones GET de un ViewSet cuya respuesta depende solo de los
+    modelos indicados (no del usuario). Se coloca debajo de @action:
+
+        @action(detail=False, methods=['get'])
+        @respuesta_en_cache(Servicio)
+        def activos(self, request): ...
+
+    Solo se guardan las respuestas 200.
+    """
+    for modelo in modelos:
+        registrar_modelo(modelo)
+
+    def decorador(vista):
+        @functools.wraps(vista)
+        def envoltura(self, request, *args, **kwargs):
+            key = clave_respuesta(request, modelos)
+            guardado = cache.get(key)
+            if guardado is None:
+                response = vista(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                guardado = (response.data, calcular_etag(response.data))
+                cache.set(key, guardado, timeout)
+
+            datos, etag = guardado
+            # El navegador guarda la respuesta pero la revalida con If-None-Match en cada uso
+            headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+            if etag_coincide(request, etag):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+            return Response(datos, headers=headers)
+        return envoltura
+    return decorador
@@ -0,0 +1,34 @@
+"""
+Caché corta para los endpoints de estadísticas del dashboard.
+
+Los terminales de recepción consultan estas estadísticas cada pocos segundos;
+el resultado se guarda unos segundos bajo una clave con el recurso, la fecha
+del día y los parámetros de la consulta, de modo que todas las peticiones de
+ese intervalo comparten una sola ejecución de las consultas.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+
+TIMEOUT = getattr(settings, 'ESTADISTICAS_CACHE_TTL', 30)
+
+
+def clave_estadisticas(recurso, query_params):
+    parametros = '&'.join(
+        f'{clave}={valor}' for clave in sorted(query_params) for valor in query_params.getlist(clave)
+    )
+    resumen = hashlib.md5(parametros.encode()).hexdigest()
+    return f'estadisticas:{recurso}:{timezone.localdate().isoformat()}:{resumen}'
+
+
+def estadisticas_en_cache(recurso, request, calcular, timeout=TIMEOUT):
+    """Retorna las estadísticas guardadas o las calcula con calcular() y las guarda"""
+    key = clave_estadisticas(recurso, request.query_params)
+    datos = cache.get(key)
+    if datos is None:
+        datos = calcular()
+        cache.set(key, datos, timeout)
+    return datos
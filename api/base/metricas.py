@@ -0,0 +1,175 @@
+"""
+Métricas de rendimiento por endpoint para RendimientoMiddleware.
+
+Por cada petición muestreada se registra, etiquetado por vista (ViewSet.acción),
+método y clase de status: duración total, número de consultas SQL, tiempo en
+la base de datos, tiempo de serialización (Serializer.data) y tamaño de la
+respuesta. Los valores se acumulan en histogramas en memoria del proceso y se
+exportan en formato de texto de Prometheus en /api/_metrics. Con varios
+procesos (gunicorn) cada uno expone sus propios contadores; Prometheus los
+agrega por instancia.
+"""
+import bisect
+import threading
+from contextvars import ContextVar
+from time import perf_counter
+
+from rest_framework import serializers
+
+
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LIMITES_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+LIMITES_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+ETIQUETAS = ('vista', 'metodo', 'estado')
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatear_etiquetas(valores, extra=None):
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(ETIQUETAS, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}'
+
+
+def _formatear_numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    def __init__(self, nombre, ayuda):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, etiquetas, valor=1):
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + valor
+
+    def exportar(self):
+        with self._lock:
+            valores = dict(self._valores)
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} counter']
+        for etiquetas, valor in sorted(valores.items()):
+            lineas.append(f'{self.nombre}{_formatear_etiquetas(etiquetas)} {_formatear_numero(valor)}')
+        return lineas
+
+
+class Histograma:
+    def __init__(self, nombre, ayuda, limites):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.limites = tuple(limites)
+        # etiquetas -> [conteos por cubeta (la última es +Inf), suma, total]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, etiquetas, valor):
+        indice = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                serie = self._series[etiquetas] = [[0] * (len(self.limites) + 1), 0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exportar(self):
+        with self._lock:
+            series = {etiquetas: (list(conteos), suma, total) for etiquetas, (conteos, suma, total) in self._series.items()}
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} histogram']
+        for etiquetas, (conteos, suma, total) in sorted(series.items()):
+            acumulado = 0
+            for limite, conteo in zip((*self.limites, '+Inf'), conteos):
+                acumulado += conteo
+                le = limite if limite == '+Inf' else _formatear_numero(float(limite))
+                extra = f'le="{le}"'
+                lineas.append(f'{self.nombre}_bucket{_formatear_etiquetas(etiquetas, extra)} {acumulado}')
+            lineas.append(f'{self.nombre}_sum{_formatear_etiquetas(etiquetas)} {_formatear_numero(suma)}')
+            lineas.append(f'{self.nombre}_count{_formatear_etiquetas(etiquetas)} {total}')
+        return lineas
+
+
+PETICIONES = Contador('winespa_http_requests_total', 'Peticiones medidas')
+DURACION = Histograma('winespa_http_request_duration_seconds', 'Duración de la petición en segundos', LIMITES_SEGUNDOS)
+CONSULTAS = Histograma('winespa_http_db_queries', 'Consultas SQL por petición', LIMITES_CONSULTAS)
+TIEMPO_DB = Histograma('winespa_http_db_duration_seconds', 'Tiempo en la base de datos por petición', LIMITES_SEGUNDOS)
+TIEMPO_SERIALIZACION = Histograma(
+    'winespa_http_serializer_duration_seconds', 'Tiempo en Serializer.data por petición', LIMITES_SEGUNDOS
+)
+TAMANO = Histograma('winespa_http_response_size_bytes', 'Tamaño del cuerpo de la respuesta', LIMITES_BYTES)
+
+REGISTRO = (PETICIONES, DURACION, CONSULTAS, TIEMPO_DB, TIEMPO_SERIALIZACION, TAMANO)
+
+
+class Medicion:
+    """Acumuladores de una petición en curso"""
+
+    __slots__ = ('consultas', 'tiempo_db', 'tiempo_serializacion', 'profundidad')
+
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo_db = 0.0
+        self.tiempo_serializacion = 0.0
+        self.profundidad = 0
+
+    def medir_consulta(self, execute, sql, params, many, context):
+        """Wrapper para connection.execute_wrapper()"""
+        inicio = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tiempo_db += perf_counter() - inicio
+            self.consultas += 1
+
+
+medicion_actual = ContextVar('medicion_actual', default=None)
+
+
+def registrar_peticion(etiquetas, medicion, duracion, tamano):
+    PETICIONES.incrementar(etiquetas)
+    DURACION.observar(etiquetas, duracion)
+    CONSULTAS.observar(etiquetas, medicion.consultas)
+    TIEMPO_DB.observar(etiquetas, medicion.tiempo_db)
+    TIEMPO_SERIALIZACION.observar(etiquetas, medicion.tiempo_serializacion)
+    if tamano is not None:
+        TAMANO.observar(etiquetas, tamano)
+
+
+def exportar_prometheus():
+    lineas = []
+    for metrica in REGISTRO:
+        lineas.extend(metrica.exportar())
+    return '\n'.join(lineas) + '\n'
+
+
+def _medir_data(clase):
+    """Envuelve la propiedad data de un serializer para sumar su tiempo a la medición actual"""
+    original = clase.data.fget
+
+    def data(self):
+        medicion = medicion_actual.get()
+        # Los serializers anidados (p. ej. en un SerializerMethodField) se cuentan dentro del externo
+        if medicion is None or medicion.profundidad:
+            return original(self)
+        medicion.profundidad += 1
+        inicio = perf_counter()
+        try:
+            return original(self)
+        finally:
+            medicion.tiempo_serializacion += perf_counter() - inicio
+            medicion.profundidad -= 1
+
+    data._medido = True
+    clase.data = property(data)
+
+
+def instrumentar_serializers():
+    """Mide Serializer.data y ListSerializer.data (una sola vez por proceso)"""
+    for clase in (serializers.Serializer, serializers.ListSerializer):
+        if not getattr(clase.data.fget, '_medido', False):
+            _medir_data(clase)
@@ -0,0 +1,65 @@
+import random
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from . import metricas
+
+
+RUTA_METRICAS = '/api/_metrics'
+
+
+class RendimientoMiddleware:
+    """
+    Mide cada petición muestreada (duración, consultas SQL, tiempo en BD,
+    tiempo de serialización y tamaño de la respuesta) y la agrega en los
+    histogramas de api/base/metricas.py.
+
+    Configuración:
+    - METRICAS_HABILITADAS: si es False el middleware se descarta al arrancar
+      (MiddlewareNotUsed), sin ningún costo por petición
+    - METRICAS_MUESTREO: fracción de peticiones medidas (0.0 - 1.0)
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICAS_HABILITADAS', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.muestreo = getattr(settings, 'METRICAS_MUESTREO', 1.0)
+        metricas.instrumentar_serializers()
+
+    def __call__(self, request):
+        if request.path.startswith(RUTA_METRICAS) or (self.muestreo < 1 and random.random() >= self.muestreo):
+            return self.get_response(request)
+
+        medicion = metricas.Medicion()
+        token = metricas.medicion_actual.set(medicion)
+        inicio = perf_counter()
+        try:
+            with connection.execute_wrapper(medicion.medir_consulta):
+                response = self.get_response(request)
+        finally:
+            metricas.medicion_actual.reset(token)
+        duracion = perf_counter() - inicio
+
+        tamano = None if response.streaming else len(response.content)
+        metricas.registrar_peticion(self._etiquetas(request, response), medicion, duracion, tamano)
+        return response
+
+    def _etiquetas(self, request, response):
+        estado = f'{response.status_code // 100}xx'
+        match = request.resolver_match
+        if match is None:
+            return ('sin_ruta', request.method, estado)
+
+        vista = getattr(match.func, 'cls', None)
+        if vista is None:
+            nombre = match.view_name or match._func_path
+        elif getattr(match.func, 'actions', None):
+            # ViewSet: la acción que atiende el método ('ServicioViewSet.activos')
+            nombre = f"{vista.__name__}.{match.func.actions.get(request.method.lower(), request.method.lower())}"
+        else:
+            nombre = vista.__name__
+        return (nombre, request.method, estado)
@@ -0,0 +1,36 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CursorPaginacion(CursorPagination):
+    """
+    Paginación por cursor (keyset) sobre el orden por defecto del modelo.
+
+    Es opcional para no romper a los clientes que esperan la lista completa:
+    solo se pagina cuando la petición trae `?cursor=` o `?page_size=`. La respuesta
+    paginada tiene la forma {next, previous, results}.
+
+    El orden sale de `ordering_paginacion` en el ViewSet o de Meta.ordering del
+    modelo, y se desempata por pk para que el orden sea determinista. El cursor
+    de DRF solo guarda el valor del PRIMER campo más un desplazamiento entre las
+    filas que lo comparten: si ese campo no es único (ej. una fecha), las filas
+    insertadas o borradas con el mismo valor pueden repetirse u omitirse entre
+    páginas, y muchas filas iguales hacen que el desplazamiento recorra la tabla.
+    Para tablas grandes que se recorren completas, usar un primer campo único:
+    `ordering_paginacion = ('-id',)`.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_page_size(self, request):
+        if (self.cursor_query_param not in request.query_params
+                and self.page_size_query_param not in request.query_params):
+            return None
+        return super().get_page_size(request)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'ordering_paginacion', None) or queryset.model._meta.ordering or ['-pk']
+        ordering = list(ordering)
+        if not any(campo.lstrip('-') in ('pk', 'id') for campo in ordering):
+            ordering.append('-pk' if ordering[0].startswith('-') else 'pk')
+        return tuple(ordering)
@@ -0,0 +1,23 @@
+class CamposDinamicosMixin:
+    """
+    Permite pedir solo algunos campos de un serializer con `?fields=id,nombre`.
+
+    Solo aplica al serializer principal de una petición GET (los serializers
+    anidados reciben su contexto después de construirse y no se recortan).
+    """
+    parametro_campos = 'fields'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+
+        campos = request.query_params.get(self.parametro_campos)
+        if not campos:
+            return
+
+        permitidos = {campo.strip() for campo in campos.split(',') if campo.strip()}
+        for nombre in set(self.fields) - permitidos:
+            self.fields.pop(nombre)
@@ -0,0 +1,36 @@
+"""
+Contadores de versión en la caché.
+
+Un grupo de entradas en caché (las respuestas de un modelo, los permisos de
+los roles...) incluye en su clave la versión del grupo; incrementarla deja
+obsoletas todas sus entradas sin borrarlas una por una.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def _version_inicial():
+    # Basada en el reloj: si la caché pierde el contador no se reutilizan versiones viejas
+    return int(time.time() * 1000)
+
+
+def leer_versiones(claves):
+    """Versión actual de cada clave, en el mismo orden (una sola lectura de la caché)"""
+    actuales = cache.get_many(claves)
+    for clave in claves:
+        if clave not in actuales:
+            cache.add(clave, _version_inicial(), None)
+            actuales[clave] = cache.get(clave)
+    return [actuales[clave] for clave in claves]
+
+
+def leer_version(clave):
+    return leer_versiones([clave])[0]
+
+
+def incrementar_version(clave):
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.set(clave, _version_inicial(), None)
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+
+from . import metricas
+
+
+@require_GET
+def metricas_prometheus(request):
+    """
+    Métricas de rendimiento en formato de texto de Prometheus.
+    Endpoint: /api/_metrics
+    Si METRICAS_TOKEN está definido se exige el header 'Authorization: Bearer <token>'.
+    """
+    if not getattr(settings, 'METRICAS_HABILITADAS', False):
+        return JsonResponse({'error': 'Las métricas no están habilitadas'}, status=404)
+
+    token = getattr(settings, 'METRICAS_TOKEN', None)
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return JsonResponse({'error': 'Token de métricas inválido'}, status=401)
+
+    return HttpResponse(
+        metricas.exportar_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
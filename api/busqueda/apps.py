@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+class BusquedaConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'api.busqueda'
+    verbose_name = 'Búsqueda'
+
+    def ready(self):
+        # Registrar las entidades buscables y las señales que mantienen el índice
+        from . import entidades  # noqa: F401
@@ -0,0 +1,26 @@
+"""Entidades buscables. Se importa desde BusquedaConfig.ready()"""
+from api.clientes.models import Cliente
+from api.manicuristas.models import Manicurista
+from api.servicios.models import Servicio
+
+from .indice import registrar
+
+
+registrar(
+    'cliente', Cliente,
+    campos=['nombre', 'documento'],
+    campos_respuesta=['nombre', 'documento', 'celular', 'correo_electronico', 'estado'],
+    permiso='clientes_listar',
+)
+registrar(
+    'manicurista', Manicurista,
+    campos=['nombre', 'numero_documento'],
+    campos_respuesta=['nombre', 'numero_documento', 'especialidad', 'estado'],
+    permiso='manicuristas_listar',
+)
+registrar(
+    'servicio', Servicio,
+    campos=['nombre', 'descripcion'],
+    campos_respuesta=['nombre', 'precio', 'duracion', 'estado'],
+    permiso='servicios_listar',
+)
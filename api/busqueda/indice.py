@@ -0,0 +1,207 @@
+"""
+Búsqueda sin tildes para clientes, manicuristas y servicios.
+
+Cada entidad registrada guarda en TerminoBusqueda las palabras de sus campos
+buscables, normalizadas (sin tildes y en minúsculas: "María" -> "maria"), y
+los trigramas de esas palabras. El índice se actualiza con señales al guardar
+o eliminar, y solo escribe la diferencia con lo que ya estaba indexado.
+
+buscar() resuelve una consulta en dos pasos:
+  1. Prefijo: cada palabra de la consulta debe ser prefijo de alguna palabra
+     indexada del objeto (LIKE 'mar%' sobre el índice, sin recorrer la tabla).
+     Una palabra exacta puntúa 2 y un prefijo 1. Una sola consulta agrupada por
+     objeto exige todas las palabras (HAVING) y aplica el límite al final.
+  2. Trigramas: si el prefijo no llena el límite, se buscan objetos que
+     compartan suficientes trigramas con la consulta ("mria" encuentra
+     "maria"). Su puntaje es la fracción de trigramas en común (< 1), así que
+     quedan siempre después de las coincidencias por prefijo.
+"""
+import math
+import re
+import unicodedata
+from collections import namedtuple
+
+from django.db.models import Case, Count, F, IntegerField, Max, Q, Value, When
+from django.db.models.signals import post_save, post_delete
+
+from .models import TerminoBusqueda
+
+
+LONGITUD_TERMINO = 50
+# Fracción mínima de trigramas de la consulta que debe compartir un resultado
+UMBRAL_TRIGRAMAS = 0.5
+
+Entidad = namedtuple('Entidad', ['nombre', 'modelo', 'campos', 'campos_respuesta', 'permiso'])
+
+ENTIDADES = {}
+
+_NO_ALFANUMERICO = re.compile(r'[^0-9a-z]+')
+
+
+def normalizar(texto):
+    """Palabras del texto sin tildes y en minúsculas: 'José Peña-Díaz' -> ['jose', 'pena', 'diaz']"""
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return [palabra[:LONGITUD_TERMINO] for palabra in _NO_ALFANUMERICO.sub(' ', texto).split()]
+
+
+def trigramas(palabra):
+    """Trigramas de una palabra, con relleno para dar peso al inicio: 'ana' -> {'  a', ' an', 'ana', 'na '}"""
+    relleno = f'  {palabra} '
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+def terminos(*textos):
+    """{(tipo, termino)} de los textos de un objeto"""
+    resultado = set()
+    for texto in textos:
+        for palabra in normalizar(texto):
+            resultado.add(('palabra', palabra))
+            resultado.update(('trigrama', trigrama) for trigrama in trigramas(palabra))
+    return resultado
+
+
+def registrar(nombre, modelo, campos, campos_respuesta, permiso):
+    """Registra una entidad buscable y conecta las señales que mantienen su índice"""
+    entidad = Entidad(nombre, modelo, tuple(campos), tuple(campos_respuesta), permiso)
+    ENTIDADES[nombre] = entidad
+
+    def al_guardar(sender, instance, update_fields=None, **kwargs):
+        if update_fields is not None and not set(update_fields) & set(entidad.campos):
+            return
+        indexar(entidad, instance)
+
+    def al_eliminar(sender, instance, **kwargs):
+        TerminoBusqueda.objects.filter(entidad=nombre, objeto_id=instance.pk).delete()
+
+    post_save.connect(al_guardar, sender=modelo, weak=False, dispatch_uid=f'busqueda_indexar_{nombre}')
+    post_delete.connect(al_eliminar, sender=modelo, weak=False, dispatch_uid=f'busqueda_eliminar_{nombre}')
+    return entidad
+
+
+def indexar(entidad, instancia):
+    """Actualiza los términos de un objeto escribiendo solo la diferencia"""
+    nuevos = terminos(*(getattr(instancia, campo) for campo in entidad.campos))
+    existentes = {
+        (tipo, termino): pk
+        for pk, tipo, termino in TerminoBusqueda.objects.filter(
+            entidad=entidad.nombre, objeto_id=instancia.pk
+        ).values_list('pk', 'tipo', 'termino')
+    }
+    sobrantes = [pk for clave, pk in existentes.items() if clave not in nuevos]
+    if sobrantes:
+        TerminoBusqueda.objects.filter(pk__in=sobrantes).delete()
+    TerminoBusqueda.objects.bulk_create([
+        TerminoBusqueda(entidad=entidad.nombre, objeto_id=instancia.pk, tipo=tipo, termino=termino)
+        for tipo, termino in nuevos if (tipo, termino) not in existentes
+    ])
+
+
+def reindexar(entidad, lote=1000):
+    """Reconstruye el índice completo de una entidad. Retorna los términos escritos"""
+    TerminoBusqueda.objects.filter(entidad=entidad.nombre).delete()
+    filas = []
+    total = 0
+    for valores in entidad.modelo.objects.order_by().values_list('pk', *entidad.campos).iterator(chunk_size=lote):
+        filas.extend(
+            TerminoBusqueda(entidad=entidad.nombre, objeto_id=valores[0], tipo=tipo, termino=termino)
+            for tipo, termino in terminos(*valores[1:])
+        )
+        if len(filas) >= lote:
+            TerminoBusqueda.objects.bulk_create(filas, batch_size=lote)
+            total += len(filas)
+            filas = []
+    TerminoBusqueda.objects.bulk_create(filas, batch_size=lote)
+    return total + len(filas)
+
+
+def _coincidencias_prefijo(palabras, entidades, limite):
+    """{(entidad, objeto_id): puntaje} de los objetos que tienen todas las palabras como prefijo"""
+    palabras = list(dict.fromkeys(palabras))
+    # Los términos ya están en minúsculas; istartswith genera un LIKE que usa el índice en MySQL
+    prefijos = [Q(termino__istartswith=palabra) for palabra in palabras]
+    # Puntaje de cada palabra en el objeto: 2 si es una palabra exacta, 1 si es prefijo, 0 si falta
+    puntajes = {
+        f'p{i}': Max(Case(
+            When(termino=palabra, then=Value(2)),
+            When(prefijos[i], then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+        for i, palabra in enumerate(palabras)
+    }
+    filtro = prefijos[0]
+    for prefijo in prefijos[1:]:
+        filtro |= prefijo
+
+    filas = TerminoBusqueda.objects.filter(filtro, tipo='palabra', entidad__in=entidades).values(
+        'entidad', 'objeto_id'
+    ).annotate(**puntajes).filter(
+        **{f'{alias}__gte': 1 for alias in puntajes}
+    ).annotate(
+        puntaje=sum((F(alias) for alias in puntajes), Value(0))
+    ).order_by('-puntaje', 'objeto_id')[:limite]
+    return {(fila['entidad'], fila['objeto_id']): fila['puntaje'] for fila in filas}
+
+
+def _coincidencias_trigramas(palabras, entidades, excluir, limite):
+    """{(entidad, objeto_id): similitud} de los objetos que comparten suficientes trigramas"""
+    consulta = set()
+    for palabra in palabras:
+        consulta |= trigramas(palabra)
+    minimo = max(2, math.ceil(len(consulta) * UMBRAL_TRIGRAMAS))
+    filas = TerminoBusqueda.objects.filter(
+        tipo='trigrama', entidad__in=entidades, termino__in=consulta
+    ).values('entidad', 'objeto_id').annotate(
+        comunes=Count('id')
+    ).filter(comunes__gte=minimo).order_by('-comunes')[:limite + len(excluir)]
+    return {
+        (fila['entidad'], fila['objeto_id']): round(fila['comunes'] / len(consulta), 3)
+        for fila in filas
+        if (fila['entidad'], fila['objeto_id']) not in excluir
+    }
+
+
+def buscar_claves(texto, entidades=None, limite=10):
+    """[((entidad, objeto_id), puntaje)] ordenados por puntaje"""
+    palabras = normalizar(texto)
+    entidades = [nombre for nombre in (entidades or ENTIDADES) if nombre in ENTIDADES]
+    if not palabras or not entidades:
+        return []
+
+    puntajes = _coincidencias_prefijo(palabras, entidades, limite)
+    if len(puntajes) < limite and sum(len(palabra) for palabra in palabras) >= 3:
+        puntajes.update(_coincidencias_trigramas(palabras, entidades, puntajes, limite - len(puntajes)))
+    # A igual puntaje, primero los objetos más antiguos (ids menores)
+    return sorted(puntajes.items(), key=lambda item: (-item[1], item[0][1]))[:limite]
+
+
+def buscar_ids(nombre, texto, limite=10):
+    """IDs de una entidad que coinciden con el texto, ordenados por relevancia"""
+    return [objeto_id for (_, objeto_id), _ in buscar_claves(texto, [nombre], limite)]
+
+
+def ordenar_por_ids(queryset, ids):
+    """Objetos del queryset en el orden de ids (una consulta)"""
+    objetos = queryset.in_bulk(ids)
+    return [objetos[objeto_id] for objeto_id in ids if objeto_id in objetos]
+
+
+def buscar(texto, entidades=None, limite=10):
+    """Resultados de varias entidades, con los campos de respuesta de cada una"""
+    claves = buscar_claves(texto, entidades, limite)
+    ids_por_entidad = {}
+    for (nombre, objeto_id), _ in claves:
+        ids_por_entidad.setdefault(nombre, []).append(objeto_id)
+
+    datos = {}
+    for nombre, ids in ids_por_entidad.items():
+        entidad = ENTIDADES[nombre]
+        for fila in entidad.modelo.objects.filter(pk__in=ids).values('id', *entidad.campos_respuesta):
+            datos[(nombre, fila['id'])] = fila
+
+    return [
+        {'tipo': nombre, 'puntaje': puntaje, **datos[(nombre, objeto_id)]}
+        for (nombre, objeto_id), puntaje in claves
+        if (nombre, objeto_id) in datos
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-18 03:12
+
+from django.db import migrations, models
+
+from api.busqueda.indice import terminos
+
+
+# (entidad, app, modelo, campos): los mismos que registra api/busqueda/entidades.py
+ENTIDADES = [
+    ('cliente', 'clientes', 'Cliente', ('nombre', 'documento')),
+    ('manicurista', 'manicuristas', 'Manicurista', ('nombre', 'numero_documento')),
+    ('servicio', 'servicios', 'Servicio', ('nombre', 'descripcion')),
+]
+
+
+def indexar_existentes(apps, schema_editor):
+    TerminoBusqueda = apps.get_model('busqueda', 'TerminoBusqueda')
+    for entidad, app, modelo, campos in ENTIDADES:
+        filas = [
+            TerminoBusqueda(entidad=entidad, objeto_id=valores[0], tipo=tipo, termino=termino)
+            for valores in apps.get_model(app, modelo).objects.values_list('pk', *campos).iterator()
+            for tipo, termino in terminos(*valores[1:])
+        ]
+        TerminoBusqueda.objects.bulk_create(filas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('clientes', '0002_initial'),
+        ('manicuristas', '0002_initial'),
+        ('servicios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminoBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entidad', models.CharField(max_length=20, verbose_name='Entidad')),
+                ('objeto_id', models.PositiveBigIntegerField(verbose_name='ID del objeto')),
+                ('tipo', models.CharField(choices=[('palabra', 'Palabra'), ('trigrama', 'Trigrama')], max_length=10, verbose_name='Tipo')),
+                ('termino', models.CharField(max_length=50, verbose_name='Término')),
+            ],
+            options={
+                'verbose_name': 'Término de búsqueda',
+                'verbose_name_plural': 'Términos de búsqueda',
+                'db_table': 'busqueda_terminos',
+                'indexes': [models.Index(fields=['tipo', 'termino', 'entidad'], name='busqueda_termino_idx'), models.Index(fields=['entidad', 'objeto_id'], name='busqueda_objeto_idx')],
+            },
+        ),
+        migrations.RunPython(indexar_existentes, migrations.RunPython.noop),
+    ]
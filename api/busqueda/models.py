@@ -0,0 +1,31 @@
+from django.db import models
+
+
+class TerminoBusqueda(models.Model):
+    """
+    Índice de búsqueda: términos normalizados (sin tildes, en minúsculas) de los
+    campos buscables de cada entidad. Las palabras se consultan por prefijo
+    (LIKE 'mar%' usa el índice) y los trigramas permiten encontrar nombres mal
+    escritos. Se mantiene con señales; ver api/busqueda/indice.py.
+    """
+    TIPO_CHOICES = [
+        ('palabra', 'Palabra'),
+        ('trigrama', 'Trigrama'),
+    ]
+
+    entidad = models.CharField(max_length=20, verbose_name="Entidad")
+    objeto_id = models.PositiveBigIntegerField(verbose_name="ID del objeto")
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES, verbose_name="Tipo")
+    termino = models.CharField(max_length=50, verbose_name="Término")
+
+    class Meta:
+        db_table = 'busqueda_terminos'
+        verbose_name = "Término de búsqueda"
+        verbose_name_plural = "Términos de búsqueda"
+        indexes = [
+            models.Index(fields=['tipo', 'termino', 'entidad'], name='busqueda_termino_idx'),
+            models.Index(fields=['entidad', 'objeto_id'], name='busqueda_objeto_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.entidad} {self.objeto_id}: {self.termino} ({self.tipo})"
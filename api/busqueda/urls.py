@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import BuscarView
+
+urlpatterns = [
+    path('', BuscarView.as_view(), name='buscar'),
+]
@@ -0,0 +1,52 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.authentication.permisos_cache import AccesoNoAutorizado, permisos_desde_request
+
+from . import indice
+
+
+class BuscarView(APIView):
+    """
+    Búsqueda global sin tildes en clientes, manicuristas y servicios.
+    Endpoint: /api/buscar/?q=maria
+    Parámetros:
+    - q: Texto a buscar (nombre, documento; en servicios también la descripción)
+    - tipo: Entidades separadas por coma (cliente,manicurista,servicio). Por defecto, todas
+    - limite: Máximo de resultados (1-50, por defecto 10)
+    """
+
+    def get(self, request):
+        texto = request.query_params.get('q', '').strip()
+        if not texto:
+            return Response({"error": "Se requiere el parámetro q"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limite = min(max(int(request.query_params.get('limite', 10)), 1), 50)
+        except ValueError:
+            return Response({"error": "El límite debe ser un número entero"}, status=status.HTTP_400_BAD_REQUEST)
+
+        tipos = request.query_params.get('tipo')
+        entidades = [tipo.strip() for tipo in tipos.split(',')] if tipos else list(indice.ENTIDADES)
+        desconocidas = [tipo for tipo in entidades if tipo not in indice.ENTIDADES]
+        if desconocidas:
+            return Response(
+                {"error": f"Tipos no válidos: {', '.join(desconocidas)}. Opciones: {', '.join(indice.ENTIDADES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Solo se busca en los módulos que el usuario puede listar (como los decoradores require_*)
+        try:
+            permisos = permisos_desde_request(request)
+        except AccesoNoAutorizado as e:
+            return Response({'error': e.mensaje}, status=e.status)
+        entidades = [tipo for tipo in entidades if permisos.tiene(indice.ENTIDADES[tipo].permiso)]
+
+        # Sin módulos permitidos no se busca: una lista vacía significa "todas" para el índice
+        resultados = indice.buscar(texto, entidades, limite) if entidades else []
+        return Response({
+            'q': texto,
+            'total': len(resultados),
+            'resultados': resultados,
+        })
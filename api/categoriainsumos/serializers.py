@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from api.base.serializers import CamposDinamicosMixin
 from .models import CategoriaInsumo
 
 
-class CategoriaInsumoSerializer(serializers.ModelSerializer):
+class CategoriaInsumoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = CategoriaInsumo
         fields = '__all__'
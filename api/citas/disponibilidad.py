@@ -0,0 +1,304 @@
+"""
+Motor de disponibilidad de manicuristas.
+
+Construye, para una manicurista y un día, los intervalos ocupados por citas
+(usando su duración real) y por novedades (ausencias, tardanzas, vacaciones,
+incapacidades y turnos). Los intervalos se guardan en minutos, ordenados y
+fusionados, de modo que cada consulta de slot se resuelve con búsqueda binaria.
+
+Lo usan CitaViewSet, CitaSerializer y NovedadViewSet.disponibilidad_citas.
+"""
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+
+from api.novedades.models import Novedad
+from .models import Cita
+
+
+# CONFIGURACIÓN DE HORARIOS DE CITAS - UNIFICADO 10:00 AM - 8:00 PM
+HORA_INICIO_CITAS = time(10, 0)
+HORA_FIN_CITAS = time(20, 0)
+INTERVALO_MINUTOS = 30
+
+# Estados de cita que ocupan tiempo en la agenda
+ESTADOS_CITA_ACTIVOS = ('pendiente', 'en_proceso')
+
+
+# Campos mínimos de Cita que necesita la agenda (en el orden de agregar_cita)
+CAMPOS_CITA = ('hora_cita', 'duracion_total', 'duracion_estimada', 'cliente__nombre')
+
+
+def vacaciones_iniciadas_antes(fecha):
+    """Vacaciones que empezaron antes de la fecha y siguen vigentes en ella (por su fecha_fin)"""
+    return Q(estado='vacaciones', fecha__lt=fecha, fecha_fin__gte=fecha)
+
+
+def consulta_novedades_del_dia(fecha):
+    """Filtro de novedades que pueden afectar la fecha: las del día y las vacaciones en curso"""
+    return (Q(fecha=fecha) | vacaciones_iniciadas_antes(fecha)) & ~Q(estado='anulada')
+
+
+# Un bloqueo es un intervalo [inicio, fin) en minutos desde medianoche
+Bloqueo = namedtuple('Bloqueo', ['inicio', 'fin', 'tipo', 'motivo'])
+
+
+def hora_a_minutos(hora):
+    """Convierte un time (o string 'HH:MM') a minutos desde medianoche"""
+    if isinstance(hora, str):
+        hora = datetime.strptime(hora[:5], '%H:%M').time()
+    return hora.hour * 60 + hora.minute
+
+
+def minutos_a_hora(minutos):
+    """Convierte minutos desde medianoche a string 'HH:MM'"""
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+def generar_slots(inicio=HORA_INICIO_CITAS, fin=HORA_FIN_CITAS, intervalo=INTERVALO_MINUTOS):
+    """Lista de inicios de slot (en minutos) entre inicio y fin"""
+    return list(range(hora_a_minutos(inicio), hora_a_minutos(fin), intervalo))
+
+
+class IntervalosOcupados:
+    """Conjunto de bloqueos ordenados y fusionados con consulta O(log n)"""
+
+    def __init__(self):
+        self._pendientes = []
+        self._inicios = []
+        self._fines = []
+        self._bloqueos = []
+
+    def agregar(self, inicio, fin, tipo, motivo):
+        if fin > inicio:
+            self._pendientes.append(Bloqueo(inicio, fin, tipo, motivo))
+
+    def _construir(self):
+        if not self._pendientes:
+            return
+        bloqueos = sorted(self._bloqueos + self._pendientes, key=lambda b: b.inicio)
+        self._pendientes = []
+        self._inicios, self._fines, self._bloqueos = [], [], []
+        for bloqueo in bloqueos:
+            if self._fines and bloqueo.inicio <= self._fines[-1]:
+                # Se solapa con el anterior: extender conservando el primer motivo
+                if bloqueo.fin > self._fines[-1]:
+                    self._fines[-1] = bloqueo.fin
+                    self._bloqueos[-1] = self._bloqueos[-1]._replace(fin=bloqueo.fin)
+                continue
+            self._inicios.append(bloqueo.inicio)
+            self._fines.append(bloqueo.fin)
+            self._bloqueos.append(bloqueo)
+
+    def buscar(self, inicio, fin):
+        """Retorna el bloqueo que se solapa con [inicio, fin) o None"""
+        self._construir()
+        # Último intervalo que empieza antes de 'fin'
+        idx = bisect_left(self._inicios, fin) - 1
+        if idx >= 0 and self._fines[idx] > inicio:
+            return self._bloqueos[idx]
+        return None
+
+    def __iter__(self):
+        self._construir()
+        return iter(self._bloqueos)
+
+    def __len__(self):
+        self._construir()
+        return len(self._bloqueos)
+
+
+class AgendaManicurista:
+    """
+    Ocupación de una manicurista en un día.
+
+    Se puede construir con datos ya cargados (por ejemplo, desde una consulta
+    agrupada de varios días) o con `cargar`, que hace una consulta para citas
+    y otra para novedades.
+    """
+
+    def __init__(self, fecha, citas=(), novedades=(), inicio=HORA_INICIO_CITAS, fin=HORA_FIN_CITAS):
+        self.fecha = fecha
+        self.inicio = hora_a_minutos(inicio)
+        self.fin = hora_a_minutos(fin)
+        self.citas = IntervalosOcupados()
+        self.novedades = IntervalosOcupados()
+        self.razon_no_disponible = None
+
+        for cita in citas:
+            self.agregar_cita(*cita)
+        for novedad in novedades:
+            self.agregar_novedad(novedad)
+
+    @classmethod
+    def cargar(cls, manicurista_id, fecha, excluir_cita_id=None, inicio=HORA_INICIO_CITAS, fin=HORA_FIN_CITAS):
+        """Construye la agenda con una consulta de citas y una de novedades"""
+        citas = Cita.objects.filter(
+            manicurista_id=manicurista_id,
+            fecha_cita=fecha,
+            estado__in=ESTADOS_CITA_ACTIVOS
+        )
+        if excluir_cita_id:
+            citas = citas.exclude(id=excluir_cita_id)
+
+        novedades = Novedad.objects.filter(manicurista_id=manicurista_id).filter(
+            consulta_novedades_del_dia(fecha)
+        )
+
+        return cls(
+            fecha,
+            citas=citas.values_list(*CAMPOS_CITA),
+            novedades=novedades,
+            inicio=inicio,
+            fin=fin,
+        )
+
+    def agregar_cita(self, hora_cita, duracion_total, duracion_estimada, cliente_nombre=None):
+        inicio = hora_a_minutos(hora_cita)
+        duracion = duracion_total or duracion_estimada or INTERVALO_MINUTOS
+        self.citas.agregar(
+            inicio,
+            inicio + duracion,
+            'cita',
+            f"Cita agendada con {cliente_nombre or 'Cliente'}"
+        )
+
+    def agregar_novedad(self, novedad):
+        """Traduce una novedad a bloqueos sobre el horario de trabajo"""
+        observacion = novedad.observaciones or 'Sin motivo'
+
+        if novedad.estado == 'vacaciones':
+            # Las vacaciones cubren 'dias' días a partir de la fecha registrada
+            if novedad.fecha != self.fecha:
+                dias = novedad.dias or 1
+                if not (novedad.fecha <= self.fecha < novedad.fecha + timedelta(days=dias)):
+                    return
+            self._bloquear_dia('vacaciones', 'Vacaciones', observacion)
+
+        elif novedad.fecha != self.fecha:
+            return
+
+        elif novedad.estado == 'incapacidad':
+            self._bloquear_dia('incapacidad', 'Incapacidad', observacion)
+
+        elif novedad.estado == 'ausente':
+            if novedad.tipo_ausencia == 'completa':
+                self._bloquear_dia('ausencia_completa', 'Ausencia completa', observacion)
+            elif novedad.tipo_ausencia == 'por_horas' and novedad.hora_inicio_ausencia and novedad.hora_fin_ausencia:
+                self.novedades.agregar(
+                    hora_a_minutos(novedad.hora_inicio_ausencia),
+                    hora_a_minutos(novedad.hora_fin_ausencia),
+                    'ausencia_por_horas',
+                    f"Ausencia por horas: {observacion}"
+                )
+
+        elif novedad.estado == 'tardanza' and novedad.hora_entrada:
+            self.novedades.agregar(
+                self.inicio,
+                hora_a_minutos(novedad.hora_entrada),
+                'tardanza',
+                f"Tardanza: llega a las {novedad.hora_entrada.strftime('%H:%M')}"
+            )
+
+        elif novedad.estado == 'horario' and novedad.turno in Novedad.HORARIO_TURNOS:
+            # Fuera del turno asignado la manicurista no atiende
+            entrada, salida = Novedad.HORARIO_TURNOS[novedad.turno]
+            motivo = f"Fuera del turno de {novedad.get_turno_display()}"
+            self.novedades.agregar(self.inicio, hora_a_minutos(entrada), 'turno', motivo)
+            self.novedades.agregar(hora_a_minutos(salida), self.fin, 'turno', motivo)
+
+    def _bloquear_dia(self, tipo, etiqueta, observacion):
+        self.novedades.agregar(self.inicio, self.fin, tipo, f"{etiqueta}: {observacion}")
+        self.razon_no_disponible = (
+            f"{etiqueta} ({minutos_a_hora(self.inicio)} - {minutos_a_hora(self.fin)})"
+        )
+
+    def bloqueo_en(self, hora, duracion=INTERVALO_MINUTOS):
+        """
+        Retorna el bloqueo que impide agendar en [hora, hora + duracion) o None.
+        Las novedades tienen prioridad sobre las citas.
+        """
+        inicio = hora if isinstance(hora, int) else hora_a_minutos(hora)
+        fin = inicio + max(duracion or 0, 1)
+        return self.novedades.buscar(inicio, fin) or self.citas.buscar(inicio, fin)
+
+    def esta_disponible(self, hora, duracion=INTERVALO_MINUTOS):
+        return self.bloqueo_en(hora, duracion) is None
+
+    def slots(self, intervalo=INTERVALO_MINUTOS):
+        """Estado de cada slot del día: (inicio, fin, bloqueo_novedad, bloqueo_cita)"""
+        resultado = []
+        for inicio in range(self.inicio, self.fin, intervalo):
+            fin = inicio + intervalo
+            resultado.append((
+                inicio,
+                fin,
+                self.novedades.buscar(inicio, fin),
+                self.citas.buscar(inicio, fin),
+            ))
+        return resultado
+
+
+
+def describir_bloqueo(bloqueo, nombre):
+    """Mensaje para el usuario cuando un bloqueo impide agendar"""
+    if bloqueo.tipo == 'cita':
+        return f'{nombre} ya tiene una cita programada a esta hora'
+    if bloqueo.tipo == 'ausencia_completa':
+        return f'{nombre} tiene ausencia completa este día'
+    if bloqueo.tipo == 'ausencia_por_horas':
+        return f'{nombre} tiene ausencia de {minutos_a_hora(bloqueo.inicio)} a {minutos_a_hora(bloqueo.fin)}'
+    if bloqueo.tipo == 'tardanza':
+        return f'{nombre} llegará tarde (a las {minutos_a_hora(bloqueo.fin)})'
+    if bloqueo.tipo == 'vacaciones':
+        return f'{nombre} está de vacaciones este día'
+    if bloqueo.tipo == 'incapacidad':
+        return f'{nombre} tiene incapacidad este día'
+    return f'{nombre} no está disponible a esta hora ({bloqueo.motivo})'
+
+
+def cargar_agendas(manicurista_ids, fecha_inicio, fecha_fin, inicio=HORA_INICIO_CITAS, fin=HORA_FIN_CITAS):
+    """
+    Agendas de varias manicuristas en un rango de fechas con dos consultas
+    (una sobre Cita y otra sobre Novedad), sin importar cuántos días o
+    manicuristas se pidan. Retorna {(manicurista_id, fecha): AgendaManicurista}.
+    """
+    manicurista_ids = list(manicurista_ids)
+    agendas = {}
+    dia = fecha_inicio
+    while dia <= fecha_fin:
+        for manicurista_id in manicurista_ids:
+            agendas[(manicurista_id, dia)] = AgendaManicurista(dia, inicio=inicio, fin=fin)
+        dia += timedelta(days=1)
+
+    if not manicurista_ids:
+        return agendas
+
+    citas = Cita.objects.filter(
+        manicurista_id__in=manicurista_ids,
+        fecha_cita__range=(fecha_inicio, fecha_fin),
+        estado__in=ESTADOS_CITA_ACTIVOS
+    ).values_list('manicurista_id', 'fecha_cita', *CAMPOS_CITA)
+
+    for manicurista_id, fecha_cita, *cita in citas:
+        agendas[(manicurista_id, fecha_cita)].agregar_cita(*cita)
+
+    novedades = Novedad.objects.filter(manicurista_id__in=manicurista_ids).filter(
+        (Q(fecha__range=(fecha_inicio, fecha_fin)) | vacaciones_iniciadas_antes(fecha_inicio))
+        & ~Q(estado='anulada')
+    )
+
+    for novedad in novedades:
+        if novedad.estado == 'vacaciones':
+            # Puede cubrir varios días del rango
+            dia = max(novedad.fecha, fecha_inicio)
+            ultimo = min(novedad.fecha + timedelta(days=(novedad.dias or 1) - 1), fecha_fin)
+            while dia <= ultimo:
+                agendas[(novedad.manicurista_id, dia)].agregar_novedad(novedad)
+                dia += timedelta(days=1)
+        elif (novedad.manicurista_id, novedad.fecha) in agendas:
+            agendas[(novedad.manicurista_id, novedad.fecha)].agregar_novedad(novedad)
+
+    return agendas
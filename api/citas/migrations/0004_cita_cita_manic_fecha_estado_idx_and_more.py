@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('citas', '0003_initial'),
+        ('clientes', '0002_initial'),
+        ('manicuristas', '0002_initial'),
+        ('novedades', '0001_initial'),
+        ('servicios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cita',
+            index=models.Index(fields=['manicurista', 'fecha_cita', 'estado'], name='cita_manic_fecha_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cita',
+            index=models.Index(fields=['cliente', 'fecha_cita', 'hora_cita', 'estado'], name='cita_cli_fecha_hora_est_idx'),
+        ),
+    ]
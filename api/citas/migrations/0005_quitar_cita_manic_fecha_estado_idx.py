@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 03:53
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('citas', '0004_cita_cita_manic_fecha_estado_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='cita',
+            name='cita_manic_fecha_estado_idx',
+        ),
+    ]
@@ -127,6 +127,11 @@ class Cita(BaseModel):
         verbose_name_plural = "Citas"
         ordering = ['-fecha_cita', '-hora_cita']
         unique_together = ['manicurista', 'fecha_cita', 'hora_cita']
+        # Agenda y liquidaciones (manicurista, fecha_cita[, estado]) usan el índice de unique_together
+        indexes = [
+            # Validación de choques del cliente
+            models.Index(fields=['cliente', 'fecha_cita', 'hora_cita', 'estado'], name='cita_cli_fecha_hora_est_idx'),
+        ]
 
     def __str__(self):
         return f"Cita {self.cliente.nombre} - {self.fecha_cita} {self.hora_cita}"
@@ -191,7 +196,7 @@ class Cita(BaseModel):
         """Crear ventas automáticamente para todos los servicios cuando se finaliza una cita"""
         try:
             # Importar aquí para evitar importación circular
-            from api.ventaservicios.models import VentaServicio, DetalleVentaServicio
+            from api.ventaservicios.models import VentaServicio
 
             # Verificar que no exista ya una venta para esta cita
             if hasattr(VentaServicio, 'cita') and VentaServicio.objects.filter(
@@ -217,20 +222,19 @@ class Cita(BaseModel):
             # Crear la venta principal
             venta = VentaServicio.objects.create(**venta_data)
             
-            # Crear detalles para cada servicio
-            for servicio in self.servicios.all():
-                detalle_data = {
-                    'venta': venta,
+            # Crear detalles para cada servicio (un solo INSERT y un solo recálculo del total)
+            servicios = list(self.servicios.all())
+            venta.agregar_detalles([
+                {
                     'servicio': servicio,
                     'cantidad': 1,
                     'precio_unitario': servicio.precio,
                     'descuento_linea': 0,
-                    'subtotal': servicio.precio
                 }
-                DetalleVentaServicio.objects.create(**detalle_data)
-                print(f"Detalle creado para servicio {servicio.nombre} en venta {venta.id}")
+                for servicio in servicios
+            ])
 
-            print(f"Venta {venta.id} creada automáticamente para cita {self.id} con {self.servicios.count()} servicios")
+            print(f"Venta {venta.id} creada automáticamente para cita {self.id} con {len(servicios)} servicios")
 
         except ImportError:
             print("Módulo de ventas no disponible")
@@ -1,7 +1,9 @@
 from rest_framework import serializers
+from api.base.serializers import CamposDinamicosMixin
 from django.utils import timezone
 from datetime import datetime, time
 from .models import Cita
+from .disponibilidad import AgendaManicurista, INTERVALO_MINUTOS, describir_bloqueo
 from api.clientes.models import Cliente
 from api.servicios.models import Servicio
 from api.manicuristas.models import Manicurista
@@ -10,7 +12,7 @@ from api.servicios.serializers import ServicioSerializer
 from api.manicuristas.serializers import ManicuristaSerializer
 
 
-class CitaSerializer(serializers.ModelSerializer):
+class CitaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     # Campos de solo lectura para mostrar información completa
     cliente_info = ClienteSerializer(source='cliente', read_only=True)
     manicurista_info = ManicuristaSerializer(source='manicurista', read_only=True)
@@ -85,23 +87,35 @@ class CitaSerializer(serializers.ModelSerializer):
         hora_cita = data.get('hora_cita')
         manicurista = data.get('manicurista')
 
-        # Verificar disponibilidad de la manicurista en esa fecha y hora
+        # Verificar disponibilidad de la manicurista en esa fecha y hora,
+        # considerando la duración de la cita y las novedades del día
         if fecha_cita and hora_cita and manicurista:
+            servicios = data.get('servicios')
+            if servicios:
+                duracion = sum(servicio.duracion for servicio in servicios)
+            elif data.get('servicio'):
+                duracion = data['servicio'].duracion
+            elif self.instance:
+                duracion = self.instance.duracion_total or self.instance.duracion_estimada
+            else:
+                duracion = INTERVALO_MINUTOS
+
             # Excluir la cita actual si estamos editando
-            queryset = Cita.objects.filter(
-                manicurista=manicurista,
-                fecha_cita=fecha_cita,
-                hora_cita=hora_cita,
-                estado__in=['pendiente', 'en_proceso']
+            agenda = AgendaManicurista.cargar(
+                manicurista.id,
+                fecha_cita,
+                excluir_cita_id=self.instance.id if self.instance else None
             )
-            
-            if self.instance:
-                queryset = queryset.exclude(id=self.instance.id)
-            
-            if queryset.exists():
+            bloqueo = agenda.bloqueo_en(hora_cita, duracion)
+
+            if bloqueo and bloqueo.tipo == 'cita':
                 raise serializers.ValidationError({
                     'hora_cita': 'La manicurista ya tiene una cita programada en esta fecha y hora'
                 })
+            if bloqueo:
+                raise serializers.ValidationError({
+                    'hora_cita': describir_bloqueo(bloqueo, manicurista.nombres)
+                })
 
         return data
 
@@ -5,12 +5,25 @@ from django.db.models import Q, Count, Sum, Avg
 from django.utils import timezone
 from datetime import datetime, timedelta, time
 from .models import Cita
+from api.base.estadisticas import estadisticas_en_cache
+from api.base.cache_respuestas import respuesta_en_cache
+from .disponibilidad import (
+    AgendaManicurista,
+    cargar_agendas,
+    HORA_INICIO_CITAS,
+    HORA_FIN_CITAS,
+    INTERVALO_MINUTOS,
+    describir_bloqueo,
+    generar_slots,
+    minutos_a_hora,
+)
 from .serializers import (
     CitaSerializer,
     CitaCreateSerializer,
     CitaUpdateEstadoSerializer,
     BuscarClienteSerializer
 )
+from api.busqueda import indice
 from api.clientes.models import Cliente
 from api.clientes.serializers import ClienteSerializer
 from api.servicios.models import Servicio
@@ -24,9 +37,13 @@ class CitaViewSet(viewsets.ModelViewSet):
     serializer_class = CitaSerializer
 
     # CONFIGURACIÓN DE HORARIOS DE CITAS - UNIFICADO 10:00 AM - 8:00 PM
-    HORA_INICIO_CITAS = time(10, 0)  # 10:00 AM
-    HORA_FIN_CITAS = time(20, 0)     # 8:00 PM
-    INTERVALO_MINUTOS = 30           # Citas cada 30 minutos
+    HORA_INICIO_CITAS = HORA_INICIO_CITAS  # 10:00 AM
+    HORA_FIN_CITAS = HORA_FIN_CITAS        # 8:00 PM
+    INTERVALO_MINUTOS = INTERVALO_MINUTOS  # Citas cada 30 minutos
+    MAX_DIAS_MATRIZ = 31                   # Rango máximo de disponibilidad_matriz
+
+    # buscar_clientes es una consulta aunque se llame con POST
+    acciones_permisos = {'buscar_clientes': 'listar'}
 
     def get_serializer_class(self):
         """Retorna el serializer apropiado según la acción"""
@@ -41,7 +58,10 @@ class CitaViewSet(viewsets.ModelViewSet):
         queryset = Cita.objects.select_related(
             'cliente', 'manicurista', 'servicio'
         ).prefetch_related('servicios').all()
+        return self.filtrar_queryset(queryset).order_by('-fecha_cita', '-hora_cita')
 
+    def filtrar_queryset(self, queryset):
+        """Aplicar los filtros de la consulta (sin joins ni orden)"""
         # Filtros
         estado = self.request.query_params.get('estado')
         fecha_desde = self.request.query_params.get('fecha_desde')
@@ -72,7 +92,7 @@ class CitaViewSet(viewsets.ModelViewSet):
         if cliente_id:
             queryset = queryset.filter(cliente_id=cliente_id)
 
-        return queryset.order_by('-fecha_cita', '-hora_cita')
+        return queryset
 
     def create(self, request, *args, **kwargs):
         """Crear nueva cita con validación de disponibilidad"""
@@ -87,7 +107,8 @@ class CitaViewSet(viewsets.ModelViewSet):
         if manicurista_id and fecha_cita and hora_cita:
             # Verificar disponibilidad de manicurista
             disponibilidad_manicurista = self._verificar_disponibilidad_manicurista(
-                manicurista_id, fecha_cita, hora_cita
+                manicurista_id, fecha_cita, hora_cita,
+                duracion=self._duracion_solicitada(request.data)
             )
             if not disponibilidad_manicurista['disponible']:
                 return Response(
@@ -152,7 +173,8 @@ class CitaViewSet(viewsets.ModelViewSet):
         if cambios_criticos:
             # Verificar disponibilidad de manicurista (excluyendo la cita actual)
             disponibilidad_manicurista = self._verificar_disponibilidad_manicurista(
-                manicurista_id, fecha_cita, hora_cita, excluir_cita_id=instance.id
+                manicurista_id, fecha_cita, hora_cita, excluir_cita_id=instance.id,
+                duracion=self._duracion_solicitada(request.data, instance)
             )
             if not disponibilidad_manicurista['disponible']:
                 return Response(
@@ -189,14 +211,35 @@ class CitaViewSet(viewsets.ModelViewSet):
         response_serializer = CitaSerializer(cita)
         return Response(response_serializer.data)
 
-    def _verificar_disponibilidad_manicurista(self, manicurista_id, fecha, hora, excluir_cita_id=None):
-        """Verificar si la manicurista está disponible en la fecha y hora especificada"""
+    def _duracion_solicitada(self, data, instance=None):
+        """Duración en minutos de los servicios enviados (o de la cita actual)"""
+        servicios_ids = data.get('servicios')
+        if not isinstance(servicios_ids, list) or not servicios_ids:
+            servicios_ids = [data['servicio']] if data.get('servicio') else []
+        servicios_ids = [int(sid) for sid in servicios_ids if str(sid).isdigit()]
+
+        if servicios_ids:
+            duracion = Servicio.objects.filter(id__in=servicios_ids).aggregate(
+                total=Sum('duracion')
+            )['total']
+            if duracion:
+                return duracion
+
+        if instance:
+            return instance.duracion_total or instance.duracion_estimada
+        return self.INTERVALO_MINUTOS
+
+    def _verificar_disponibilidad_manicurista(self, manicurista_id, fecha, hora, excluir_cita_id=None, duracion=None):
+        """
+        Verificar si la manicurista está disponible en la fecha y hora especificada.
+        Considera la duración de la nueva cita y la de las citas ya agendadas.
+        """
         try:
             # Convertir strings a objetos apropiados
             if isinstance(fecha, str):
                 fecha = datetime.strptime(fecha, '%Y-%m-%d').date()
             if isinstance(hora, str):
-                hora = datetime.strptime(hora, '%H:%M').time()
+                hora = datetime.strptime(hora[:5], '%H:%M').time()
 
             # 1. Verificar que la manicurista existe y está activa
             try:
@@ -219,58 +262,13 @@ class CitaViewSet(viewsets.ModelViewSet):
                     'razon': f'Horario fuera del rango de atención (10:00 AM - 8:00 PM)'
                 }
 
-            # 3. Verificar novedades (ausencias y tardanzas)
-            try:
-                from api.novedades.models import Novedad
-
-                novedad = Novedad.objects.filter(
-                    manicurista_id=manicurista_id,
-                    fecha=fecha
-                ).first()
-
-                if novedad:
-                    if novedad.estado == 'ausente':
-                        if novedad.tipo_ausencia == 'completa':
-                            return {
-                                'disponible': False,
-                                'razon': f'{manicurista.nombres} tiene ausencia completa este día'
-                            }
-                        elif novedad.tipo_ausencia == 'por_horas':
-                            # Verificar si la hora está en el rango de ausencia
-                            if (novedad.hora_inicio_ausencia and novedad.hora_fin_ausencia and
-                                novedad.hora_inicio_ausencia <= hora < novedad.hora_fin_ausencia):
-                                return {
-                                    'disponible': False,
-                                    'razon': f'{manicurista.nombres} tiene ausencia de {novedad.hora_inicio_ausencia.strftime("%H:%M")} a {novedad.hora_fin_ausencia.strftime("%H:%M")}'
-                                }
-
-                    elif novedad.estado == 'tardanza':
-                        # Si hay tardanza y la cita es antes de la hora de llegada
-                        if novedad.hora_entrada and hora < novedad.hora_entrada:
-                            return {
-                                'disponible': False,
-                                'razon': f'{manicurista.nombres} llegará tarde (a las {novedad.hora_entrada.strftime("%H:%M")})'
-                            }
-
-            except ImportError:
-                # Si no existe el módulo de novedades, continuar sin verificar
-                pass
-
-            # 4. Verificar citas existentes
-            queryset = Cita.objects.filter(
-                manicurista_id=manicurista_id,
-                fecha_cita=fecha,
-                hora_cita=hora,
-                estado__in=['pendiente', 'en_proceso']
-            )
-
-            if excluir_cita_id:
-                queryset = queryset.exclude(id=excluir_cita_id)
-
-            if queryset.exists():
+            # 3. Verificar novedades y citas existentes sobre el intervalo completo
+            agenda = AgendaManicurista.cargar(manicurista_id, fecha, excluir_cita_id=excluir_cita_id)
+            bloqueo = agenda.bloqueo_en(hora, duracion or self.INTERVALO_MINUTOS)
+            if bloqueo:
                 return {
                     'disponible': False,
-                    'razon': f'{manicurista.nombres} ya tiene una cita programada a esta hora'
+                    'razon': describir_bloqueo(bloqueo, manicurista.nombres)
                 }
 
             return {
@@ -339,15 +337,10 @@ class CitaViewSet(viewsets.ModelViewSet):
 
     def _generar_horarios_disponibles(self, fecha):
         """Generar lista de horarios disponibles para el día (10:00 AM - 8:00 PM cada 30 min)"""
-        horarios = []
-        hora_actual = datetime.combine(fecha, self.HORA_INICIO_CITAS)
-        hora_fin = datetime.combine(fecha, self.HORA_FIN_CITAS)
-
-        while hora_actual < hora_fin:
-            horarios.append(hora_actual.time().strftime('%H:%M'))
-            hora_actual += timedelta(minutes=self.INTERVALO_MINUTOS)
-
-        return horarios
+        return [
+            minutos_a_hora(minutos)
+            for minutos in generar_slots(self.HORA_INICIO_CITAS, self.HORA_FIN_CITAS, self.INTERVALO_MINUTOS)
+        ]
 
     @action(detail=False, methods=['post'])
     def buscar_clientes(self, request):
@@ -357,10 +350,8 @@ class CitaViewSet(viewsets.ModelViewSet):
 
         query = serializer.validated_data['query']
 
-        # Buscar por nombre o documento
-        clientes = Cliente.objects.filter(
-            Q(nombre__icontains=query) | Q(documento__icontains=query)
-        ).order_by('nombre')[:10]  # Limitar a 10 resultados
+        # Buscar por nombre o documento, sin tildes y por relevancia (máximo 10 resultados)
+        clientes = indice.ordenar_por_ids(Cliente.objects.all(), indice.buscar_ids('cliente', query, limite=10))
 
         serializer = ClienteSerializer(clientes, many=True)
         return Response(serializer.data)
@@ -377,6 +368,7 @@ class CitaViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @respuesta_en_cache(Servicio)
     def servicios_activos(self, request):
         """Obtener servicios activos"""
         servicios = Servicio.objects.filter(
@@ -409,7 +401,7 @@ class CitaViewSet(viewsets.ModelViewSet):
         """Crear ventas automáticamente para todos los servicios cuando se finaliza una cita"""
         try:
             # Importar aquí para evitar importación circular
-            from api.ventaservicios.models import VentaServicio, DetalleVentaServicio
+            from api.ventaservicios.models import VentaServicio
 
             # Verificar que no exista ya una venta para esta cita
             if hasattr(VentaServicio, 'cita') and VentaServicio.objects.filter(
@@ -435,20 +427,19 @@ class CitaViewSet(viewsets.ModelViewSet):
             # Crear la venta principal
             venta = VentaServicio.objects.create(**venta_data)
             
-            # Crear detalles para cada servicio
-            for servicio in cita.servicios.all():
-                detalle_data = {
-                    'venta': venta,
+            # Crear detalles para cada servicio (un solo INSERT y un solo recálculo del total)
+            servicios = list(cita.servicios.all())
+            venta.agregar_detalles([
+                {
                     'servicio': servicio,
                     'cantidad': 1,
                     'precio_unitario': servicio.precio,
                     'descuento_linea': 0,
-                    'subtotal': servicio.precio
                 }
-                DetalleVentaServicio.objects.create(**detalle_data)
-                print(f"Detalle creado para servicio {servicio.nombre} en venta {venta.id}")
+                for servicio in servicios
+            ])
 
-            print(f"Venta {venta.id} creada automáticamente para cita {cita.id} con {cita.servicios.count()} servicios")
+            print(f"Venta {venta.id} creada automáticamente para cita {cita.id} con {len(servicios)} servicios")
 
         except ImportError:
             print("Módulo de ventas no disponible")
@@ -474,28 +465,31 @@ class CitaViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
         """Obtener estadísticas de citas"""
+        return Response(estadisticas_en_cache('citas', request, self._calcular_estadisticas))
+
+    def _calcular_estadisticas(self):
         hoy = timezone.now().date()
         inicio_mes = hoy.replace(day=1)
-
-        # Estadísticas generales
-        total_citas = self.get_queryset().count()
-        citas_hoy = self.get_queryset().filter(fecha_cita=hoy).count()
-        citas_pendientes = self.get_queryset().filter(estado='pendiente').count()
-        citas_mes = self.get_queryset().filter(fecha_cita__gte=inicio_mes).count()
+        # Consulta base sin los joins de get_queryset
+        citas = self.filtrar_queryset(Cita.objects.all())
+
+        # Estadísticas generales e ingresos del mes (solo citas finalizadas,
+        # con precio total) en una sola consulta
+        generales = citas.aggregate(
+            total_citas=Count('id'),
+            citas_hoy=Count('id', filter=Q(fecha_cita=hoy)),
+            citas_pendientes=Count('id', filter=Q(estado='pendiente')),
+            citas_mes=Count('id', filter=Q(fecha_cita__gte=inicio_mes)),
+            ingresos_mes=Sum('precio_total', filter=Q(fecha_cita__gte=inicio_mes, estado='finalizada')),
+        )
 
         # Estadísticas por estado
-        por_estado = self.get_queryset().values('estado').annotate(
+        por_estado = citas.values('estado').annotate(
             count=Count('id')
         ).order_by('estado')
 
-        # Ingresos del mes (solo citas finalizadas) - USAR PRECIO TOTAL
-        ingresos_mes = self.get_queryset().filter(
-            fecha_cita__gte=inicio_mes,
-            estado='finalizada'
-        ).aggregate(total=Sum('precio_total'))['total'] or 0
-
         # Manicuristas más ocupadas
-        manicuristas_top = self.get_queryset().filter(
+        manicuristas_top = citas.filter(
             fecha_cita__gte=inicio_mes
         ).values(
             'manicurista__nombre'
@@ -503,15 +497,15 @@ class CitaViewSet(viewsets.ModelViewSet):
             total_citas=Count('id')
         ).order_by('-total_citas')[:5]
 
-        return Response({
-            'total_citas': total_citas,
-            'citas_hoy': citas_hoy,
-            'citas_pendientes': citas_pendientes,
-            'citas_mes': citas_mes,
+        return {
+            'total_citas': generales['total_citas'],
+            'citas_hoy': generales['citas_hoy'],
+            'citas_pendientes': generales['citas_pendientes'],
+            'citas_mes': generales['citas_mes'],
             'por_estado': list(por_estado),
-            'ingresos_mes': float(ingresos_mes),
+            'ingresos_mes': float(generales['ingresos_mes'] or 0),
             'manicuristas_top': list(manicuristas_top)
-        })
+        }
 
     # ===== ENDPOINT PRINCIPAL PARA EL FRONTEND =====
     @action(detail=False, methods=['get'])
@@ -537,65 +531,31 @@ class CitaViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Generar todos los horarios posibles (10:00 AM - 8:00 PM)
-        todos_los_horarios = self._generar_horarios_disponibles(fecha_obj)
-
-        # Obtener horarios ocupados por citas
-        citas_ocupadas = Cita.objects.filter(
-            manicurista_id=manicurista_id,
-            fecha_cita=fecha_obj,
-            estado__in=['pendiente', 'en_proceso']
-        ).values_list('hora_cita', flat=True)
+        # Ocupación del día: una consulta de citas y una de novedades
+        agenda = AgendaManicurista.cargar(manicurista_id, fecha_obj)
 
-        horarios_ocupados_citas = [hora.strftime('%H:%M') for hora in citas_ocupadas]
-
-        # Verificar novedades (ausencias y tardanzas)
+        horarios_disponibles = []
+        horarios_ocupados_citas = []
         horarios_ocupados_novedades = []
-        razon_no_disponible = None
-
-        try:
-            from api.novedades.models import Novedad
-
-            novedad = Novedad.objects.filter(
-                manicurista_id=manicurista_id,
-                fecha=fecha_obj
-            ).first()
-
-            if novedad:
-                if novedad.estado == 'ausente':
-                    if novedad.tipo_ausencia == 'completa':
-                        # Toda la jornada no disponible
-                        horarios_ocupados_novedades = todos_los_horarios.copy()
-                        razon_no_disponible = f"Ausencia completa (10:00 - 20:00)"
-
-                    elif novedad.tipo_ausencia == 'por_horas' and novedad.hora_inicio_ausencia and novedad.hora_fin_ausencia:
-                        # Marcar horarios específicos como no disponibles
-                        for horario_str in todos_los_horarios:
-                            horario_time = datetime.strptime(horario_str, '%H:%M').time()
-                            if novedad.hora_inicio_ausencia <= horario_time < novedad.hora_fin_ausencia:
-                                horarios_ocupados_novedades.append(horario_str)
-
-                elif novedad.estado == 'tardanza' and novedad.hora_entrada:
-                    # Marcar horarios antes de la llegada como no disponibles
-                    for horario_str in todos_los_horarios:
-                        horario_time = datetime.strptime(horario_str, '%H:%M').time()
-                        if horario_time < novedad.hora_entrada:
-                            horarios_ocupados_novedades.append(horario_str)
-
-        except ImportError:
-            # Si no existe el módulo de novedades, continuar sin verificar
-            pass
+        todos_ocupados = []
 
-        # Combinar todos los horarios ocupados
-        todos_ocupados = set(horarios_ocupados_citas + horarios_ocupados_novedades)
+        for inicio, fin, bloqueo_novedad, bloqueo_cita in agenda.slots(self.INTERVALO_MINUTOS):
+            horario = minutos_a_hora(inicio)
+            if bloqueo_novedad:
+                horarios_ocupados_novedades.append(horario)
+            if bloqueo_cita:
+                horarios_ocupados_citas.append(horario)
+            if bloqueo_novedad or bloqueo_cita:
+                todos_ocupados.append(horario)
+            else:
+                horarios_disponibles.append(horario)
 
-        # Calcular horarios disponibles
-        horarios_disponibles = [h for h in todos_los_horarios if h not in todos_ocupados]
+        razon_no_disponible = agenda.razon_no_disponible
 
         # Formato esperado por el frontend
         return Response({
             'horarios_disponibles': horarios_disponibles,
-            'horarios_ocupados': list(todos_ocupados),
+            'horarios_ocupados': todos_ocupados,
             'horarios_ocupados_citas': horarios_ocupados_citas,
             'horarios_ocupados_novedades': horarios_ocupados_novedades,
             'total_disponibles': len(horarios_disponibles),
@@ -614,6 +574,95 @@ class CitaViewSet(viewsets.ModelViewSet):
         """Endpoint de compatibilidad - redirige al endpoint principal"""
         return self.disponibilidad(request)
 
+    @action(detail=False, methods=['get'])
+    def disponibilidad_matriz(self, request):
+        """
+        Disponibilidad de varias manicuristas en un rango de fechas en una sola petición.
+        URL: /api/citas/disponibilidad_matriz/?fecha_inicio=2024-01-15&fecha_fin=2024-01-21&manicuristas=1,2,3
+        Cada día se devuelve como una cadena de bits alineada con 'horarios'
+        ('1' = disponible, '0' = ocupado).
+        """
+        fecha_inicio = request.query_params.get('fecha_inicio')
+        fecha_fin = request.query_params.get('fecha_fin')
+        manicuristas_param = request.query_params.get('manicuristas')
+
+        if not fecha_inicio:
+            return Response(
+                {'error': 'Se requiere el parámetro fecha_inicio'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            fecha_inicio = datetime.strptime(fecha_inicio, '%Y-%m-%d').date()
+            if fecha_fin:
+                fecha_fin = datetime.strptime(fecha_fin, '%Y-%m-%d').date()
+            else:
+                fecha_fin = fecha_inicio + timedelta(days=6)
+        except ValueError:
+            return Response(
+                {'error': 'Formato de fecha inválido. Use YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if fecha_fin < fecha_inicio:
+            return Response(
+                {'error': 'fecha_fin debe ser posterior o igual a fecha_inicio'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if (fecha_fin - fecha_inicio).days + 1 > self.MAX_DIAS_MATRIZ:
+            return Response(
+                {'error': f'El rango no puede superar {self.MAX_DIAS_MATRIZ} días'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        manicuristas = Manicurista.objects.all()
+        if manicuristas_param:
+            try:
+                ids = [int(mid) for mid in manicuristas_param.split(',') if mid.strip()]
+            except ValueError:
+                return Response(
+                    {'error': 'El parámetro manicuristas debe ser una lista de IDs separados por coma'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            manicuristas = manicuristas.filter(id__in=ids)
+        else:
+            manicuristas = manicuristas.filter(estado='activo')
+        manicuristas = list(manicuristas.order_by('nombre').values('id', 'nombre'))
+
+        agendas = cargar_agendas(
+            [m['id'] for m in manicuristas], fecha_inicio, fecha_fin,
+            inicio=self.HORA_INICIO_CITAS, fin=self.HORA_FIN_CITAS
+        )
+
+        fechas = [fecha_inicio + timedelta(days=i) for i in range((fecha_fin - fecha_inicio).days + 1)]
+        resultado = []
+        for manicurista in manicuristas:
+            dias = {}
+            for fecha in fechas:
+                agenda = agendas[(manicurista['id'], fecha)]
+                dias[fecha.isoformat()] = ''.join(
+                    '0' if bloqueo_novedad or bloqueo_cita else '1'
+                    for _, _, bloqueo_novedad, bloqueo_cita in agenda.slots(self.INTERVALO_MINUTOS)
+                )
+            resultado.append({
+                'id': manicurista['id'],
+                'nombre': manicurista['nombre'],
+                'disponibilidad': dias
+            })
+
+        return Response({
+            'fecha_inicio': fecha_inicio.isoformat(),
+            'fecha_fin': fecha_fin.isoformat(),
+            'horarios': self._generar_horarios_disponibles(fecha_inicio),
+            'horario_trabajo': {
+                'inicio': self.HORA_INICIO_CITAS.strftime('%H:%M'),
+                'fin': self.HORA_FIN_CITAS.strftime('%H:%M'),
+                'intervalo_minutos': self.INTERVALO_MINUTOS
+            },
+            'manicuristas': resultado
+        })
+
     @action(detail=False, methods=['get'])
     def disponibilidad_cliente(self, request):
         """Verificar disponibilidad de cliente en fecha específica"""
@@ -639,13 +688,13 @@ class CitaViewSet(viewsets.ModelViewSet):
             cliente_id=cliente_id,
             fecha_cita=fecha_obj,
             estado__in=['pendiente', 'en_proceso']
-        ).values('hora_cita', 'manicurista__nombres')
+        ).values('hora_cita', 'manicurista__nombre')
 
         horarios_ocupados = []
         for cita in citas_cliente:
             horarios_ocupados.append({
                 'hora': cita['hora_cita'].strftime('%H:%M'),
-                'manicurista': cita['manicurista__nombres']
+                'manicurista': cita['manicurista__nombre']
             })
 
         # Obtener información del cliente
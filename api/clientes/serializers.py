@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from api.base.serializers import CamposDinamicosMixin
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from api.clientes.models import Cliente
@@ -6,9 +7,9 @@ from api.roles.models import Rol
 
 Usuario = get_user_model()
 
-class ClienteSerializer(serializers.ModelSerializer):
+class ClienteSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     contraseña_generada = serializers.CharField(read_only=True)  # Para mostrar la contraseña generada en la respuesta
-    usuario_id = serializers.IntegerField(read_only=True, source='usuario.id')  # Para mostrar el ID del usuario creado
+    usuario_id = serializers.IntegerField(read_only=True)  # Para mostrar el ID del usuario creado
     
     class Meta:
         model = Cliente
@@ -4,8 +4,9 @@ from rest_framework.decorators import action
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.core.mail import send_mail
+from api.correos.cola import encolar_correo
 from django.conf import settings
+from api.busqueda import indice
 from .models import Cliente
 from .serializers import (
     ClienteSerializer, 
@@ -165,13 +166,11 @@ class ClienteViewSet(viewsets.ModelViewSet):
         ¡Gracias y bienvenido!
         """
         
-        send_mail(
+        encolar_correo(
             asunto,
             mensaje_texto,
-            settings.DEFAULT_FROM_EMAIL,
             [cliente.correo_electronico],
             html_message=mensaje_html,
-            fail_silently=False,
         )
     
     @action(detail=False, methods=['post'])
@@ -304,13 +303,11 @@ class ClienteViewSet(viewsets.ModelViewSet):
         ¡Tu cuenta está segura!
         """
         
-        send_mail(
+        encolar_correo(
             asunto,
             mensaje_texto,
-            settings.DEFAULT_FROM_EMAIL,
             [cliente.correo_electronico],
             html_message=mensaje_html,
-            fail_silently=False,
         )
     
     @action(detail=True, methods=['post'])
@@ -394,13 +391,11 @@ class ClienteViewSet(viewsets.ModelViewSet):
         IMPORTANTE: Debes cambiar esta contraseña temporal inmediatamente por seguridad.
         """
         
-        send_mail(
+        encolar_correo(
             asunto,
             mensaje_texto,
-            settings.DEFAULT_FROM_EMAIL,
             [cliente.correo_electronico],
             html_message=mensaje_html,
-            fail_silently=False,
         )
     
     @transaction.atomic
@@ -485,7 +480,12 @@ class ClienteViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def search(self, request):
         """
-        Endpoint para buscar clientes por nombre o documento.
+        Endpoint para buscar clientes por nombre o documento (sin distinguir tildes).
+        Resultados ordenados por relevancia; ver api/busqueda/indice.py.
+        Parámetros:
+        - q: Texto a buscar
+        - limite: Máximo de resultados (1-100, por defecto 50). Solo se retornan los
+          más relevantes: para recorrer todos los clientes usar el listado paginado
         """
         query = request.query_params.get('q', '')
         if not query:
@@ -493,12 +493,13 @@ class ClienteViewSet(viewsets.ModelViewSet):
                 {"error": "Se requiere el parámetro q"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+        try:
+            limite = min(max(int(request.query_params.get('limite', 50)), 1), 100)
+        except ValueError:
+            return Response({"error": "El límite debe ser un número entero"}, status=status.HTTP_400_BAD_REQUEST)
         
-        clientes = self.get_queryset().filter(
-            nombre__icontains=query
-        ) | self.get_queryset().filter(
-            documento__icontains=query
-        )
+        clientes = indice.ordenar_por_ids(self.get_queryset(), indice.buscar_ids('cliente', query, limite=limite))
         
         serializer = self.get_serializer(clientes, many=True)
         return Response(serializer.data)
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codigorecuperacion', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='codigorecuperacion',
+            index=models.Index(fields=['correo_electronico', 'codigo', 'usado'], name='codrec_correo_cod_usado_idx'),
+        ),
+    ]
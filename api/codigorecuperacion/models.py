@@ -33,6 +33,9 @@ class CodigoRecuperacion(models.Model):
         verbose_name = 'Código de Recuperación'
         verbose_name_plural = 'Códigos de Recuperación'
         ordering = ['-creado_en']
+        indexes = [
+            models.Index(fields=['correo_electronico', 'codigo', 'usado'], name='codrec_correo_cod_usado_idx'),
+        ]
     
     def ha_expirado(self):
         return timezone.now() > self.expiracion
@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from api.base.serializers import CamposDinamicosMixin
 from .models import CompraHasInsumo
 from api.insumos.serializers import InsumoSerializer
 
 
-class CompraHasInsumoSerializer(serializers.ModelSerializer):
+class CompraHasInsumoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = CompraHasInsumo
         fields = ['id', 'compra', 'insumo', 'cantidad', 'precio_unitario', 'subtotal']
@@ -27,7 +27,7 @@ class CompraHasInsumoViewSet(viewsets.ModelViewSet):
         """
         Endpoint para listar todos los registros con información detallada.
         """
-        registros = self.get_queryset()
+        registros = self.get_queryset().select_related('insumo')
         serializer = self.get_serializer(registros, many=True)
         return Response(serializer.data)
     
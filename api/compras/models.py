@@ -66,21 +66,25 @@ class Compra(BaseModel):
         proveedor_nombre = getattr(self.proveedor, 'nombre', None) or getattr(self.proveedor, 'nombre_empresa', 'Sin nombre')
         return f"Compra #{self.id} - {proveedor_nombre} - {self.fecha.strftime('%d/%m/%Y')}"
     
-    def calcular_totales(self):
-        """Calcula el subtotal, IVA y total de la compra basado en los detalles"""
-        subtotal = sum(detalle.subtotal for detalle in self.detalles.all())
+    def asignar_totales(self, subtotal):
+        """Asigna subtotal, IVA y total a partir del subtotal de los detalles (sin guardar)"""
         iva = subtotal * Decimal('0.19')  # 19% de IVA
         total = subtotal + iva
         
         self.subtotal = subtotal
         self.iva = iva
         self.total = total
-        self.save()
         return {
             'subtotal': subtotal,
             'iva': iva,
             'total': total
         }
+    
+    def calcular_totales(self):
+        """Calcula el subtotal, IVA y total de la compra basado en los detalles"""
+        totales = self.asignar_totales(sum(detalle.subtotal for detalle in self.detalles.all()))
+        self.save()
+        return totales
 
 
 class DetalleCompra(BaseModel):
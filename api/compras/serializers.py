@@ -1,13 +1,25 @@
 from rest_framework import serializers
+from api.base.serializers import CamposDinamicosMixin
 from decimal import Decimal
 from django.db import transaction
 # from django.utils import timezone  # Eliminar esta importación
 from .models import Compra, DetalleCompra
 from api.comprahasinsumos.models import CompraHasInsumo
-from api.insumos.models import Insumo
+from api.insumos.models import Insumo, MovimientoInventario
 from api.proveedores.models import Proveedor
 
 
+def registrar_entrada_compra(compra, detalles_data):
+    """Suma al stock las cantidades de la compra como un solo movimiento de inventario"""
+    movimientos = MovimientoInventario.aplicar(
+        [(detalle['insumo_id'], detalle['cantidad']) for detalle in detalles_data],
+        'compra',
+        documento_id=compra.id
+    )
+    for movimiento in movimientos:
+        print(f"Stock actualizado: insumo {movimiento.insumo_id} - Cantidad agregada: {movimiento.cantidad} - Nuevo stock: {movimiento.saldo}")
+
+
 class DetalleCompraSerializer(serializers.ModelSerializer):
     insumo_nombre = serializers.CharField(source='insumo.nombre', read_only=True)
     subtotal = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
@@ -27,7 +39,7 @@ class DetalleCompraSerializer(serializers.ModelSerializer):
         return value
 
 
-class CompraSerializer(serializers.ModelSerializer):
+class CompraSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     detalles = DetalleCompraSerializer(many=True, read_only=True)
     proveedor_nombre = serializers.SerializerMethodField()
     fecha_formateada = serializers.SerializerMethodField()
@@ -73,6 +85,7 @@ class CompraCreateSerializer(serializers.ModelSerializer):
         if not value:
             raise serializers.ValidationError("Debe agregar al menos un insumo a la compra.")
         
+        insumo_ids = []
         for i, detalle in enumerate(value):
             if 'insumo_id' not in detalle:
                 raise serializers.ValidationError(f"El detalle {i+1} debe tener un insumo_id.")
@@ -91,66 +104,55 @@ class CompraCreateSerializer(serializers.ModelSerializer):
             if not isinstance(precio, (int, float, Decimal)) or precio <= 0:
                 raise serializers.ValidationError(f"El detalle {i+1}: El precio unitario debe ser mayor a 0")
             
-            # Validar que el insumo existe
-            try:
-                Insumo.objects.get(id=detalle['insumo_id'])
-            except Insumo.DoesNotExist:
-                raise serializers.ValidationError(f"El insumo con ID {detalle['insumo_id']} no existe.")
+            # Un insumo por compra (DetalleCompra es único por compra e insumo)
+            if detalle['insumo_id'] in insumo_ids:
+                raise serializers.ValidationError(f"El detalle {i+1}: El insumo con ID {detalle['insumo_id']} está repetido.")
+            insumo_ids.append(detalle['insumo_id'])
+        
+        # Validar que los insumos existen (una sola consulta)
+        existentes = Insumo.objects.in_bulk(insumo_ids)
+        for insumo_id in insumo_ids:
+            if insumo_id not in existentes:
+                raise serializers.ValidationError(f"El insumo con ID {insumo_id} no existe.")
         
         return value
     
+    def _construir_detalles(self, compra, detalles_data):
+        """DetalleCompra sin guardar y subtotal de la compra, calculado en memoria"""
+        detalles = []
+        subtotal = Decimal('0.00')
+        for detalle_data in detalles_data:
+            detalle = DetalleCompra(
+                compra=compra,
+                insumo_id=detalle_data['insumo_id'],
+                cantidad=detalle_data['cantidad'],
+                precio_unitario=Decimal(str(detalle_data['precio_unitario'])).quantize(Decimal('0.01'))
+            )
+            subtotal += detalle.subtotal
+            detalles.append(detalle)
+        return detalles, subtotal
+    
     @transaction.atomic
     def create(self, validated_data):
         detalles_data = validated_data.pop('detalles')
         validated_data.pop('motivo_anulacion', None) # Asegurarse de que motivo_anulacion no se guarde en la creación si no es relevante
-        compra = Compra.objects.create(**validated_data)
+        compra = Compra(**validated_data)
+        detalles, subtotal = self._construir_detalles(compra, detalles_data)
         
-        # Lista para almacenar los movimientos de stock
-        movimientos_stock = []
+        # Guardar la compra con sus totales y todos los detalles en un solo INSERT
+        compra.asignar_totales(subtotal)
+        compra.save()
+        DetalleCompra.objects.bulk_create(detalles)
         
-        for detalle_data in detalles_data:
-            insumo_id = detalle_data.get('insumo_id')
-            cantidad = detalle_data.get('cantidad')
-            precio_unitario = detalle_data.get('precio_unitario')
-            
-            try:
-                insumo = Insumo.objects.get(id=insumo_id)
-                
-                # Crear en DetalleCompra
-                DetalleCompra.objects.create(
-                    compra=compra,
-                    insumo=insumo,
-                    cantidad=cantidad,
-                    precio_unitario=precio_unitario
-                )
-                
-                # Actualizar stock si la compra está finalizada
-                if compra.estado == 'finalizada':
-                    stock_anterior = insumo.cantidad
-                    insumo.cantidad += cantidad
-                    insumo.save()
-                    
-                    movimientos_stock.append({
-                        'insumo': insumo.nombre,
-                        'cantidad_agregada': cantidad,
-                        'stock_anterior': stock_anterior,
-                        'stock_nuevo': insumo.cantidad
-                    })
-                    
-                    print(f"Stock actualizado: {insumo.nombre} - Cantidad agregada: {cantidad} - Nuevo stock: {insumo.cantidad}")
-                
-            except Insumo.DoesNotExist:
-                # Si llegamos aquí, la validación falló
-                pass
-        
-        # Calcular totales
-        compra.calcular_totales()
+        # Actualizar stock si la compra está finalizada
+        if compra.estado == 'finalizada':
+            registrar_entrada_compra(compra, detalles_data)
         
         return compra
     
     @transaction.atomic
     def update(self, instance, validated_data):
-        detalles_data = validated_data.pop('detalles', [])
+        detalles_data = validated_data.pop('detalles', None)
         estado_anterior = instance.estado
         
         # Actualizar campos de la compra
@@ -166,55 +168,28 @@ class CompraCreateSerializer(serializers.ModelSerializer):
             instance.motivo_anulacion = None
             # instance.fecha_anulacion = None # Eliminar esta línea
         
-        instance.save()
-        
         # Si se está cambiando de finalizada a anulada, revertir stock
         if estado_anterior == 'finalizada' and instance.estado == 'anulada':
             # La reversión del stock ahora se maneja en el ViewSet
             pass
         
-        # Eliminar detalles existentes
-        instance.detalles.all().delete()
-        
-        # Lista para almacenar los movimientos de stock
-        movimientos_stock = []
-        
-        for detalle_data in detalles_data:
-            insumo_id = detalle_data.get('insumo_id')
-            cantidad = detalle_data.get('cantidad')
-            precio_unitario = detalle_data.get('precio_unitario')
-            
-            try:
-                insumo = Insumo.objects.get(id=insumo_id)
-                
-                # Crear en DetalleCompra
-                DetalleCompra.objects.create(
-                    compra=instance,
-                    insumo=insumo,
-                    cantidad=cantidad,
-                    precio_unitario=precio_unitario
-                )
-                
-                # Actualizar stock si la compra está finalizada
-                if instance.estado == 'finalizada' and estado_anterior != 'finalizada':
-                    stock_anterior = insumo.cantidad
-                    insumo.cantidad += cantidad
-                    insumo.save()
-                    
-                    movimientos_stock.append({
-                        'insumo': insumo.nombre,
-                        'cantidad_agregada': cantidad,
-                        'stock_anterior': stock_anterior,
-                        'stock_nuevo': insumo.cantidad
-                    })
-                    
-                    print(f"Stock actualizado: {insumo.nombre} - Cantidad agregada: {cantidad} - Nuevo stock: {insumo.cantidad}")
-                
-            except Insumo.DoesNotExist:
-                # Si llegamos aquí, la validación falló
-                pass
+        if detalles_data is None:
+            # Actualización parcial sin detalles: se conservan los existentes
+            instance.save()
+            detalles_data = [
+                {'insumo_id': insumo_id, 'cantidad': cantidad}
+                for insumo_id, cantidad in instance.detalles.values_list('insumo_id', 'cantidad')
+            ]
+        else:
+            # Reemplazar los detalles existentes
+            detalles, subtotal = self._construir_detalles(instance, detalles_data)
+            instance.asignar_totales(subtotal)
+            instance.save()
+            instance.detalles.all().delete()
+            DetalleCompra.objects.bulk_create(detalles)
         
-        # Calcular totales
-        instance.calcular_totales()
+        # Actualizar stock si la compra está finalizada
+        if instance.estado == 'finalizada' and estado_anterior != 'finalizada':
+            registrar_entrada_compra(instance, detalles_data)
         
         return instance
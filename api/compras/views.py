@@ -1,9 +1,11 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from django.db import transaction
 from django.db.models import F, Sum
 # from django.utils import timezone # Eliminar esta importación
 from .models import Compra
+from api.insumos.models import MovimientoInventario, StockInsuficiente
 from .serializers import CompraSerializer, CompraCreateSerializer
 
 
@@ -41,23 +43,32 @@ class CompraViewSet(viewsets.ModelViewSet):
         if len(motivo_anulacion) < 10:
             return Response({"error": "El motivo de anulación debe tener al menos 10 caracteres."}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Revertir stock de insumos
-        for detalle in compra.detalles.all():
-            insumo = detalle.insumo
-            if insumo.cantidad >= detalle.cantidad:
-                insumo.cantidad -= detalle.cantidad
-                insumo.save()
-            else:
-                # Esto no debería pasar si el stock se manejó correctamente al finalizar la compra
-                # Pero es una salvaguarda
-                return Response(
-                    {"error": f"No se pudo revertir el stock del insumo {insumo.nombre}. Cantidad insuficiente."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        
-        compra.estado = 'anulada'
-        compra.motivo_anulacion = motivo_anulacion # Guardar el motivo
-        compra.save()
+        try:
+            with transaction.atomic():
+                # Bloquear la compra para que dos anulaciones simultáneas no reviertan el stock dos veces
+                compra = Compra.objects.select_for_update().get(pk=compra.pk)
+                if compra.estado == 'anulada':
+                    return Response({"error": "La compra ya está anulada."}, status=status.HTTP_400_BAD_REQUEST)
+
+                # Revertir stock de insumos (solo las compras finalizadas sumaron stock)
+                if compra.estado == 'finalizada':
+                    MovimientoInventario.aplicar(
+                        [(detalle.insumo_id, -detalle.cantidad) for detalle in compra.detalles.all()],
+                        'anulacion_compra',
+                        documento_id=compra.id,
+                        observaciones=motivo_anulacion
+                    )
+
+                compra.estado = 'anulada'
+                compra.motivo_anulacion = motivo_anulacion # Guardar el motivo
+                compra.save()
+        except StockInsuficiente as e:
+            # Esto no debería pasar si el stock se manejó correctamente al finalizar la compra
+            # Pero es una salvaguarda
+            return Response(
+                {"error": f"No se pudo revertir el stock del insumo {e.nombre}. Cantidad insuficiente."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         serializer = CompraSerializer(compra)
         return Response(serializer.data, status=status.HTTP_200_OK)
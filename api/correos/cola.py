@@ -0,0 +1,163 @@
+"""
+Encolado y envío de correos por lotes.
+
+encolar_correo() solo inserta una fila en CorreoSaliente, de modo que la petición
+no espera al servidor SMTP. procesar_lote() toma los mensajes listos, los marca
+como 'enviando' con un plazo de reserva (si el worker muere, otro los retoma al
+vencer el plazo) y los envía todos sobre una única conexión SMTP.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import CorreoSaliente
+
+
+MAX_INTENTOS = getattr(settings, 'CORREOS_MAX_INTENTOS', 5)
+ESPERA_BASE_SEGUNDOS = getattr(settings, 'CORREOS_ESPERA_BASE_SEGUNDOS', 60)
+RESERVA_SEGUNDOS = 300
+
+
+def encolar_correo(asunto, mensaje, destinatarios, html_message=None, from_email=None):
+    """Guarda el correo en la bandeja de salida. Acepta un destinatario o una lista."""
+    if isinstance(destinatarios, str):
+        destinatarios = [destinatarios]
+    return CorreoSaliente.objects.create(
+        asunto=asunto,
+        mensaje=mensaje or '',
+        mensaje_html=html_message,
+        remitente=from_email or settings.DEFAULT_FROM_EMAIL,
+        destinatarios=list(destinatarios),
+    )
+
+
+def encolar_correos(correos):
+    """
+    Encola varios correos con un solo INSERT. Cada elemento es un dict con
+    asunto, mensaje, destinatarios y opcionalmente html_message y from_email.
+    """
+    return CorreoSaliente.objects.bulk_create([
+        CorreoSaliente(
+            asunto=correo['asunto'],
+            mensaje=correo.get('mensaje') or '',
+            mensaje_html=correo.get('html_message'),
+            remitente=correo.get('from_email') or settings.DEFAULT_FROM_EMAIL,
+            destinatarios=list(correo['destinatarios']),
+        )
+        for correo in correos
+    ])
+
+
+def espera_reintento(intentos):
+    """Espera exponencial: 1, 2, 4, 8... veces la espera base"""
+    return timedelta(seconds=ESPERA_BASE_SEGUNDOS * (2 ** max(intentos - 1, 0)))
+
+
+def reservar_lote(limite):
+    """Marca como 'enviando' hasta `limite` correos listos y los retorna"""
+    ahora = timezone.now()
+    with transaction.atomic():
+        listos = CorreoSaliente.objects.select_for_update(skip_locked=True).filter(
+            Q(estado='pendiente') | Q(estado='enviando'),  # 'enviando' vencido: worker caído
+            proximo_intento__lte=ahora
+        ).order_by('proximo_intento')[:limite]
+        ids = list(listos.values_list('id', flat=True))
+        CorreoSaliente.objects.filter(id__in=ids).update(
+            estado='enviando',
+            proximo_intento=ahora + timedelta(seconds=RESERVA_SEGUNDOS)
+        )
+    return list(CorreoSaliente.objects.filter(id__in=ids).order_by('proximo_intento', 'id'))
+
+
+def procesar_lote(limite=50):
+    """
+    Envía un lote de correos sobre una sola conexión. Retorna un dict con
+    cuántos se enviaron, se reprogramaron y fallaron definitivamente.
+    """
+    resultado = {'enviados': 0, 'reintentar': 0, 'fallidos': 0}
+    correos = reservar_lote(limite)
+    if not correos:
+        return resultado
+
+    conexion = get_connection(fail_silently=False)
+    try:
+        conexion.open()
+    except Exception as e:
+        # Sin conexión no se intenta ninguno: todo el lote cuenta como intento fallido
+        for correo in correos:
+            _registrar_fallo(correo, e, resultado)
+        return resultado
+
+    try:
+        for correo in correos:
+            email = EmailMultiAlternatives(
+                subject=correo.asunto,
+                body=correo.mensaje,
+                from_email=correo.remitente,
+                to=correo.destinatarios,
+                connection=conexion,
+            )
+            if correo.mensaje_html:
+                email.attach_alternative(correo.mensaje_html, 'text/html')
+            try:
+                email.send()
+            except Exception as e:
+                _registrar_fallo(correo, e, resultado)
+                continue
+
+            # El contenido puede llevar contraseñas temporales: no se conserva tras el envío
+            CorreoSaliente.objects.filter(id=correo.id).update(
+                estado='enviado',
+                intentos=correo.intentos + 1,
+                fecha_envio=timezone.now(),
+                ultimo_error=None,
+                mensaje='',
+                mensaje_html=None,
+            )
+            resultado['enviados'] += 1
+    finally:
+        conexion.close()
+
+    return resultado
+
+
+def _registrar_fallo(correo, error, resultado):
+    intentos = correo.intentos + 1
+    if intentos >= MAX_INTENTOS:
+        estado, proximo = 'fallido', timezone.now()
+        resultado['fallidos'] += 1
+    else:
+        estado, proximo = 'pendiente', timezone.now() + espera_reintento(intentos)
+        resultado['reintentar'] += 1
+    print(f"Error enviando correo {correo.id} (intento {intentos}): {error}")
+    cambios = {}
+    if estado == 'fallido':
+        # Ya no se reintenta: tampoco se conserva el contenido (contraseñas temporales, códigos)
+        cambios = {'mensaje': '', 'mensaje_html': None}
+    CorreoSaliente.objects.filter(id=correo.id).update(
+        estado=estado,
+        intentos=intentos,
+        proximo_intento=proximo,
+        ultimo_error=str(error)[:1000],
+        **cambios,
+    )
+
+
+def purgar_terminados(dias):
+    """
+    Elimina los correos enviados o fallidos hace más de `dias` días (en los
+    fallidos, proximo_intento guarda el momento del último intento). Antes
+    vacía el contenido de los fallidos que aún lo conserven.
+    """
+    CorreoSaliente.objects.filter(estado='fallido').exclude(mensaje='', mensaje_html=None).update(
+        mensaje='', mensaje_html=None
+    )
+    limite = timezone.now() - timedelta(days=dias)
+    eliminados, _ = CorreoSaliente.objects.filter(
+        Q(estado='enviado', fecha_envio__lt=limite) | Q(estado='fallido', proximo_intento__lt=limite)
+    ).delete()
+    return eliminados
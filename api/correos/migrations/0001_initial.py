@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-18 02:57
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorreoSaliente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('asunto', models.CharField(max_length=255)),
+                ('mensaje', models.TextField(blank=True)),
+                ('mensaje_html', models.TextField(blank=True, null=True)),
+                ('remitente', models.CharField(max_length=254)),
+                ('destinatarios', models.JSONField(default=list)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviando', 'Enviando'), ('enviado', 'Enviado'), ('fallido', 'Fallido')], default='pendiente', max_length=20)),
+                ('intentos', models.PositiveIntegerField(default=0)),
+                ('proximo_intento', models.DateTimeField(default=django.utils.timezone.now, help_text='Momento a partir del cual el mensaje puede (re)intentarse')),
+                ('ultimo_error', models.TextField(blank=True, null=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_envio', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Correo saliente',
+                'verbose_name_plural': 'Correos salientes',
+                'db_table': 'correos_salientes',
+                'ordering': ['fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'proximo_intento'], name='correo_estado_intento_idx')],
+            },
+        ),
+    ]
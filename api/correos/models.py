@@ -0,0 +1,42 @@
+from django.db import models
+from django.utils import timezone
+
+
+class CorreoSaliente(models.Model):
+    """
+    Bandeja de salida de correos. Las vistas encolan los mensajes y el comando
+    procesar_correos los envía en lotes, reintentando con espera exponencial.
+    """
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('enviando', 'Enviando'),
+        ('enviado', 'Enviado'),
+        ('fallido', 'Fallido'),
+    ]
+
+    asunto = models.CharField(max_length=255)
+    mensaje = models.TextField(blank=True)
+    mensaje_html = models.TextField(blank=True, null=True)
+    remitente = models.CharField(max_length=254)
+    destinatarios = models.JSONField(default=list)
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente')
+    intentos = models.PositiveIntegerField(default=0)
+    proximo_intento = models.DateTimeField(
+        default=timezone.now,
+        help_text="Momento a partir del cual el mensaje puede (re)intentarse"
+    )
+    ultimo_error = models.TextField(blank=True, null=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_envio = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'correos_salientes'
+        verbose_name = 'Correo saliente'
+        verbose_name_plural = 'Correos salientes'
+        ordering = ['fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento'], name='correo_estado_intento_idx'),
+        ]
+
+    def __str__(self):
+        return f"Correo {self.id} a {', '.join(self.destinatarios)} - {self.get_estado_display()}"
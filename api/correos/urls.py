@@ -0,0 +1,10 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import CorreoSalienteViewSet
+
+router = DefaultRouter()
+router.register(r'', CorreoSalienteViewSet, basename='correo')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,34 @@
+from django.db.models import Count, Min
+from django.utils import timezone
+from rest_framework import viewsets
+from rest_framework.response import Response
+
+from api.authentication.decorators import require_permission
+
+from .models import CorreoSaliente
+
+
+class CorreoSalienteViewSet(viewsets.ViewSet):
+    """Estado de la bandeja de salida de correos (sin exponer su contenido ni los errores del servidor SMTP)"""
+
+    @require_permission('correos_listar')
+    def list(self, request):
+        por_estado = dict(
+            CorreoSaliente.objects.order_by().values_list('estado').annotate(total=Count('id'))
+        )
+        pendiente_mas_antiguo = CorreoSaliente.objects.filter(
+            estado__in=['pendiente', 'enviando']
+        ).aggregate(fecha=Min('fecha_creacion'))['fecha']
+
+        # Sin ultimo_error: puede traer direcciones de destinatarios y datos del servidor SMTP
+        ultimos_errores = CorreoSaliente.objects.exclude(ultimo_error__isnull=True).exclude(
+            estado='enviado'
+        ).order_by('-proximo_intento').values('id', 'estado', 'intentos', 'proximo_intento')[:10]
+
+        return Response({
+            'por_estado': {estado: por_estado.get(estado, 0) for estado, _ in CorreoSaliente.ESTADO_CHOICES},
+            'antiguedad_pendiente_segundos': (
+                int((timezone.now() - pendiente_mas_antiguo).total_seconds()) if pendiente_mas_antiguo else 0
+            ),
+            'ultimos_errores': list(ultimos_errores),
+        })
@@ -0,0 +1,51 @@
+# Generated by Django 5.2 on 2026-10-18 03:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def registrar_saldos_iniciales(apps, schema_editor):
+    Insumo = apps.get_model('insumos', 'Insumo')
+    MovimientoInventario = apps.get_model('insumos', 'MovimientoInventario')
+
+    MovimientoInventario.objects.bulk_create([
+        MovimientoInventario(
+            insumo_id=insumo_id,
+            tipo='saldo_inicial',
+            cantidad=cantidad,
+            saldo=cantidad,
+            observaciones='Stock existente al crear el kardex',
+        )
+        for insumo_id, cantidad in Insumo.objects.filter(cantidad__gt=0).values_list('id', 'cantidad')
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insumos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('saldo_inicial', 'Saldo inicial'), ('compra', 'Compra'), ('anulacion_compra', 'Anulación de compra'), ('ajuste', 'Ajuste manual'), ('abastecimiento', 'Abastecimiento')], max_length=20, verbose_name='Tipo')),
+                ('cantidad', models.IntegerField(help_text='Positiva para entradas, negativa para salidas', verbose_name='Cantidad')),
+                ('saldo', models.PositiveIntegerField(verbose_name='Saldo después del movimiento')),
+                ('documento_id', models.PositiveIntegerField(blank=True, help_text='ID de la compra o abastecimiento que originó el movimiento', null=True, verbose_name='Documento')),
+                ('observaciones', models.TextField(blank=True, null=True, verbose_name='Observaciones')),
+                ('fecha', models.DateTimeField(auto_now_add=True, verbose_name='Fecha')),
+                ('insumo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimientos', to='insumos.insumo', verbose_name='Insumo')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de inventario',
+                'verbose_name_plural': 'Movimientos de inventario',
+                'db_table': 'movimientos_inventario',
+                'ordering': ['-fecha', '-id'],
+                'indexes': [models.Index(fields=['insumo', 'fecha'], name='movinv_insumo_fecha_idx'), models.Index(fields=['tipo', 'documento_id'], name='movinv_tipo_documento_idx')],
+            },
+        ),
+        migrations.RunPython(registrar_saldos_iniciales, migrations.RunPython.noop),
+    ]
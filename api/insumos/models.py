@@ -1,5 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
+from django.db.models import F, Case, When, Value, IntegerField, Sum
+from django.utils import timezone
 from decimal import Decimal
 from api.base.base import BaseModel
 from api.categoriainsumos.models import CategoriaInsumo
@@ -33,3 +35,137 @@ class Insumo(BaseModel):
     
     def __str__(self):
         return self.nombre
+
+    def save(self, *args, **kwargs):
+        # Al actualizar, la cantidad solo cambia con MovimientoInventario.aplicar();
+        # guardarla aquí pisaría con un valor leído antes los movimientos concurrentes
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name != 'cantidad'
+            ]
+        super().save(*args, **kwargs)
+
+
+class StockInsuficiente(Exception):
+    """Un movimiento dejaría el stock de un insumo por debajo de cero"""
+
+    def __init__(self, insumo_id, nombre, disponible, cantidad):
+        super().__init__(
+            f"Stock insuficiente de {nombre}: disponible {disponible}, se requieren {abs(cantidad)}"
+        )
+        self.insumo_id = insumo_id
+        self.nombre = nombre
+        self.disponible = disponible
+        self.cantidad = cantidad
+
+
+class MovimientoInventario(models.Model):
+    """
+    Kardex de insumos: cada cambio de stock queda registrado con su cantidad
+    (positiva para entradas, negativa para salidas) y el documento que lo originó.
+    La suma de los movimientos de un insumo es su cantidad en Insumo; el comando
+    conciliar_inventario lo verifica y corrige.
+    """
+    TIPO_CHOICES = [
+        ('saldo_inicial', 'Saldo inicial'),
+        ('compra', 'Compra'),
+        ('anulacion_compra', 'Anulación de compra'),
+        ('ajuste', 'Ajuste manual'),
+        ('abastecimiento', 'Abastecimiento'),
+    ]
+
+    insumo = models.ForeignKey(
+        Insumo,
+        on_delete=models.CASCADE,
+        related_name='movimientos',
+        verbose_name="Insumo"
+    )
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, verbose_name="Tipo")
+    cantidad = models.IntegerField(verbose_name="Cantidad", help_text="Positiva para entradas, negativa para salidas")
+    saldo = models.PositiveIntegerField(verbose_name="Saldo después del movimiento")
+    documento_id = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Documento",
+        help_text="ID de la compra o abastecimiento que originó el movimiento"
+    )
+    observaciones = models.TextField(blank=True, null=True, verbose_name="Observaciones")
+    fecha = models.DateTimeField(auto_now_add=True, verbose_name="Fecha")
+
+    class Meta:
+        db_table = 'movimientos_inventario'
+        verbose_name = "Movimiento de inventario"
+        verbose_name_plural = "Movimientos de inventario"
+        ordering = ['-fecha', '-id']
+        indexes = [
+            models.Index(fields=['insumo', 'fecha'], name='movinv_insumo_fecha_idx'),
+            models.Index(fields=['tipo', 'documento_id'], name='movinv_tipo_documento_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.cantidad:+d} - insumo {self.insumo_id}"
+
+    @classmethod
+    def reversion_de_documento(cls, tipo, documento_id):
+        """
+        Movimientos [(insumo_id, cantidad)] que deshacen lo registrado en el kardex
+        para el documento. Los documentos anteriores al kardex no tienen movimientos
+        y no devuelven nada (su stock nunca se descontó).
+        """
+        return [
+            (insumo_id, -total)
+            for insumo_id, total in cls.objects.filter(tipo=tipo, documento_id=documento_id).order_by().values(
+                'insumo_id'
+            ).annotate(total=Sum('cantidad')).values_list('insumo_id', 'total')
+        ]
+
+    @classmethod
+    def aplicar(cls, movimientos, tipo, documento_id=None, observaciones=None):
+        """
+        Aplica al stock los movimientos [(insumo_id, cantidad)] de un documento.
+        Bloquea los insumos (select_for_update, en orden de id), valida que ninguno
+        quede negativo, actualiza todas las cantidades en un solo UPDATE con F() y
+        registra los movimientos con un solo INSERT. Lanza StockInsuficiente sin
+        modificar nada si algún saldo quedaría negativo.
+        """
+        cantidades = {}
+        for insumo_id, cantidad in movimientos:
+            cantidades[insumo_id] = cantidades.get(insumo_id, 0) + cantidad
+        cantidades = {insumo_id: cantidad for insumo_id, cantidad in cantidades.items() if cantidad}
+        if not cantidades:
+            return []
+
+        with transaction.atomic():
+            actuales = {
+                insumo_id: (nombre, disponible)
+                for insumo_id, nombre, disponible in Insumo.objects.select_for_update().filter(
+                    pk__in=cantidades
+                ).order_by('pk').values_list('pk', 'nombre', 'cantidad')
+            }
+            faltantes = set(cantidades) - set(actuales)
+            if faltantes:
+                raise Insumo.DoesNotExist(f"No existen los insumos {sorted(faltantes)}")
+            for insumo_id, cantidad in cantidades.items():
+                nombre, disponible = actuales[insumo_id]
+                if disponible + cantidad < 0:
+                    raise StockInsuficiente(insumo_id, nombre, disponible, cantidad)
+
+            Insumo.objects.filter(pk__in=cantidades).update(
+                cantidad=F('cantidad') + Case(
+                    *[When(pk=insumo_id, then=Value(cantidad)) for insumo_id, cantidad in cantidades.items()],
+                    output_field=IntegerField()
+                ),
+                updated_at=timezone.now()
+            )
+            return cls.objects.bulk_create([
+                cls(
+                    insumo_id=insumo_id,
+                    tipo=tipo,
+                    cantidad=cantidad,
+                    saldo=actuales[insumo_id][1] + cantidad,
+                    documento_id=documento_id,
+                    observaciones=observaciones,
+                )
+                for insumo_id, cantidad in cantidades.items()
+            ])
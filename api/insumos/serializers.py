@@ -1,10 +1,14 @@
 from rest_framework import serializers
+from api.base.serializers import CamposDinamicosMixin
 from .models import Insumo
 from api.categoriainsumos.serializers import CategoriaInsumoSerializer
 class InsumoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Insumo
         fields = ['id', 'nombre', 'cantidad', 'estado', 'categoria_insumo']
+        # Los insumos nuevos empiezan en 0; la cantidad solo cambia con movimientos del
+        # kardex (compras, abastecimientos, ajustar_stock)
+        read_only_fields = ['cantidad']
 
     def validate_nombre(self, value):
         # Primero, aplica las validaciones existentes
@@ -23,7 +27,7 @@ class InsumoSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Ya existe un insumo con este nombre.")
         return value
 
-class InsumoDetailSerializer(serializers.ModelSerializer):
+class InsumoDetailSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     categoria_insumo = CategoriaInsumoSerializer(read_only=True)
 
     class Meta:
@@ -2,7 +2,7 @@ from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.db.models import F, Sum
-from .models import Insumo
+from .models import Insumo, MovimientoInventario, StockInsuficiente
 from .serializers import InsumoSerializer, InsumoDetailSerializer
 # Importar los modelos de detalle de Compra y Abastecimiento con sus rutas correctas
 from api.compras.models import DetalleCompra # Correcto: DetalleCompra
@@ -54,11 +54,7 @@ class InsumoViewSet(viewsets.ModelViewSet):
         para incluir toda la información de la categoría.
         La cantidad siempre se inicializa en 0.
         """
-        # Forzar cantidad a 0 para nuevos insumos
-        data = request.data.copy()
-        data['cantidad'] = 0
-        
-        serializer = self.get_serializer(data=data)
+        serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         
@@ -73,17 +69,19 @@ class InsumoViewSet(viewsets.ModelViewSet):
         """
         Actualiza un insumo existente y devuelve la respuesta con el serializer detallado
         para incluir toda la información de la categoría.
-        No permite modificar la cantidad directamente.
+        No permite modificar la cantidad directamente: se puede reenviar la actual,
+        pero otro valor responde 400 (usar ajustar_stock, compras o abastecimientos).
         """
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
         
-        # Remover cantidad de los datos si está presente para evitar modificaciones directas
-        data = request.data.copy()
-        if 'cantidad' in data:
-            data.pop('cantidad')
+        if 'cantidad' in request.data and str(request.data['cantidad']) != str(instance.cantidad):
+            return Response(
+                {"error": "La cantidad no se modifica directamente. Use ajustar_stock, compras o abastecimientos"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        serializer = self.get_serializer(instance, data=data, partial=partial)
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
         
@@ -136,23 +134,27 @@ class InsumoViewSet(viewsets.ModelViewSet):
         Endpoint: /api/insumos/<pk>/ajustar_stock/
         Parámetros:
         - cantidad: Cantidad a ajustar (positivo para aumentar, negativo para disminuir)
+        - motivo: Observación opcional que queda en el kardex
         """
         insumo = self.get_object()
         
         try:
             cantidad = int(request.data.get('cantidad', 0))
-            if cantidad < 0 and abs(cantidad) > insumo.cantidad:
-                return Response(
-                    {"error": "No se puede reducir más de lo que hay en stock"}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            insumo.cantidad += cantidad
-            insumo.save()
+            MovimientoInventario.aplicar(
+                [(insumo.pk, cantidad)],
+                'ajuste',
+                observaciones=request.data.get('motivo')
+            )
+            insumo.refresh_from_db(fields=['cantidad'])
             
             serializer = InsumoDetailSerializer(insumo)
             return Response(serializer.data)
-        except ValueError:
+        except StockInsuficiente:
+            return Response(
+                {"error": "No se puede reducir más de lo que hay en stock"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except (TypeError, ValueError):
             return Response(
                 {"error": "La cantidad debe ser un número entero"}, 
                 status=status.HTTP_400_BAD_REQUEST
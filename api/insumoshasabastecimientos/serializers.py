@@ -1,10 +1,11 @@
 from rest_framework import serializers
+from api.base.serializers import CamposDinamicosMixin
 from .models import InsumoHasAbastecimiento
 from api.insumos.models import Insumo
 from api.insumos.serializers import InsumoSerializer
 
 
-class InsumoHasAbastecimientoSerializer(serializers.ModelSerializer):
+class InsumoHasAbastecimientoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = InsumoHasAbastecimiento
         fields = ['id', 'insumo', 'cantidad']
@@ -9,10 +9,11 @@ from .serializers import (
 )
 
 
-class InsumoHasAbastecimientoViewSet(viewsets.ModelViewSet):
+class InsumoHasAbastecimientoViewSet(viewsets.ReadOnlyModelViewSet):
     """
-    ViewSet para el modelo InsumoHasAbastecimiento.
-    Proporciona operaciones CRUD completas y algunos endpoints adicionales.
+    ViewSet de solo lectura para el modelo InsumoHasAbastecimiento.
+    Las líneas se crean y modifican a través del abastecimiento, que descuenta
+    el stock en el kardex (MovimientoInventario.aplicar).
     """
     queryset = InsumoHasAbastecimiento.objects.all()
     
@@ -29,7 +30,7 @@ class InsumoHasAbastecimientoViewSet(viewsets.ModelViewSet):
         """
         Endpoint para listar todos los registros con información detallada.
         """
-        registros = self.get_queryset()
+        registros = self.get_queryset().select_related('insumo')
         serializer = self.get_serializer(registros, many=True)
         return Response(serializer.data)
     
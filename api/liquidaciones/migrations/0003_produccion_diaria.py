@@ -0,0 +1,58 @@
+# Generated by Django 5.2 on 2026-10-18 02:53
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def poblar_produccion(apps, schema_editor):
+    Cita = apps.get_model('citas', 'Cita')
+    ProduccionDiaria = apps.get_model('liquidaciones', 'ProduccionDiaria')
+
+    agrupado = Cita.objects.filter(estado='finalizada').order_by().values(
+        'manicurista_id', 'fecha_cita'
+    ).annotate(cantidad=Count('id'), total=Sum('precio_total'))
+
+    ProduccionDiaria.objects.bulk_create([
+        ProduccionDiaria(
+            manicurista_id=fila['manicurista_id'],
+            fecha=fila['fecha_cita'],
+            cantidad_citas=fila['cantidad'],
+            total_bruto=fila['total'] or Decimal('0.00'),
+            comision=((fila['total'] or Decimal('0.00')) * Decimal('0.5')).quantize(Decimal('0.01')),
+        )
+        for fila in agrupado
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('citas', '0003_initial'),
+        ('liquidaciones', '0002_initial'),
+        ('manicuristas', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProduccionDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('cantidad_citas', models.IntegerField(default=0)),
+                ('total_bruto', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Suma de precio_total de las citas finalizadas del día', max_digits=12)),
+                ('comision', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Comisión de la manicurista sobre el total bruto', max_digits=12)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('manicurista', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='produccion_diaria', to='manicuristas.manicurista')),
+            ],
+            options={
+                'verbose_name': 'Producción diaria',
+                'verbose_name_plural': 'Producción diaria',
+                'db_table': 'produccion_diaria',
+                'ordering': ['-fecha'],
+                'unique_together': {('manicurista', 'fecha')},
+            },
+        ),
+        migrations.RunPython(poblar_produccion, migrations.RunPython.noop),
+    ]
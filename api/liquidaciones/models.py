@@ -1,7 +1,39 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.utils import timezone
 from django.core.validators import MinValueValidator
 from decimal import Decimal
-from django.db.models import Sum
+from django.db.models import F, Sum, Count, OuterRef, Subquery, Value, DecimalField, IntegerField
+from django.db.models.functions import Coalesce
+
+
+class LiquidacionQuerySet(models.QuerySet):
+    def con_totales_citas(self):
+        """
+        Anota los totales de citas finalizadas del período de cada liquidación con
+        subconsultas correlacionadas, para no consultar la BD por cada fila al serializar.
+        """
+        from api.citas.models import Cita
+
+        citas = Cita.objects.filter(
+            manicurista=OuterRef('manicurista'),
+            fecha_cita__gte=OuterRef('fecha_inicio'),
+            fecha_cita__lte=OuterRef('fecha_final'),
+            estado='finalizada'
+        ).order_by().values('manicurista')
+
+        def subconsulta(agregado, vacio, output_field):
+            return Coalesce(
+                Subquery(citas.annotate(valor=agregado).values('valor'), output_field=output_field),
+                Value(vacio),
+                output_field=output_field
+            )
+
+        decimal = DecimalField(max_digits=12, decimal_places=2)
+        return self.annotate(
+            total_servicios_anotado=subconsulta(Sum('precio_servicio'), Decimal('0.00'), decimal),
+            total_citas_anotado=subconsulta(Sum('precio_total'), Decimal('0.00'), decimal),
+            cantidad_citas_anotada=subconsulta(Count('id'), 0, IntegerField()),
+        )
 
 
 class Liquidacion(models.Model):
@@ -40,6 +72,8 @@ class Liquidacion(models.Model):
     fecha_actualizacion = models.DateTimeField(auto_now=True)
     observaciones = models.TextField(blank=True, null=True)
 
+    objects = LiquidacionQuerySet.as_manager()
+
     class Meta:
         db_table = 'liquidaciones'
         verbose_name = 'Liquidación'
@@ -58,6 +92,10 @@ class Liquidacion(models.Model):
     @property
     def total_servicios_completados(self):
         """Calcula el total de servicios completados en el período"""
+        # Valor anotado por LiquidacionQuerySet.con_totales_citas()
+        if hasattr(self, 'total_servicios_anotado'):
+            return self.total_servicios_anotado
+
         from api.citas.models import Cita
         
         total = Cita.objects.filter(
@@ -73,9 +111,28 @@ class Liquidacion(models.Model):
         """Calcula la comisión del 50% de las citas completadas"""
         return self.total_servicios_completados * Decimal('0.5')
 
+    @property
+    def total_citas_completadas(self):
+        """Suma el precio total de las citas completadas en el período"""
+        if hasattr(self, 'total_citas_anotado'):
+            return self.total_citas_anotado
+
+        from api.citas.models import Cita
+
+        total = Cita.objects.filter(
+            manicurista=self.manicurista,
+            fecha_cita__range=(self.fecha_inicio, self.fecha_final),
+            estado='finalizada'
+        ).aggregate(total=Sum('precio_total'))['total']
+
+        return total or Decimal('0.00')
+
     @property
     def cantidad_servicios_completados(self):
         """Cuenta la cantidad de servicios completados"""
+        if hasattr(self, 'cantidad_citas_anotada'):
+            return self.cantidad_citas_anotada
+
         from api.citas.models import Cita
         
         return Cita.objects.filter(
@@ -109,3 +166,253 @@ class Liquidacion(models.Model):
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
+
+    @classmethod
+    def generar_para_periodo(cls, fecha_inicio, fecha_final, bonificacion=Decimal('0.00'), manicurista_id=None):
+        """
+        Crea en una sola transacción las liquidaciones del período para todas las
+        manicuristas activas que aún no tengan una (o solo para manicurista_id, esté
+        activa o no). El valor es la comisión sobre sus citas completadas, tomada de
+        ProduccionDiaria con una consulta agrupada.
+        Retorna un resumen con las liquidaciones creadas y las omitidas.
+        """
+        from django.core.exceptions import ValidationError
+        from api.manicuristas.models import Manicurista
+
+        if fecha_final < fecha_inicio:
+            raise ValidationError('La fecha final debe ser posterior a la fecha de inicio')
+        if bonificacion.is_nan():
+            raise ValidationError('Bonificación inválida')
+        if bonificacion < 0:
+            raise ValidationError('La bonificación no puede ser negativa')
+
+        with transaction.atomic():
+            # Bloquear las manicuristas (en orden de id, sin deadlocks) antes de buscar las
+            # liquidaciones existentes: una generación simultánea del mismo período espera
+            # aquí y luego las ve como existentes en lugar de chocar con unique_together
+            if manicurista_id is not None:
+                bloqueadas = Manicurista.objects.select_for_update().filter(id=manicurista_id)
+            else:
+                bloqueadas = Manicurista.objects.select_for_update().filter(estado='activo')
+            manicuristas = sorted(
+                bloqueadas.order_by('id').values_list('id', 'nombre'),
+                key=lambda manicurista: manicurista[1]
+            )
+            existentes = cls.objects.filter(fecha_inicio=fecha_inicio, fecha_final=fecha_final)
+            citas = ProduccionDiaria.objects.filter(fecha__range=(fecha_inicio, fecha_final))
+            if manicurista_id is not None:
+                existentes = existentes.filter(manicurista_id=manicurista_id)
+                citas = citas.filter(manicurista_id=manicurista_id)
+            existentes = set(existentes.values_list('manicurista_id', flat=True))
+
+            produccion = {
+                fila['manicurista_id']: fila
+                for fila in citas.order_by().values('manicurista_id').annotate(
+                    cantidad=Sum('cantidad_citas'),
+                    total=Sum('total_bruto')
+                )
+            }
+
+            nuevas, creadas, omitidas = [], [], []
+            for manicurista_id, nombre in manicuristas:
+                if manicurista_id in existentes:
+                    omitidas.append({'manicurista_id': manicurista_id, 'manicurista': nombre})
+                    continue
+
+                fila = produccion.get(manicurista_id, {})
+                cantidad = fila.get('cantidad') or 0
+                total = fila.get('total') or Decimal('0.00')
+                valor = (total * ProduccionDiaria.PORCENTAJE_COMISION).quantize(Decimal('0.01'))
+
+                nuevas.append(cls(
+                    manicurista_id=manicurista_id,
+                    fecha_inicio=fecha_inicio,
+                    fecha_final=fecha_final,
+                    valor=valor,
+                    bonificacion=bonificacion,
+                    observaciones=f"Liquidación automática basada en {cantidad} citas completadas"
+                ))
+                creadas.append({
+                    'manicurista_id': manicurista_id,
+                    'manicurista': nombre,
+                    'cantidad_citas': cantidad,
+                    'total_citas_completadas': float(total),
+                    'valor': float(valor),
+                })
+
+            cls.objects.bulk_create(nuevas, batch_size=500)
+
+        return {
+            'periodo': {'fecha_inicio': fecha_inicio, 'fecha_final': fecha_final},
+            'cantidad_creadas': len(creadas),
+            'cantidad_omitidas': len(omitidas),
+            'total_valor': float(sum(l.valor for l in nuevas)),
+            'creadas': creadas,
+            'omitidas': omitidas,
+        }
+
+
+class ProduccionDiaria(models.Model):
+    """
+    Producción de citas finalizadas por manicurista y día. Se mantiene de forma
+    incremental con las señales de Cita (ver más abajo) para que las liquidaciones
+    sumen unas pocas filas por período en lugar de recorrer todas las citas.
+    Si las citas se modifican con QuerySet.update() u otro medio que no dispare
+    señales, usar el comando reconstruir_produccion.
+    """
+    PORCENTAJE_COMISION = Decimal('0.5')
+
+    manicurista = models.ForeignKey(
+        'manicuristas.Manicurista',
+        on_delete=models.CASCADE,
+        related_name='produccion_diaria'
+    )
+    fecha = models.DateField()
+    cantidad_citas = models.IntegerField(default=0)
+    total_bruto = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text="Suma de precio_total de las citas finalizadas del día"
+    )
+    comision = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text="Comisión de la manicurista sobre el total bruto"
+    )
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'produccion_diaria'
+        verbose_name = 'Producción diaria'
+        verbose_name_plural = 'Producción diaria'
+        ordering = ['-fecha']
+        unique_together = ['manicurista', 'fecha']
+
+    def __str__(self):
+        return f"Producción {self.manicurista_id} {self.fecha}: {self.cantidad_citas} citas"
+
+    @classmethod
+    def registrar(cls, manicurista_id, fecha, cantidad, total):
+        """Suma (o resta, con valores negativos) citas finalizadas a la fila del día"""
+        total = Decimal(total or 0)
+        cambios = {
+            'cantidad_citas': F('cantidad_citas') + cantidad,
+            'total_bruto': F('total_bruto') + total,
+            'comision': (F('total_bruto') + total) * cls.PORCENTAJE_COMISION,
+            'fecha_actualizacion': timezone.now(),
+        }
+        filas = cls.objects.filter(manicurista_id=manicurista_id, fecha=fecha)
+        if filas.update(**cambios):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    manicurista_id=manicurista_id,
+                    fecha=fecha,
+                    cantidad_citas=max(cantidad, 0),
+                    total_bruto=max(total, Decimal('0.00')),
+                    comision=(max(total, Decimal('0.00')) * cls.PORCENTAJE_COMISION).quantize(Decimal('0.01')),
+                )
+        except IntegrityError:
+            # Otra petición creó la fila al mismo tiempo
+            filas.update(**cambios)
+
+    @classmethod
+    def resumen(cls, manicurista, fecha_inicio, fecha_final):
+        """Totales de citas finalizadas de la manicurista en el período"""
+        totales = cls.objects.filter(
+            manicurista=manicurista,
+            fecha__range=(fecha_inicio, fecha_final)
+        ).aggregate(
+            cantidad=Sum('cantidad_citas'),
+            total=Sum('total_bruto'),
+            comision=Sum('comision')
+        )
+        return {
+            'cantidad': totales['cantidad'] or 0,
+            'total': totales['total'] or Decimal('0.00'),
+            'comision': totales['comision'] or Decimal('0.00'),
+        }
+
+    @classmethod
+    def reconstruir(cls, fecha_inicio=None, fecha_final=None):
+        """Recalcula la producción desde las citas finalizadas. Retorna las filas creadas."""
+        from api.citas.models import Cita
+
+        citas = Cita.objects.filter(estado='finalizada')
+        filas = cls.objects.all()
+        if fecha_inicio:
+            citas = citas.filter(fecha_cita__gte=fecha_inicio)
+            filas = filas.filter(fecha__gte=fecha_inicio)
+        if fecha_final:
+            citas = citas.filter(fecha_cita__lte=fecha_final)
+            filas = filas.filter(fecha__lte=fecha_final)
+
+        agrupado = citas.order_by().values('manicurista_id', 'fecha_cita').annotate(
+            cantidad=Count('id'),
+            total=Sum('precio_total')
+        )
+        nuevas = [
+            cls(
+                manicurista_id=fila['manicurista_id'],
+                fecha=fila['fecha_cita'],
+                cantidad_citas=fila['cantidad'],
+                total_bruto=fila['total'] or Decimal('0.00'),
+                comision=((fila['total'] or Decimal('0.00')) * cls.PORCENTAJE_COMISION).quantize(Decimal('0.01')),
+            )
+            for fila in agrupado
+        ]
+        with transaction.atomic():
+            filas.delete()
+            cls.objects.bulk_create(nuevas, batch_size=500)
+        return len(nuevas)
+
+
+# Señales para mantener ProduccionDiaria al día
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from api.citas.models import Cita
+
+
+def _aporte_produccion(manicurista_id, fecha, estado, precio_total):
+    """(manicurista, fecha, total) con que la cita aporta a la producción, o None"""
+    if estado != 'finalizada':
+        return None
+    return (manicurista_id, fecha, Decimal(precio_total or 0))
+
+
+@receiver(pre_save, sender=Cita)
+def guardar_aporte_anterior_cita(sender, instance, raw=False, **kwargs):
+    instance._aporte_produccion_anterior = None
+    if raw or not instance.pk:
+        return
+    anterior = Cita.objects.filter(pk=instance.pk).values(
+        'manicurista_id', 'fecha_cita', 'estado', 'precio_total'
+    ).first()
+    if anterior:
+        instance._aporte_produccion_anterior = _aporte_produccion(
+            anterior['manicurista_id'], anterior['fecha_cita'], anterior['estado'], anterior['precio_total']
+        )
+
+
+@receiver(post_save, sender=Cita)
+def actualizar_produccion_por_cita(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = getattr(instance, '_aporte_produccion_anterior', None)
+    actual = _aporte_produccion(instance.manicurista_id, instance.fecha_cita, instance.estado, instance.precio_total)
+    if anterior == actual:
+        return
+    if anterior:
+        ProduccionDiaria.registrar(anterior[0], anterior[1], -1, -anterior[2])
+    if actual:
+        ProduccionDiaria.registrar(actual[0], actual[1], 1, actual[2])
+
+
+@receiver(post_delete, sender=Cita)
+def descontar_produccion_por_cita(sender, instance, **kwargs):
+    aporte = _aporte_produccion(instance.manicurista_id, instance.fecha_cita, instance.estado, instance.precio_total)
+    if aporte:
+        ProduccionDiaria.registrar(aporte[0], aporte[1], -1, -aporte[2])
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Liquidacion
+from api.base.serializers import CamposDinamicosMixin
+from .models import Liquidacion, ProduccionDiaria
 from api.manicuristas.models import Manicurista
 from api.manicuristas.serializers import ManicuristaSerializer
 from api.citas.models import Cita
@@ -10,42 +11,24 @@ from datetime import datetime
 from decimal import Decimal
 
 
-class LiquidacionSerializer(serializers.ModelSerializer):
-    # Campos calculados de solo lectura (propiedades del modelo)
-    total_servicios_completados = serializers.ReadOnlyField()
-    total_a_pagar = serializers.ReadOnlyField()
-    cantidad_servicios_completados = serializers.ReadOnlyField()
-    citascompletadas = serializers.ReadOnlyField()
-    
-    # Campos calculados para citas completadas
-    total_citas_completadas = serializers.SerializerMethodField()
-    cantidad_citas_completadas = serializers.SerializerMethodField()
-    comision_50_porciento = serializers.SerializerMethodField()
+class TotalesCitasMixin:
+    """
+    Campos de citas completadas compartidos por los serializers de liquidación.
+    Usan los valores anotados por Liquidacion.objects.con_totales_citas() y solo
+    consultan la BD por objeto si la liquidación no viene anotada.
+    """
 
-    class Meta:
-        model = Liquidacion
-        fields = '__all__'
-    
     def get_total_citas_completadas(self, obj):
         """Calcular total de citas completadas en el período"""
         try:
-            total = Cita.objects.filter(
-                manicurista=obj.manicurista,
-                fecha_cita__range=(obj.fecha_inicio, obj.fecha_final),
-                estado='finalizada'
-            ).aggregate(total=Sum('precio_total'))['total'] or Decimal('0.00')
-            return float(total)
+            return float(obj.total_citas_completadas)
         except Exception:
             return 0.0
     
     def get_cantidad_citas_completadas(self, obj):
         """Contar citas completadas en el período"""
         try:
-            return Cita.objects.filter(
-                manicurista=obj.manicurista,
-                fecha_cita__range=(obj.fecha_inicio, obj.fecha_final),
-                estado='finalizada'
-            ).count()
+            return obj.cantidad_servicios_completados
         except Exception:
             return 0
     
@@ -53,7 +36,24 @@ class LiquidacionSerializer(serializers.ModelSerializer):
         """Calcular el 50% de las citas completadas"""
         total_citas = self.get_total_citas_completadas(obj)
         return total_citas * 0.5
-        
+
+
+class LiquidacionSerializer(TotalesCitasMixin, serializers.ModelSerializer):
+    # Campos calculados de solo lectura (propiedades del modelo)
+    total_servicios_completados = serializers.ReadOnlyField()
+    total_a_pagar = serializers.ReadOnlyField()
+    cantidad_servicios_completados = serializers.ReadOnlyField()
+    citascompletadas = serializers.ReadOnlyField()
+    
+    # Campos calculados para citas completadas
+    total_citas_completadas = serializers.SerializerMethodField()
+    cantidad_citas_completadas = serializers.SerializerMethodField()
+    comision_50_porciento = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Liquidacion
+        fields = '__all__'
+    
     def validate(self, data):
         # Validar duplicados por manicurista y rango de fechas
         queryset = Liquidacion.objects.filter(
@@ -77,7 +77,7 @@ class LiquidacionSerializer(serializers.ModelSerializer):
         return data
 
 
-class LiquidacionDetailSerializer(serializers.ModelSerializer):
+class LiquidacionDetailSerializer(TotalesCitasMixin, CamposDinamicosMixin, serializers.ModelSerializer):
     manicurista = ManicuristaSerializer(read_only=True)
     
     # Campos calculados del modelo
@@ -94,34 +94,6 @@ class LiquidacionDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Liquidacion
         fields = '__all__'
-    
-    def get_total_citas_completadas(self, obj):
-        """Calcular total de citas completadas en el período"""
-        try:
-            total = Cita.objects.filter(
-                manicurista=obj.manicurista,
-                fecha_cita__range=(obj.fecha_inicio, obj.fecha_final),
-                estado='finalizada'
-            ).aggregate(total=Sum('precio_total'))['total'] or Decimal('0.00')
-            return float(total)
-        except Exception:
-            return 0.0
-    
-    def get_cantidad_citas_completadas(self, obj):
-        """Contar citas completadas en el período"""
-        try:
-            return Cita.objects.filter(
-                manicurista=obj.manicurista,
-                fecha_cita__range=(obj.fecha_inicio, obj.fecha_final),
-                estado='finalizada'
-            ).count()
-        except Exception:
-            return 0
-    
-    def get_comision_50_porciento(self, obj):
-        """Calcular el 50% de las citas completadas"""
-        total_citas = self.get_total_citas_completadas(obj)
-        return total_citas * 0.5
 
 
 class LiquidacionCreateSerializer(serializers.ModelSerializer):
@@ -147,13 +119,9 @@ class LiquidacionCreateSerializer(serializers.ModelSerializer):
             fecha_inicio = validated_data['fecha_inicio']
             fecha_final = validated_data['fecha_final']
             
-            # Calcular total de citas completadas
+            # Calcular total de citas completadas desde la producción diaria
             try:
-                total_citas = Cita.objects.filter(
-                    manicurista=manicurista,
-                    fecha_cita__range=(fecha_inicio, fecha_final),
-                    estado='finalizada'
-                ).aggregate(total=Sum('precio_total'))['total'] or Decimal('0.00')
+                total_citas = ProduccionDiaria.resumen(manicurista, fecha_inicio, fecha_final)['total']
                 
                 # Calcular el 50% de comisión y redondear a 2 decimales
                 comision = (total_citas * Decimal('0.5')).quantize(Decimal('0.01'))
@@ -190,11 +158,9 @@ class LiquidacionUpdateSerializer(serializers.ModelSerializer):
         # Recalcular valor basado en citas si se solicita
         if recalcular_valor:
             try:
-                total_citas = Cita.objects.filter(
-                    manicurista=instance.manicurista,
-                    fecha_cita__range=(instance.fecha_inicio, instance.fecha_final),
-                    estado='finalizada'
-                ).aggregate(total=Sum('precio_total'))['total'] or Decimal('0.00')
+                total_citas = ProduccionDiaria.resumen(
+                    instance.manicurista, instance.fecha_inicio, instance.fecha_final
+                )['total']
             
             # Calcular el 50% de comisión y redondear a 2 decimales
                 comision = (total_citas * Decimal('0.5')).quantize(Decimal('0.01'))
@@ -221,6 +187,36 @@ class ServicioSimpleSerializer(serializers.ModelSerializer):
         fields = ['id', 'nombre', 'precio', 'duracion', 'descripcion']
 
 
+def cargar_citas_periodo(liquidaciones):
+    """
+    Asigna a cada liquidación sus citas finalizadas del período (citas_periodo)
+    con una consulta para todas, más la de los servicios, en lugar de consultar
+    por cada fila al serializar.
+    """
+    liquidaciones = list(liquidaciones)
+    if not liquidaciones:
+        return liquidaciones
+
+    citas = Cita.objects.filter(
+        manicurista_id__in={liquidacion.manicurista_id for liquidacion in liquidaciones},
+        fecha_cita__range=(
+            min(liquidacion.fecha_inicio for liquidacion in liquidaciones),
+            max(liquidacion.fecha_final for liquidacion in liquidaciones),
+        ),
+        estado='finalizada'
+    ).select_related('cliente', 'servicio').prefetch_related('servicios').order_by('fecha_cita', 'hora_cita')
+
+    por_manicurista = {}
+    for cita in citas:
+        por_manicurista.setdefault(cita.manicurista_id, []).append(cita)
+    for liquidacion in liquidaciones:
+        liquidacion.citas_periodo = [
+            cita for cita in por_manicurista.get(liquidacion.manicurista_id, [])
+            if liquidacion.fecha_inicio <= cita.fecha_cita <= liquidacion.fecha_final
+        ]
+    return liquidaciones
+
+
 class CitaDetalladaSerializer(serializers.ModelSerializer):
     """Serializer detallado para citas con información completa"""
     cliente = ClienteSimpleSerializer(read_only=True)
@@ -242,7 +238,7 @@ class CitaDetalladaSerializer(serializers.ModelSerializer):
         ]
 
 
-class LiquidacionCompletaSerializer(serializers.ModelSerializer):
+class LiquidacionCompletaSerializer(TotalesCitasMixin, serializers.ModelSerializer):
     """Serializer completo para liquidaciones con todos los detalles de citas"""
     manicurista = ManicuristaSerializer(read_only=True)
     
@@ -273,58 +269,26 @@ class LiquidacionCompletaSerializer(serializers.ModelSerializer):
             'comision_50_porciento', 'citas_detalladas', 'resumen_citas'
         ]
     
-    def get_total_citas_completadas(self, obj):
-        """Calcular total de citas completadas en el período"""
-        try:
-            total = Cita.objects.filter(
-                manicurista=obj.manicurista,
-                fecha_cita__range=(obj.fecha_inicio, obj.fecha_final),
-                estado='finalizada'
-            ).aggregate(total=Sum('precio_total'))['total'] or Decimal('0.00')
-            return float(total)
-        except Exception:
-            return 0.0
-    
-    def get_cantidad_citas_completadas(self, obj):
-        """Contar citas completadas en el período"""
-        try:
-            return Cita.objects.filter(
-                manicurista=obj.manicurista,
-                fecha_cita__range=(obj.fecha_inicio, obj.fecha_final),
-                estado='finalizada'
-            ).count()
-        except Exception:
-            return 0
-    
-    def get_comision_50_porciento(self, obj):
-        """Calcular el 50% de las citas completadas"""
-        total_citas = self.get_total_citas_completadas(obj)
-        return total_citas * 0.5
-    
+    def _citas_periodo(self, obj):
+        """Citas ya cargadas por cargar_citas_periodo(), o se cargan para este objeto"""
+        if not hasattr(obj, 'citas_periodo'):
+            cargar_citas_periodo([obj])
+        return obj.citas_periodo
+
     def get_citas_detalladas(self, obj):
         """Obtener información detallada de todas las citas completadas"""
         try:
-            citas = Cita.objects.filter(
-                manicurista=obj.manicurista,
-                fecha_cita__range=(obj.fecha_inicio, obj.fecha_final),
-                estado='finalizada'
-            ).select_related('cliente', 'servicio').prefetch_related('servicios').order_by('fecha_cita', 'hora_cita')
-            
-            return CitaDetalladaSerializer(citas, many=True).data
+            return CitaDetalladaSerializer(self._citas_periodo(obj), many=True).data
         except Exception:
             return []
     
     def get_resumen_citas(self, obj):
         """Obtener resumen estadístico de las citas"""
         try:
-            citas = Cita.objects.filter(
-                manicurista=obj.manicurista,
-                fecha_cita__range=(obj.fecha_inicio, obj.fecha_final),
-                estado='finalizada'
-            )
+            citas = self._citas_periodo(obj)
             
-            total_citas = citas.aggregate(total=Sum('precio_total'))['total'] or Decimal('0.00')
-            cantidad_citas = citas.count()
+            total_citas = obj.total_citas_completadas
+            cantidad_citas = obj.cantidad_servicios_completados
             comision_50 = (total_citas * Decimal('0.5')).quantize(Decimal('0.01'))
             
             # Estadísticas por día
@@ -3,14 +3,16 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.db.models import Sum, Q, Count
 from datetime import datetime
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
+from django.core.exceptions import ValidationError
 from .models import Liquidacion
 from .serializers import (
     LiquidacionSerializer, 
     LiquidacionDetailSerializer, 
     LiquidacionCreateSerializer,
     LiquidacionUpdateSerializer,
-    LiquidacionCompletaSerializer
+    LiquidacionCompletaSerializer,
+    cargar_citas_periodo
 )
 from api.citas.models import Cita
 from api.manicuristas.models import Manicurista
@@ -30,7 +32,8 @@ class LiquidacionViewSet(viewsets.ModelViewSet):
         return LiquidacionSerializer
 
     def get_queryset(self):
-        queryset = Liquidacion.objects.select_related('manicurista').all()
+        # Totales de citas anotados en la misma consulta (ver LiquidacionQuerySet)
+        queryset = Liquidacion.objects.select_related('manicurista').con_totales_citas()
         manicurista_id = self.request.query_params.get('manicurista')
         estado = self.request.query_params.get('estado')
         fecha_inicio = self.request.query_params.get('fecha_inicio')
@@ -151,34 +154,29 @@ class LiquidacionViewSet(viewsets.ModelViewSet):
         except ValueError:
             return Response({"error": "Formato de fecha inválido. Use YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Verificar si ya existe una liquidación para este período
-        if Liquidacion.objects.filter(
-            manicurista=manicurista,
-            fecha_inicio=fecha_inicio_obj,
-            fecha_final=fecha_final_obj
-        ).exists():
+        try:
+            bonificacion = Decimal(str(bonificacion)).quantize(Decimal('0.01'))
+        except InvalidOperation:
+            return Response({"error": "Bonificación inválida"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Misma creación que la generación en bloque: bloquea la manicurista antes de
+        # buscar la liquidación existente, así dos peticiones simultáneas no chocan
+        try:
+            resumen = Liquidacion.generar_para_periodo(
+                fecha_inicio_obj, fecha_final_obj, bonificacion, manicurista_id=manicurista.id
+            )
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        if resumen['cantidad_omitidas']:
             return Response({
                 "error": "Ya existe una liquidación para esta manicurista en este período"
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Calcular valor basado en citas completadas
-        total_citas = Cita.objects.filter(
-            manicurista=manicurista,
-            fecha_cita__range=(fecha_inicio_obj, fecha_final_obj),
-            estado='finalizada'
-        ).aggregate(total=Sum('precio_total'))['total'] or Decimal('0.00')
-
-        # Calcular el 50% de comisión y redondear a 2 decimales
-        comision_50_porciento = (total_citas * Decimal('0.5')).quantize(Decimal('0.01'))
-
-        # Crear la liquidación
-        liquidacion = Liquidacion.objects.create(
+        liquidacion = Liquidacion.objects.get(
             manicurista=manicurista,
             fecha_inicio=fecha_inicio_obj,
-            fecha_final=fecha_final_obj,
-            valor=comision_50_porciento,
-            bonificacion=Decimal(str(bonificacion)).quantize(Decimal('0.01')),
-            observaciones=f"Liquidación automática basada en {Cita.objects.filter(manicurista=manicurista, fecha_cita__range=(fecha_inicio_obj, fecha_final_obj), estado='finalizada').count()} citas completadas"
+            fecha_final=fecha_final_obj
         )
 
         serializer = LiquidacionDetailSerializer(liquidacion)
@@ -187,6 +185,41 @@ class LiquidacionViewSet(viewsets.ModelViewSet):
             'liquidacion': serializer.data
         }, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['post'])
+    def generar_liquidaciones_periodo(self, request):
+        """
+        Crear en bloque las liquidaciones del período para todas las manicuristas activas
+        """
+        fecha_inicio = request.data.get('fecha_inicio')
+        fecha_final = request.data.get('fecha_final')
+        bonificacion = request.data.get('bonificacion', 0)
+
+        if not all([fecha_inicio, fecha_final]):
+            return Response({
+                "error": "Se requieren fecha_inicio y fecha_final"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            fecha_inicio_obj = datetime.strptime(fecha_inicio, '%Y-%m-%d').date()
+            fecha_final_obj = datetime.strptime(fecha_final, '%Y-%m-%d').date()
+        except ValueError:
+            return Response({"error": "Formato de fecha inválido. Use YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            bonificacion = Decimal(str(bonificacion)).quantize(Decimal('0.01'))
+        except InvalidOperation:
+            return Response({"error": "Bonificación inválida"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            resumen = Liquidacion.generar_para_periodo(fecha_inicio_obj, fecha_final_obj, bonificacion)
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'mensaje': f"Se crearon {resumen['cantidad_creadas']} liquidaciones",
+            **resumen
+        }, status=status.HTTP_201_CREATED)
+
     @action(detail=True, methods=['post'])
     def recalcular_citas_completadas(self, request, pk=None):
         """
@@ -208,14 +241,18 @@ class LiquidacionViewSet(viewsets.ModelViewSet):
     def por_manicurista(self, request):
         manicurista_id = request.query_params.get('id')
         if manicurista_id:
-            liquidaciones = Liquidacion.objects.filter(manicurista_id=manicurista_id)
+            liquidaciones = Liquidacion.objects.select_related('manicurista').con_totales_citas().filter(
+                manicurista_id=manicurista_id
+            )
             serializer = LiquidacionDetailSerializer(liquidaciones, many=True)
             return Response(serializer.data)
         return Response({"error": "Se requiere el ID del manicurista"}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['get'])
     def pendientes(self, request):
-        liquidaciones = Liquidacion.objects.filter(estado='pendiente')
+        liquidaciones = Liquidacion.objects.select_related('manicurista').con_totales_citas().filter(
+            estado='pendiente'
+        )
         serializer = LiquidacionDetailSerializer(liquidaciones, many=True)
         return Response(serializer.data)
 
@@ -341,7 +378,7 @@ class LiquidacionViewSet(viewsets.ModelViewSet):
         """
         Obtiene todas las liquidaciones con información completa de citas
         """
-        queryset = Liquidacion.objects.select_related('manicurista').all()
+        queryset = Liquidacion.objects.select_related('manicurista').con_totales_citas()
         
         # Aplicar filtros si se proporcionan
         manicurista_id = request.query_params.get('manicurista')
@@ -357,7 +394,7 @@ class LiquidacionViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(fecha_inicio=fecha_inicio, fecha_final=fecha_final)
 
         queryset = queryset.order_by('-fecha_inicio')
-        serializer = LiquidacionCompletaSerializer(queryset, many=True)
+        serializer = LiquidacionCompletaSerializer(cargar_citas_periodo(queryset), many=True)
         return Response(serializer.data)
 
     @action(detail=True, methods=['get'])
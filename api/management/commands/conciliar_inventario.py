@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from api.insumos.models import Insumo
+
+
+class Command(BaseCommand):
+    help = 'Comparar el stock de los insumos con la suma de su kardex (MovimientoInventario) y corregirlo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corregir',
+            action='store_true',
+            help='Reemplazar la cantidad de los insumos descuadrados por el saldo del kardex'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['corregir']:
+                # Bloquear los insumos para que ningún movimiento cambie el stock mientras se corrige
+                list(Insumo.objects.select_for_update().order_by('pk').values_list('pk', flat=True))
+
+            insumos = Insumo.objects.order_by('pk').annotate(
+                saldo_kardex=Coalesce(Sum('movimientos__cantidad'), Value(0))
+            ).values_list('pk', 'nombre', 'cantidad', 'saldo_kardex')
+
+            descuadrados = [fila for fila in insumos if fila[2] != fila[3]]
+            for insumo_id, nombre, cantidad, saldo in descuadrados:
+                self.stdout.write(f'{nombre} (#{insumo_id}): stock {cantidad}, kardex {saldo}, diferencia {cantidad - saldo:+d}')
+
+            if not descuadrados:
+                self.stdout.write(self.style.SUCCESS('El stock de todos los insumos coincide con el kardex'))
+                return
+
+            if not options['corregir']:
+                self.stdout.write(self.style.WARNING(
+                    f'{len(descuadrados)} insumos descuadrados. Use --corregir para ajustarlos al kardex'
+                ))
+                return
+
+            ahora = timezone.now()
+            for insumo_id, nombre, cantidad, saldo in descuadrados:
+                if saldo < 0:
+                    self.stdout.write(self.style.ERROR(f'{nombre} (#{insumo_id}): saldo negativo en el kardex, no se corrige'))
+                    continue
+                Insumo.objects.filter(pk=insumo_id).update(cantidad=saldo, updated_at=ahora)
+
+        self.stdout.write(self.style.SUCCESS(f'Insumos corregidos según el kardex: {len(descuadrados)}'))
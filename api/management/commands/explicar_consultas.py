@@ -0,0 +1,168 @@
+import random
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.citas.models import Cita
+from api.clientes.models import Cliente
+from api.codigorecuperacion.models import CodigoRecuperacion
+from api.manicuristas.models import Manicurista
+from api.novedades.models import Novedad
+from api.servicios.models import Servicio
+from api.ventaservicios.models import VentaServicio
+
+
+class Deshacer(Exception):
+    """Fuerza el rollback de la transacción del benchmark"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Mostrar el plan de ejecución (EXPLAIN) de las consultas más frecuentes '
+        'sobre un conjunto de datos sembrado, con y sin los índices compuestos'
+    )
+
+    MODELOS_INDEXADOS = [Cita, VentaServicio, Novedad, CodigoRecuperacion]
+
+    def add_arguments(self, parser):
+        parser.add_argument('--citas', type=int, default=20000, help='Cantidad de citas a sembrar')
+        parser.add_argument('--manicuristas', type=int, default=10, help='Cantidad de manicuristas a sembrar')
+        parser.add_argument('--sin-sembrar', action='store_true', help='Usar los datos existentes en la BD')
+        parser.add_argument(
+            '--comparar', action='store_true',
+            help='Mostrar también el plan sin los índices (solo en motores con DDL transaccional)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if not options['sin_sembrar']:
+                    self.sembrar(options['manicuristas'], options['citas'])
+                self.analizar()
+
+                if options['comparar']:
+                    if connection.features.can_rollback_ddl:
+                        self.eliminar_indices()
+                        self.stdout.write(self.style.WARNING('\n=== Sin índices compuestos ==='))
+                        self.analizar('sin índices')
+                    else:
+                        self.stdout.write(self.style.WARNING(
+                            f'\n{connection.vendor} no puede deshacer DDL en una transacción: para ver el plan '
+                            'anterior ejecute este comando antes de aplicar las migraciones de índices.'
+                        ))
+                # Los datos sembrados y los índices eliminados se descartan siempre
+                raise Deshacer()
+        except Deshacer:
+            pass
+
+    def consultas(self):
+        """Formas de consulta que usan la agenda, las validaciones, ventas y recuperación"""
+        manicurista_id = Manicurista.objects.values_list('id', flat=True).first()
+        cliente_id = Cliente.objects.values_list('id', flat=True).first()
+        fecha = timezone.localdate()
+        return [
+            ('Cita(manicurista, fecha_cita, estado) - índice único (manicurista, fecha_cita, hora_cita)', Cita.objects.filter(
+                manicurista_id=manicurista_id, fecha_cita=fecha, estado__in=['pendiente', 'en_proceso']
+            ).values('hora_cita', 'duracion_total')),
+            ('Cita(cliente, fecha_cita, hora_cita, estado)', Cita.objects.filter(
+                cliente_id=cliente_id, fecha_cita=fecha, hora_cita=time(12, 0), estado__in=['pendiente', 'en_proceso']
+            ).values('id')),
+            ('Cita finalizadas por manicurista y período', Cita.objects.filter(
+                manicurista_id=manicurista_id, fecha_cita__range=(fecha - timedelta(days=15), fecha), estado='finalizada'
+            ).values('precio_total')),
+            ('VentaServicio(estado, fecha_venta)', VentaServicio.objects.filter(
+                estado='pagada', fecha_venta__gte=timezone.now() - timedelta(days=30)
+            ).values('total')),
+            ('Novedad(manicurista, fecha, estado)', Novedad.objects.filter(
+                manicurista_id=manicurista_id, fecha=fecha
+            ).exclude(estado='anulada').values('id')),
+            ('CodigoRecuperacion(correo, codigo, usado)', CodigoRecuperacion.objects.filter(
+                correo_electronico='cliente1@ejemplo.com', codigo='123456', usado=False
+            ).values('id')),
+        ]
+
+    def analizar(self, etiqueta='con índices'):
+        for titulo, queryset in self.consultas():
+            self.stdout.write(self.style.SUCCESS(f'\n--- {titulo}'))
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                # El comentario cambia el texto del SQL para que SQLite no reutilice
+                # la sentencia preparada (y su plan) de la pasada anterior
+                cursor.execute(f'{connection.ops.explain_query_prefix()} {sql} /* {etiqueta} */', params)
+                for fila in cursor.fetchall():
+                    self.stdout.write(' '.join(str(valor) for valor in fila))
+
+    def eliminar_indices(self):
+        # DROP INDEX directo: el schema editor de SQLite no se puede abrir dentro de la transacción
+        with connection.cursor() as cursor:
+            for modelo in self.MODELOS_INDEXADOS:
+                for indice in modelo._meta.indexes:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(indice.name)}')
+
+    def sembrar(self, cantidad_manicuristas, cantidad_citas):
+        self.stdout.write(f'Sembrando {cantidad_manicuristas} manicuristas y {cantidad_citas} citas...')
+        aleatorio = random.Random(42)
+        hoy = timezone.localdate()
+
+        servicio = Servicio.objects.create(
+            nombre='Servicio benchmark', precio=Decimal('30000'), descripcion='Servicio para benchmark', duracion=60
+        )
+        manicuristas = Manicurista.objects.bulk_create([
+            Manicurista(nombre=f'Manicurista Benchmark {i}', numero_documento=f'BM{i:06d}', correo=f'bm{i}@ejemplo.com')
+            for i in range(cantidad_manicuristas)
+        ])
+        clientes = Cliente.objects.bulk_create([
+            Cliente(
+                tipo_documento='CC', documento=f'BC{i:06d}', nombre=f'Cliente Benchmark {i}',
+                celular='3000000000', correo_electronico=f'cliente{i}@ejemplo.com', direccion='N/A'
+            )
+            for i in range(max(cantidad_citas // 20, 1))
+        ])
+
+        horas = [time(h, m) for h in range(10, 20) for m in (0, 30)]
+        estados = ['finalizada'] * 6 + ['cancelada', 'pendiente', 'en_proceso', 'cancelada_por_novedad']
+        citas, dia = [], 0
+        while len(citas) < cantidad_citas:
+            fecha = hoy - timedelta(days=dia)
+            for manicurista in manicuristas:
+                for hora in aleatorio.sample(horas, 6):
+                    citas.append(Cita(
+                        cliente=aleatorio.choice(clientes), manicurista=manicurista, servicio=servicio,
+                        fecha_cita=fecha, hora_cita=hora, estado=aleatorio.choice(estados),
+                        precio_servicio=servicio.precio, precio_total=servicio.precio,
+                        duracion_estimada=60, duracion_total=60,
+                    ))
+            dia += 1
+        Cita.objects.bulk_create(citas[:cantidad_citas], batch_size=1000)
+
+        VentaServicio.objects.bulk_create([
+            VentaServicio(
+                cliente=cita.cliente, manicurista=cita.manicurista, servicio=servicio, total=cita.precio_total,
+                estado=aleatorio.choice(['pendiente', 'pagada', 'cancelada']),
+                fecha_venta=timezone.now() - timedelta(days=aleatorio.randint(0, dia)),
+            )
+            for cita in citas[:cantidad_citas:2]
+        ], batch_size=1000)
+
+        Novedad.objects.bulk_create([
+            Novedad(manicurista=manicurista, fecha=hoy - timedelta(days=d), estado='tardanza', hora_entrada=time(11, 0))
+            for manicurista in manicuristas for d in range(0, dia, 7)
+        ], batch_size=1000)
+
+        CodigoRecuperacion.objects.bulk_create([
+            CodigoRecuperacion(
+                correo_electronico=f'cliente{i % len(clientes)}@ejemplo.com', codigo=f'{i % 1000000:06d}',
+                usado=i % 3 == 0, expiracion=timezone.now() + timedelta(minutes=10)
+            )
+            for i in range(cantidad_citas // 4)
+        ], batch_size=1000)
+
+        # Estadísticas actualizadas para que el planificador elija índices. En MySQL
+        # ANALYZE TABLE hace commit implícito y dejaría los datos sembrados en la BD:
+        # InnoDB actualiza sus estadísticas por su cuenta al insertar
+        if connection.vendor in ('sqlite', 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
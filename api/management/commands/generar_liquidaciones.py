@@ -0,0 +1,45 @@
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from api.liquidaciones.models import Liquidacion
+
+
+class Command(BaseCommand):
+    help = 'Generar las liquidaciones de un período para todas las manicuristas activas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', required=True, help='Fecha inicial del período (YYYY-MM-DD)')
+        parser.add_argument('--hasta', required=True, help='Fecha final del período (YYYY-MM-DD)')
+        parser.add_argument('--bonificacion', default='0', help='Bonificación para cada liquidación')
+
+    def handle(self, *args, **options):
+        try:
+            desde = datetime.strptime(options['desde'], '%Y-%m-%d').date()
+            hasta = datetime.strptime(options['hasta'], '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError('Formato de fecha inválido. Use YYYY-MM-DD')
+
+        try:
+            bonificacion = Decimal(options['bonificacion']).quantize(Decimal('0.01'))
+        except InvalidOperation:
+            raise CommandError('Bonificación inválida')
+
+        try:
+            resumen = Liquidacion.generar_para_periodo(desde, hasta, bonificacion)
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+
+        for liquidacion in resumen['creadas']:
+            self.stdout.write(
+                f"  {liquidacion['manicurista']}: {liquidacion['cantidad_citas']} citas, valor {liquidacion['valor']:.2f}"
+            )
+        for liquidacion in resumen['omitidas']:
+            self.stdout.write(self.style.WARNING(
+                f"  {liquidacion['manicurista']}: ya tenía liquidación en el período"
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"Liquidaciones creadas: {resumen['cantidad_creadas']} "
+            f"(omitidas: {resumen['cantidad_omitidas']}, total: {resumen['total_valor']:.2f})"
+        ))
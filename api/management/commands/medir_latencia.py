@@ -0,0 +1,428 @@
+"""
+Benchmark de latencia de los flujos de reserva y cobro.
+
+Reproduce flujos con el cliente de pruebas de Django (pasa por todos los
+middlewares, la autenticación JWT y los permisos) desde N hilos concurrentes
+contra la base de datos configurada, y reporta por paso p50/p95/p99, peticiones
+por segundo y consultas SQL. No usa red: funciona con SQLite o con un MySQL
+local sembrados con seed_load.
+
+Flujos:
+- login: POST /api/auth/login/ con un usuario cliente
+- reserva: GET /api/citas/disponibilidad/ y POST /api/citas/ en un horario libre
+- cobro: POST /api/venta-servicios/ de una cita finalizada con sus servicios
+
+Las citas y ventas creadas durante la corrida (las de id mayor al último
+existente al empezar, incluidas las de respuestas fallidas o de otros clientes
+concurrentes) se eliminan al terminar (salvo --conservar). Con
+--salida los resultados se guardan en JSON y con --comparar se muestran las
+diferencias contra un JSON anterior (p. ej. el de otro commit):
+
+    python manage.py medir_latencia --hilos 8 --iteraciones 50 --salida antes.json
+    python manage.py medir_latencia --hilos 8 --iteraciones 50 --comparar antes.json
+
+SQLite serializa las escrituras: con varios hilos algunos POST pueden fallar
+con "database is locked" y se cuentan como errores del paso.
+"""
+import json
+import logging
+import math
+import os
+import random
+import re
+import subprocess
+import threading
+from collections import defaultdict
+from contextlib import nullcontext, redirect_stdout
+from datetime import timedelta
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max
+from django.test import Client
+from django.utils import timezone
+
+from api.authentication.tokens import tokens_para_usuario
+from api.citas.models import Cita
+from api.clientes.models import Cliente
+from api.manicuristas.models import Manicurista
+from api.servicios.models import Servicio
+from api.usuarios.models import Usuario
+from api.ventaservicios.models import VentaServicio
+
+from .seed_load import PASSWORD_CARGA
+
+
+FLUJOS = ('login', 'reserva', 'cobro')
+PERCENTILES = (50, 95, 99)
+# Muestra de datos existentes que usan los flujos
+LIMITE_MUESTRA = 2000
+
+
+def percentil(ordenados, p):
+    """Percentil por rango más cercano de una lista ordenada"""
+    if not ordenados:
+        return None
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _resumen_error(response):
+    """Mensaje corto de una respuesta de error (JSON de DRF o título de la página de debug)"""
+    contenido = response.content.decode(errors='replace')
+    titulo = re.search(r'<title>(.*?)</title>', contenido, re.S)
+    if titulo:
+        return ' '.join(titulo.group(1).split())
+    return contenido[:300]
+
+
+class Medicion:
+    """Una petición medida"""
+
+    __slots__ = ('paso', 'segundos', 'consultas', 'status', 'error')
+
+    def __init__(self, paso, segundos, consultas, status, error=None):
+        self.paso = paso
+        self.segundos = segundos
+        self.consultas = consultas
+        self.status = status
+        self.error = error
+
+
+class Sesion:
+    """Cliente de pruebas de un hilo: mide cada petición"""
+
+    def __init__(self, token, registrar):
+        # Los errores 500 se miden como respuestas en vez de propagarse como excepciones
+        self.client = Client(raise_request_exception=False)
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.registrar = registrar
+
+    def pedir(self, paso, metodo, ruta, datos=None, autenticado=True):
+        consultas = 0
+
+        def contar(execute, sql, params, many, context):
+            nonlocal consultas
+            consultas += 1
+            return execute(sql, params, many, context)
+
+        kwargs = {'headers': self.headers} if autenticado else {}
+        if metodo == 'post':
+            kwargs.update(data=json.dumps(datos), content_type='application/json')
+        elif datos:
+            kwargs['data'] = datos
+
+        inicio = perf_counter()
+        try:
+            with connection.execute_wrapper(contar):
+                response = getattr(self.client, metodo)(ruta, **kwargs)
+        except Exception as e:
+            self.registrar(Medicion(paso, perf_counter() - inicio, consultas, 500, f'{type(e).__name__}: {e}'))
+            return None
+        segundos = perf_counter() - inicio
+        error = f'{response.status_code}: {_resumen_error(response)}' if response.status_code >= 400 else None
+        self.registrar(Medicion(paso, segundos, consultas, response.status_code, error))
+        return response
+
+
+class Command(BaseCommand):
+    help = (
+        'Medir la latencia (p50/p95/p99), el throughput y las consultas SQL de login, reserva de citas y '
+        'cobro con hilos concurrentes sobre la base de datos sembrada'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=4, help='Hilos concurrentes (default: 4)')
+        parser.add_argument('--iteraciones', type=int, default=20, help='Iteraciones de cada flujo por hilo (default: 20)')
+        parser.add_argument('--calentamiento', type=int, default=2, help='Iteraciones por hilo no medidas (default: 2)')
+        parser.add_argument(
+            '--flujos', default=','.join(FLUJOS), help=f'Flujos a ejecutar separados por coma ({", ".join(FLUJOS)})'
+        )
+        parser.add_argument('--usuario', help='Correo del administrador para reserva y cobro (default: el primero)')
+        parser.add_argument(
+            '--password', default=PASSWORD_CARGA, help='Contraseña de los clientes para el login (la de seed_load)'
+        )
+        parser.add_argument('--dias', type=int, default=14, help='Días hacia adelante para reservar (default: 14)')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador aleatorio (default: 42)')
+        parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+        parser.add_argument('--comparar', help='JSON de una ejecución anterior para mostrar las diferencias')
+        parser.add_argument('--conservar', action='store_true', help='No eliminar las citas y ventas creadas')
+        parser.add_argument('--mostrar-logs', action='store_true', help='No silenciar los print() y logs de las vistas')
+
+    def handle(self, *args, **options):
+        flujos = [flujo.strip() for flujo in options['flujos'].split(',') if flujo.strip()]
+        desconocidos = set(flujos) - set(FLUJOS)
+        if desconocidos:
+            raise CommandError(f'Flujos desconocidos: {", ".join(sorted(desconocidos))}. Opciones: {", ".join(FLUJOS)}')
+        if options['hilos'] < 1 or options['iteraciones'] < 1:
+            raise CommandError('--hilos e --iteraciones deben ser al menos 1')
+        anterior = None
+        if options['comparar']:
+            try:
+                with open(options['comparar'], encoding='utf-8') as archivo:
+                    anterior = json.load(archivo)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'No se pudo leer {options["comparar"]}: {e}')
+
+        self.options = options
+        self.cargar_datos(flujos)
+        token = str(tokens_para_usuario(self.administrador).access_token)
+
+        self.stdout.write(
+            f'{options["hilos"]} hilos x {options["iteraciones"]} iteraciones de {", ".join(flujos)} '
+            f'sobre {connection.vendor}...'
+        )
+        # Lo creado después de estos ids es del benchmark, aunque la respuesta haya fallado
+        ultimos = self.ultimos_ids()
+        mediciones = []
+        lock = threading.Lock()
+        errores_hilos = []
+
+        def registrar_en(destino):
+            def registrar(medicion):
+                with lock:
+                    destino.append(medicion)
+            return registrar
+
+        barrera = threading.Barrier(options['hilos'])
+
+        def trabajador(numero):
+            rng = random.Random(options['semilla'] + numero)
+            try:
+                calentamiento = Sesion(token, lambda medicion: None)
+                for _ in range(options['calentamiento']):
+                    self.ejecutar_iteracion(calentamiento, flujos, rng)
+                sesion = Sesion(token, registrar_en(mediciones))
+                barrera.wait()
+                for _ in range(options['iteraciones']):
+                    self.ejecutar_iteracion(sesion, flujos, rng)
+            except Exception as e:
+                with lock:
+                    errores_hilos.append(f'{type(e).__name__}: {e}')
+                barrera.abort()
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=trabajador, args=(i,)) for i in range(options['hilos'])]
+        # Los print() de las vistas y el log de django.request (400/500) ensucian el reporte y cuestan tiempo
+        logger = logging.getLogger('django.request')
+        nivel = logger.level
+        if not options['mostrar_logs']:
+            logger.setLevel(logging.CRITICAL)
+        try:
+            with open(os.devnull, 'w') as nulo, nullcontext() if options['mostrar_logs'] else redirect_stdout(nulo):
+                inicio = perf_counter()
+                for hilo in hilos:
+                    hilo.start()
+                for hilo in hilos:
+                    hilo.join()
+                duracion = perf_counter() - inicio
+        finally:
+            logger.setLevel(nivel)
+
+        if not options['conservar']:
+            self.limpiar(ultimos)
+        if errores_hilos:
+            raise CommandError(f'Falló la ejecución de un hilo: {errores_hilos[0]}')
+
+        resultado = self.resumir(mediciones, duracion, flujos)
+        self.mostrar(resultado, anterior)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+            self.stdout.write(f'Resultados guardados en {options["salida"]}')
+
+    def cargar_datos(self, flujos):
+        """Muestra de usuarios, manicuristas, clientes, servicios y citas finalizadas que usan los flujos"""
+        usuarios = Usuario.objects.select_related('rol').filter(is_active=True)
+        if self.options['usuario']:
+            self.administrador = usuarios.filter(correo_electronico=self.options['usuario']).first()
+        else:
+            self.administrador = usuarios.filter(rol__nombre__iexact='administrador').order_by('id').first()
+        if self.administrador is None:
+            raise CommandError('No hay un administrador activo. Indique uno con --usuario')
+
+        self.correos_login = list(
+            usuarios.filter(rol__nombre__iexact='cliente').order_by('id')
+            .values_list('correo_electronico', flat=True)[:LIMITE_MUESTRA]
+        )
+        self.manicuristas = list(
+            Manicurista.objects.filter(estado='activo').order_by('id').values_list('id', flat=True)[:LIMITE_MUESTRA]
+        )
+        self.clientes = list(Cliente.objects.filter(estado=True).order_by('id').values_list('id', flat=True)[:LIMITE_MUESTRA])
+        self.servicios = list(Servicio.objects.filter(estado='activo').values('id', 'precio', 'duracion'))
+
+        citas = list(
+            Cita.objects.filter(estado='finalizada').order_by('-fecha_cita', '-id')
+            .values('id', 'cliente_id', 'manicurista_id')[:LIMITE_MUESTRA]
+        )
+        precios = {servicio['id']: servicio['precio'] for servicio in Servicio.objects.values('id', 'precio')}
+        servicios_por_cita = defaultdict(list)
+        for cita_id, servicio_id in Cita.servicios.through.objects.filter(
+            cita_id__in=[cita['id'] for cita in citas]
+        ).values_list('cita_id', 'servicio_id'):
+            servicios_por_cita[cita_id].append(servicio_id)
+        self.citas_finalizadas = [
+            dict(cita, servicios=[(servicio_id, precios[servicio_id]) for servicio_id in servicios_por_cita[cita['id']]])
+            for cita in citas if servicios_por_cita[cita['id']]
+        ]
+
+        faltantes = []
+        if 'login' in flujos and not self.correos_login:
+            faltantes.append('usuarios cliente')
+        if 'reserva' in flujos and not (self.manicuristas and self.clientes and self.servicios):
+            faltantes.append('manicuristas, clientes y servicios activos')
+        if 'cobro' in flujos and not self.citas_finalizadas:
+            faltantes.append('citas finalizadas')
+        if faltantes:
+            raise CommandError(f'Faltan datos ({"; ".join(faltantes)}). Ejecute primero seed_load')
+
+    # --- Flujos ---
+
+    def ejecutar_iteracion(self, sesion, flujos, rng):
+        for flujo in flujos:
+            getattr(self, f'flujo_{flujo}')(sesion, rng)
+
+    def flujo_login(self, sesion, rng):
+        sesion.pedir('login', 'post', '/api/auth/login/', {
+            'correo_electronico': rng.choice(self.correos_login),
+            'contraseña': self.options['password'],
+        }, autenticado=False)
+
+    def flujo_reserva(self, sesion, rng):
+        manicurista_id = rng.choice(self.manicuristas)
+        fecha = timezone.localdate() + timedelta(days=rng.randint(1, max(self.options['dias'], 1)))
+        response = sesion.pedir('disponibilidad', 'get', '/api/citas/disponibilidad/', {
+            'manicurista': manicurista_id, 'fecha': fecha.isoformat(),
+        })
+        if response is None or response.status_code != 200:
+            return
+        horarios = response.json()['horarios_disponibles']
+        if not horarios:
+            return
+        servicios = rng.sample(self.servicios, min(rng.choice((1, 1, 2)), len(self.servicios)))
+        sesion.pedir('crear_cita', 'post', '/api/citas/', {
+            'cliente': rng.choice(self.clientes),
+            'manicurista': manicurista_id,
+            'servicios': [servicio['id'] for servicio in servicios],
+            'fecha_cita': fecha.isoformat(),
+            'hora_cita': rng.choice(horarios),
+        })
+
+    def flujo_cobro(self, sesion, rng):
+        cita = rng.choice(self.citas_finalizadas)
+        sesion.pedir('crear_venta', 'post', '/api/venta-servicios/', {
+            'cliente': cita['cliente_id'],
+            'manicurista': cita['manicurista_id'],
+            'citas': [cita['id']],
+            'estado': 'pagada',
+            'metodo_pago': rng.choice(('efectivo', 'transferencia')),
+            'detalles': [
+                {'servicio': servicio_id, 'cantidad': 1, 'precio_unitario': str(precio), 'subtotal': str(precio)}
+                for servicio_id, precio in cita['servicios']
+            ],
+        })
+
+    def ultimos_ids(self):
+        """(último id de Cita, último id de VentaServicio) antes de la corrida"""
+        return (
+            Cita.objects.aggregate(ultimo=Max('id'))['ultimo'] or 0,
+            VentaServicio.objects.aggregate(ultimo=Max('id'))['ultimo'] or 0,
+        )
+
+    def limpiar(self, ultimos):
+        ultima_cita, ultima_venta = ultimos
+        ventas = list(VentaServicio.objects.filter(id__gt=ultima_venta))
+        citas = list(Cita.objects.filter(id__gt=ultima_cita))
+        # delete() por objeto para que las señales actualicen resúmenes, producción e índices
+        for venta in ventas:
+            venta.delete()
+        for cita in citas:
+            cita.delete()
+        if ventas or citas:
+            self.stdout.write(f'Eliminadas {len(citas)} citas y {len(ventas)} ventas creadas por el benchmark')
+
+    # --- Resultados ---
+
+    def resumir(self, mediciones, duracion, flujos):
+        por_paso = defaultdict(list)
+        for medicion in mediciones:
+            por_paso[medicion.paso].append(medicion)
+
+        pasos = {}
+        for paso, lista in por_paso.items():
+            tiempos = sorted(medicion.segundos * 1000 for medicion in lista)
+            consultas = [medicion.consultas for medicion in lista]
+            estados = defaultdict(int)
+            for medicion in lista:
+                estados[str(medicion.status)] += 1
+            errores = [medicion.error for medicion in lista if medicion.error]
+            pasos[paso] = {
+                'peticiones': len(lista),
+                'errores': sum(1 for medicion in lista if medicion.status >= 500),
+                'estados': dict(sorted(estados.items())),
+                **{f'p{p}_ms': round(percentil(tiempos, p), 2) for p in PERCENTILES},
+                'media_ms': round(sum(tiempos) / len(tiempos), 2),
+                'max_ms': round(tiempos[-1], 2),
+                'peticiones_por_segundo': round(len(lista) / duracion, 2) if duracion else None,
+                'consultas_media': round(sum(consultas) / len(consultas), 2),
+                'consultas_max': max(consultas),
+                'primer_error': errores[0] if errores else None,
+            }
+
+        return {
+            'fecha': timezone.now().isoformat(),
+            'commit': _commit_actual(),
+            'motor': connection.vendor,
+            'hilos': self.options['hilos'],
+            'iteraciones': self.options['iteraciones'],
+            'flujos': flujos,
+            'duracion_s': round(duracion, 3),
+            'peticiones': len(mediciones),
+            'peticiones_por_segundo': round(len(mediciones) / duracion, 2) if duracion else None,
+            'pasos': pasos,
+        }
+
+    def mostrar(self, resultado, anterior=None):
+        pasos_anteriores = (anterior or {}).get('pasos', {})
+        self.stdout.write(
+            f'\n{"paso":<16}{"n":>6}{"err":>5}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"req/s":>9}{"SQL":>7}'
+        )
+        for paso, datos in resultado['pasos'].items():
+            self.stdout.write(
+                f'{paso:<16}{datos["peticiones"]:>6}{datos["errores"]:>5}{datos["p50_ms"]:>10}{datos["p95_ms"]:>10}'
+                f'{datos["p99_ms"]:>10}{datos["peticiones_por_segundo"]:>9}{datos["consultas_media"]:>7}'
+            )
+            if datos['primer_error']:
+                self.stdout.write(self.style.ERROR(f'  {datos["primer_error"]}'))
+            previo = pasos_anteriores.get(paso)
+            if previo:
+                self.stdout.write('  vs anterior: ' + ', '.join(
+                    self._diferencia(clave, previo.get(clave), datos[clave])
+                    for clave in ('p50_ms', 'p95_ms', 'p99_ms', 'consultas_media')
+                ))
+        self.stdout.write(self.style.SUCCESS(
+            f'\n{resultado["peticiones"]} peticiones en {resultado["duracion_s"]} s '
+            f'({resultado["peticiones_por_segundo"]} req/s)'
+        ))
+        if anterior:
+            self.stdout.write(f'Comparado con {anterior.get("commit") or "?"} del {anterior.get("fecha", "?")}')
+
+    def _diferencia(self, clave, antes, ahora):
+        if not antes:
+            return f'{clave} {ahora} (sin dato anterior)'
+        cambio = (ahora - antes) / antes * 100
+        texto = f'{clave} {antes} -> {ahora} ({cambio:+.1f}%)'
+        # Más de 10% peor se resalta
+        return self.style.WARNING(texto) if cambio > 10 else texto
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from api.roles.models import Permiso
+from api.authentication.rutas_permisos import ResolverPermisos
+
+
+class Command(BaseCommand):
+    help = 'Listar las rutas de la API sin permiso asignado o cuyo permiso no existe'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todas',
+            action='store_true',
+            help='Mostrar todas las rutas con el permiso que exige cada método',
+        )
+
+    def handle(self, *args, **options):
+        resolver = ResolverPermisos.desde_urlconf()
+
+        if options['todas']:
+            for _, ruta in resolver.rutas:
+                for metodo, permiso in sorted(ruta.metodos.items()):
+                    self.stdout.write(f'{metodo:7} {ruta.patron:55} {permiso or "-"}')
+            self.stdout.write('')
+
+        permisos_existentes = set(Permiso.objects.values_list('nombre', flat=True))
+        sin_cobertura = resolver.rutas_sin_cobertura(permisos_existentes)
+
+        if not sin_cobertura:
+            self.stdout.write(self.style.SUCCESS(
+                f'Todas las rutas están cubiertas ({len(resolver.rutas)} rutas)'
+            ))
+            return
+
+        for patron, metodo, permiso, motivo in sin_cobertura:
+            self.stdout.write(self.style.WARNING(
+                f'{metodo:7} {patron:55} {permiso or "-":35} {motivo}'
+            ))
+        self.stdout.write(self.style.WARNING(
+            f'{len(sin_cobertura)} combinaciones ruta/método sin cobertura'
+        ))
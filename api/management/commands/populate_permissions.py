@@ -24,6 +24,7 @@ class Command(BaseCommand):
             {'nombre': 'venta_servicios', 'descripcion': 'Gestión de venta de servicios'},
             {'nombre': 'liquidaciones', 'descripcion': 'Gestión de liquidaciones'},
             {'nombre': 'novedades', 'descripcion': 'Gestión de novedades'},
+            {'nombre': 'correos', 'descripcion': 'Estado de la bandeja de salida de correos'},
         ]
         
         for modulo_data in modulos_data:
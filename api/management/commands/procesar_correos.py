@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from api.correos.cola import procesar_lote, purgar_terminados
+
+
+class Command(BaseCommand):
+    help = 'Enviar los correos pendientes de la bandeja de salida'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=50, help='Máximo de correos por conexión SMTP')
+        parser.add_argument('--continuo', action='store_true', help='Seguir procesando en un ciclo')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos de espera cuando no hay correos')
+        parser.add_argument('--purgar-dias', type=int, default=7, help='Eliminar los enviados o fallidos hace más de N días')
+
+    def handle(self, *args, **options):
+        purgados = purgar_terminados(options['purgar_dias'])
+        if purgados:
+            self.stdout.write(f'Correos enviados o fallidos purgados: {purgados}')
+
+        while True:
+            resultado = procesar_lote(options['lote'])
+            if any(resultado.values()):
+                self.stdout.write(self.style.SUCCESS(
+                    f"Enviados: {resultado['enviados']}, reintentar: {resultado['reintentar']}, "
+                    f"fallidos: {resultado['fallidos']}"
+                ))
+
+            if not options['continuo']:
+                # Sin --continuo se vacía la cola una vez y se termina
+                if resultado['enviados'] + resultado['reintentar'] + resultado['fallidos'] < options['lote']:
+                    break
+                continue
+
+            if not any(resultado.values()):
+                time.sleep(options['intervalo'])
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from api.liquidaciones.models import ProduccionDiaria
+
+
+class Command(BaseCommand):
+    help = 'Reconstruir la producción diaria por manicurista a partir de las citas finalizadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Fecha inicial (YYYY-MM-DD). Por defecto, todo el histórico')
+        parser.add_argument('--hasta', help='Fecha final (YYYY-MM-DD). Por defecto, todo el histórico')
+
+    def handle(self, *args, **options):
+        try:
+            desde = datetime.strptime(options['desde'], '%Y-%m-%d').date() if options['desde'] else None
+            hasta = datetime.strptime(options['hasta'], '%Y-%m-%d').date() if options['hasta'] else None
+        except ValueError:
+            raise CommandError('Formato de fecha inválido. Use YYYY-MM-DD')
+
+        self.stdout.write('Reconstruyendo producción diaria...')
+        filas = ProduccionDiaria.reconstruir(desde, hasta)
+        self.stdout.write(self.style.SUCCESS(f'Producción diaria reconstruida: {filas} registros'))
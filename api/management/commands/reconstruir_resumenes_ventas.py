@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from api.ventaservicios.models import reconstruir_resumenes_ventas
+
+
+class Command(BaseCommand):
+    help = 'Reconstruir los resúmenes diarios de ventas (por manicurista, servicio y método de pago)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Fecha inicial (YYYY-MM-DD). Por defecto, todo el histórico')
+        parser.add_argument('--hasta', help='Fecha final (YYYY-MM-DD). Por defecto, todo el histórico')
+
+    def handle(self, *args, **options):
+        try:
+            desde = datetime.strptime(options['desde'], '%Y-%m-%d').date() if options['desde'] else None
+            hasta = datetime.strptime(options['hasta'], '%Y-%m-%d').date() if options['hasta'] else None
+        except ValueError:
+            raise CommandError('Formato de fecha inválido. Use YYYY-MM-DD')
+
+        self.stdout.write('Reconstruyendo resúmenes diarios de ventas...')
+        filas = reconstruir_resumenes_ventas(desde, hasta)
+        self.stdout.write(self.style.SUCCESS(f'Resúmenes de ventas reconstruidos: {filas} registros'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from api.busqueda.indice import ENTIDADES, reindexar
+
+
+class Command(BaseCommand):
+    help = 'Reconstruir el índice de búsqueda (clientes, manicuristas y servicios)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--entidad',
+            action='append',
+            help=f'Entidad a reindexar ({", ".join(ENTIDADES)}). Se puede repetir. Por defecto, todas'
+        )
+
+    def handle(self, *args, **options):
+        nombres = options['entidad'] or list(ENTIDADES)
+        desconocidas = [nombre for nombre in nombres if nombre not in ENTIDADES]
+        if desconocidas:
+            raise CommandError(f'Entidades no válidas: {", ".join(desconocidas)}')
+
+        for nombre in nombres:
+            with transaction.atomic():
+                total = reindexar(ENTIDADES[nombre])
+            self.stdout.write(self.style.SUCCESS(f'Índice de {nombre}: {total} términos'))
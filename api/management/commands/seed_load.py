@@ -0,0 +1,593 @@
+"""
+Datos sintéticos en volumen para reproducir localmente problemas de rendimiento.
+
+Genera clientes y manicuristas (con su usuario), servicios, citas con varios
+servicios, ventas con detalles, novedades, compras con su kardex y
+liquidaciones quincenales. Todo se inserta con bulk_create por lotes y con IDs
+asignados aquí (MySQL no devuelve los IDs de un INSERT masivo), la contraseña
+se hashea una sola vez y el generador aleatorio parte de una semilla, así que
+la misma semilla sobre la misma base produce los mismos datos.
+
+Las citas siguen la forma de la agenda real: más demanda los viernes y
+sábados, picos a media mañana y al final de la tarde, crecimiento del negocio
+a lo largo del período, ninguna manicurista con dos citas a la vez y sin citas
+en sus días de ausencia. Las pasadas quedan finalizadas o canceladas y las
+futuras pendientes.
+
+bulk_create no envía señales: al final se reconstruyen la producción diaria,
+los resúmenes de ventas y el índice de búsqueda (--sin-derivados lo omite).
+
+    python manage.py seed_load --citas 2000000 --manicuristas 600 --clientes 300000 --dias 730
+"""
+import math
+import random
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from time import perf_counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from api.base.cache_respuestas import invalidar_modelo
+from api.busqueda.indice import ENTIDADES, reindexar
+from api.categoriainsumos.models import CategoriaInsumo
+from api.citas.disponibilidad import HORA_FIN_CITAS, HORA_INICIO_CITAS, INTERVALO_MINUTOS
+from api.citas.models import Cita
+from api.clientes.models import Cliente
+from api.compras.models import Compra, DetalleCompra
+from api.insumos.models import Insumo, MovimientoInventario
+from api.liquidaciones.models import Liquidacion, ProduccionDiaria
+from api.manicuristas.models import Manicurista
+from api.novedades.models import Novedad
+from api.proveedores.models import Proveedor
+from api.roles.models import Rol
+from api.servicios.models import Servicio
+from api.usuarios.models import Usuario
+from api.ventaservicios.models import DetalleVentaServicio, VentaServicio, reconstruir_resumenes_ventas
+
+
+NOMBRES = [
+    'María', 'Ana', 'Laura', 'Valentina', 'Sofía', 'Camila', 'Daniela', 'Paula', 'Andrea', 'Carolina',
+    'Natalia', 'Juliana', 'Isabella', 'Mariana', 'Luisa', 'Gabriela', 'Catalina', 'Diana', 'Sara', 'Lucía',
+    'Carlos', 'Andrés', 'Juan', 'Felipe', 'Santiago', 'Sebastián', 'Diego', 'Luis', 'Jorge', 'Miguel',
+]
+APELLIDOS = [
+    'González', 'Rodríguez', 'Martínez', 'López', 'García', 'Pérez', 'Gómez', 'Díaz', 'Hernández', 'Ramírez',
+    'Torres', 'Moreno', 'Muñoz', 'Rojas', 'Vargas', 'Castro', 'Ortiz', 'Jiménez', 'Suárez', 'Herrera',
+    'Álvarez', 'Romero', 'Ríos', 'Peña', 'Cárdenas', 'Mejía', 'Restrepo', 'Ospina', 'Zapata', 'Quintero',
+]
+CIUDADES = ['Bogotá', 'Medellín', 'Cali', 'Barranquilla', 'Bucaramanga', 'Pereira', 'Manizales', 'Ibagué']
+
+# (nombre, precio, duración en minutos)
+SERVICIOS_BASE = [
+    ('Manicure tradicional', 25000, 45), ('Pedicure tradicional', 30000, 60), ('Manicure en gel', 45000, 60),
+    ('Pedicure en gel', 50000, 60), ('Uñas acrílicas', 90000, 120), ('Retiro de gel', 15000, 30),
+    ('Nail art (por uña)', 5000, 15), ('Spa de manos', 35000, 45), ('Spa de pies', 40000, 60),
+    ('Manicure francesa', 35000, 60), ('Polygel', 80000, 90), ('Esmaltado semipermanente', 40000, 45),
+    ('Parafina', 20000, 30), ('Uñas esculpidas', 110000, 120), ('Mantenimiento acrílico', 60000, 90),
+]
+INSUMOS_BASE = {
+    'Esmaltes': ['Esmalte rojo', 'Esmalte nude', 'Esmalte negro', 'Esmalte blanco', 'Top coat', 'Base coat'],
+    'Geles': ['Gel constructor', 'Gel color', 'Gel top', 'Primer', 'Polygel transparente'],
+    'Acrílicos': ['Polvo acrílico', 'Monómero', 'Tips', 'Moldes'],
+    'Herramientas': ['Limas 180/240', 'Pulidores', 'Palitos de naranjo', 'Cortaúñas', 'Fresas'],
+    'Desechables': ['Guantes', 'Toallas desechables', 'Algodón', 'Removedor', 'Papel aluminio'],
+    'Spa': ['Parafina', 'Exfoliante', 'Crema hidratante', 'Sales de baño', 'Aceite de cutícula'],
+}
+ESPECIALIDADES = [valor for valor, _ in Manicurista.ESPECIALIDADES_CHOICES]
+
+# Demanda relativa por día de la semana (lunes a domingo)
+PESO_DIA_SEMANA = (0.8, 0.9, 1.0, 1.1, 1.4, 1.6, 0.3)
+# Demanda relativa por hora de inicio
+PESO_HORA = {10: 0.7, 11: 1.2, 12: 1.0, 13: 0.6, 14: 0.8, 15: 1.0, 16: 1.3, 17: 1.4, 18: 1.1, 19: 0.6}
+# Probabilidad de que una cita tenga 1, 2 o 3 servicios
+SERVICIOS_POR_CITA = ((1, 0.6), (2, 0.3), (3, 0.1))
+PROBABILIDAD_AUSENCIA = 0.02
+PROBABILIDAD_TARDANZA = 0.03
+PROBABILIDAD_CANCELACION = 0.12
+# Contraseña por defecto de los usuarios generados (la usa medir_latencia para el login)
+PASSWORD_CARGA = 'Winespa123*'
+PORCENTAJE_COMISION = ProduccionDiaria.PORCENTAJE_COMISION * 100
+
+
+def _siguiente_id(modelo):
+    return (modelo.objects.aggregate(maximo=Max('pk'))['maximo'] or 0) + 1
+
+
+def _duracion_por_cita(duraciones):
+    """Minutos esperados de una cita según SERVICIOS_POR_CITA"""
+    servicios_por_cita = sum(cantidad * peso for cantidad, peso in SERVICIOS_POR_CITA)
+    return sum(duraciones) / len(duraciones) * servicios_por_cita
+
+
+@contextmanager
+def _fechas_explicitas(modelo, campos):
+    """Desactiva auto_now/auto_now_add de los campos para insertar fechas históricas"""
+    fields = [modelo._meta.get_field(campo) for campo in campos]
+    originales = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, originales):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Lotes:
+    """
+    Objetos pendientes de insertar por modelo. Al llegar a `tamano` se insertan
+    todos en el orden de `modelos` (primero los referenciados) en una transacción.
+    """
+
+    def __init__(self, modelos, tamano, fechas=None):
+        self.pendientes = {modelo: [] for modelo in modelos}
+        self.tamano = tamano
+        self.fechas = fechas or {}
+        self.cantidad = 0
+        self.totales = defaultdict(int)
+
+    def agregar(self, objeto):
+        self.pendientes[type(objeto)].append(objeto)
+        self.cantidad += 1
+        if self.cantidad >= self.tamano:
+            self.vaciar()
+
+    def vaciar(self):
+        with transaction.atomic():
+            for modelo, objetos in self.pendientes.items():
+                if not objetos:
+                    continue
+                with _fechas_explicitas(modelo, self.fechas.get(modelo, ())):
+                    modelo.objects.bulk_create(objetos, batch_size=self.tamano)
+                self.totales[modelo] += len(objetos)
+                objetos.clear()
+        self.cantidad = 0
+
+
+class Command(BaseCommand):
+    help = 'Generar datos sintéticos en volumen (clientes, citas, ventas, compras...) para pruebas de rendimiento'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=2000, help='Clientes a crear (default: 2000)')
+        parser.add_argument('--manicuristas', type=int, default=40, help='Manicuristas a crear (default: 40)')
+        parser.add_argument('--servicios', type=int, default=len(SERVICIOS_BASE), help='Servicios a crear')
+        parser.add_argument('--citas', type=int, default=30000, help='Citas aproximadas a crear (default: 30000)')
+        parser.add_argument('--dias', type=int, default=365, help='Días de historia hacia atrás (default: 365)')
+        parser.add_argument('--dias-futuros', type=int, default=14, help='Días de agenda futura (default: 14)')
+        parser.add_argument('--compras', type=int, default=300, help='Compras a crear (default: 300)')
+        parser.add_argument('--proveedores', type=int, default=15, help='Proveedores a crear (default: 15)')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador aleatorio (default: 42)')
+        parser.add_argument('--fecha', help='Fecha de referencia (hoy) YYYY-MM-DD. Por defecto, la fecha actual')
+        parser.add_argument('--lote', type=int, default=5000, help='Filas por INSERT (default: 5000)')
+        parser.add_argument('--password', default=PASSWORD_CARGA, help='Contraseña de los usuarios generados')
+        parser.add_argument(
+            '--sin-derivados', action='store_true',
+            help='No reconstruir producción diaria, resúmenes de ventas ni el índice de búsqueda'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            self.hoy = (
+                datetime.strptime(options['fecha'], '%Y-%m-%d').date() if options['fecha'] else timezone.localdate()
+            )
+        except ValueError:
+            raise CommandError('Formato de fecha inválido. Use YYYY-MM-DD')
+        for opcion in ('clientes', 'manicuristas', 'servicios'):
+            if options[opcion] < 1:
+                raise CommandError(f'--{opcion} debe ser al menos 1')
+
+        self.rng = random.Random(options['semilla'])
+        self.lote = options['lote']
+        self.inicio = self.hoy - timedelta(days=options['dias'])
+        self.fin = self.hoy + timedelta(days=options['dias_futuros'])
+        self.zona = timezone.get_current_timezone()
+        self.slots = int(
+            (datetime.combine(date.min, HORA_FIN_CITAS) - datetime.combine(date.min, HORA_INICIO_CITAS)).total_seconds()
+            // 60 // INTERVALO_MINUTOS
+        )
+        self._validar_capacidad(options)
+
+        inicio = perf_counter()
+        self.password = make_password(options['password'])
+        self.roles = {
+            nombre: Rol.objects.get_or_create(nombre=nombre, defaults={'estado': 'activo'})[0]
+            for nombre in ('Cliente', 'Manicurista')
+        }
+
+        self.stdout.write('Creando catálogo, manicuristas y clientes...')
+        lotes = Lotes([Usuario, Servicio, Manicurista, Cliente, CategoriaInsumo, Insumo, Proveedor], self.lote)
+        self.servicios = self._crear_servicios(lotes, options['servicios'])
+        self.manicuristas = self._crear_manicuristas(lotes, options['manicuristas'])
+        self.clientes = self._crear_clientes(lotes, options['clientes'])
+        self.insumos = self._crear_insumos(lotes)
+        self.proveedores = self._crear_proveedores(lotes, options['proveedores'])
+        lotes.vaciar()
+        totales = dict(lotes.totales)
+
+        self.stdout.write(f'Creando citas entre {self.inicio} y {self.fin}...')
+        lotes = Lotes(
+            [Cita, Cita.servicios.through, Novedad, VentaServicio, DetalleVentaServicio, VentaServicio.citas.through],
+            self.lote,
+            fechas={Cita: ('created_at', 'updated_at'), VentaServicio: ('created_at', 'updated_at')},
+        )
+        produccion = self._crear_agenda(lotes, options['citas'])
+        lotes.vaciar()
+        totales.update(lotes.totales)
+
+        self.stdout.write('Creando compras y liquidaciones...')
+        lotes = Lotes(
+            [Compra, DetalleCompra, MovimientoInventario, Liquidacion], self.lote,
+            fechas={Compra: ('fecha',), MovimientoInventario: ('fecha',)},
+        )
+        self._crear_compras(lotes, options['compras'])
+        self._crear_liquidaciones(lotes, produccion)
+        lotes.vaciar()
+        totales.update(lotes.totales)
+
+        modelos = list(totales)
+        self._reiniciar_secuencias(modelos)
+        for modelo in modelos:
+            invalidar_modelo(modelo)
+
+        if not options['sin_derivados']:
+            self.stdout.write('Reconstruyendo datos derivados...')
+            ProduccionDiaria.reconstruir(self.inicio, self.fin)
+            reconstruir_resumenes_ventas(self.inicio, self.fin)
+            for entidad in ENTIDADES.values():
+                reindexar(entidad, lote=self.lote)
+
+        for modelo, cantidad in totales.items():
+            self.stdout.write(f'  {modelo._meta.label}: {cantidad}')
+        self.stdout.write(self.style.SUCCESS(f'Datos generados en {perf_counter() - inicio:.1f} s'))
+
+    def _validar_capacidad(self, options):
+        dias = (self.fin - self.inicio).days + 1
+        duraciones = [SERVICIOS_BASE[i % len(SERVICIOS_BASE)][2] for i in range(options['servicios'])]
+        intervalos_por_cita = _duracion_por_cita(duraciones) / INTERVALO_MINUTOS
+        # Los domingos y los días de ausencia dejan huecos: la agenda no se llena más allá de ~75%
+        capacidad = dias * options['manicuristas'] * self.slots / intervalos_por_cita * 0.75
+        if options['citas'] > capacidad:
+            raise CommandError(
+                f'{options["citas"]} citas no caben en {dias} días con {options["manicuristas"]} manicuristas. '
+                'Aumente --manicuristas o --dias'
+            )
+
+    # --- Catálogo y personas ---
+
+    def _nombre(self):
+        return f'{self.rng.choice(NOMBRES)} {self.rng.choice(APELLIDOS)} {self.rng.choice(APELLIDOS)}'
+
+    def _celular(self):
+        return f'3{self.rng.randint(0, 299999999):09d}'
+
+    def _usuario(self, id_usuario, nombre, documento, correo, celular, rol):
+        return Usuario(
+            id=id_usuario, nombre=nombre, tipo_documento='CC', documento=documento, celular=celular,
+            correo_electronico=correo, rol=rol, password=self.password,
+        )
+
+    def _crear_servicios(self, lotes, cantidad):
+        servicios = []
+        id_servicio = _siguiente_id(Servicio)
+        for i in range(cantidad):
+            nombre, precio, duracion = SERVICIOS_BASE[i % len(SERVICIOS_BASE)]
+            if i >= len(SERVICIOS_BASE):
+                nombre = f'{nombre} {i // len(SERVICIOS_BASE) + 1}'
+            servicio = Servicio(
+                id=id_servicio + i, nombre=nombre, precio=Decimal(precio), duracion=duracion,
+                descripcion=f'{nombre} con productos profesionales',
+            )
+            lotes.agregar(servicio)
+            servicios.append(servicio)
+        return servicios
+
+    def _crear_manicuristas(self, lotes, cantidad):
+        manicuristas = []
+        id_manicurista = _siguiente_id(Manicurista)
+        id_usuario = _siguiente_id(Usuario)
+        for i in range(cantidad):
+            pk = id_manicurista + i
+            nombre = self._nombre()
+            documento = f'{2000000000 + pk}'
+            correo = f'manicurista{pk}@carga.winespa.local'
+            celular = self._celular()
+            usuario = self._usuario(id_usuario + i, nombre, documento, correo, celular, self.roles['Manicurista'])
+            lotes.agregar(usuario)
+            manicurista = Manicurista(
+                id=pk, nombre=nombre, tipo_documento='CC', numero_documento=documento, celular=celular,
+                correo=correo, direccion=f'Calle {self.rng.randint(1, 150)} # {self.rng.randint(1, 99)}-{self.rng.randint(1, 99)}',
+                especialidad=self.rng.choice(ESPECIALIDADES), usuario=usuario,
+                fecha_ingreso=self.inicio - timedelta(days=self.rng.randint(0, 1500)),
+            )
+            lotes.agregar(manicurista)
+            manicuristas.append(manicurista.pk)
+        return manicuristas
+
+    def _crear_clientes(self, lotes, cantidad):
+        clientes = []
+        id_cliente = _siguiente_id(Cliente)
+        id_usuario = _siguiente_id(Usuario) + len(self.manicuristas)
+        for i in range(cantidad):
+            pk = id_cliente + i
+            nombre = self._nombre()
+            documento = f'{1000000000 + pk}'
+            correo = f'cliente{pk}@carga.winespa.local'
+            celular = self._celular()
+            usuario = self._usuario(id_usuario + i, nombre, documento, correo, celular, self.roles['Cliente'])
+            lotes.agregar(usuario)
+            lotes.agregar(Cliente(
+                id=pk, tipo_documento='CC', documento=documento, nombre=nombre, celular=celular,
+                correo_electronico=correo, direccion=f'Carrera {self.rng.randint(1, 120)}, {self.rng.choice(CIUDADES)}',
+                genero='F' if self.rng.random() < 0.8 else 'M', usuario=usuario,
+            ))
+            clientes.append(pk)
+        return clientes
+
+    def _crear_insumos(self, lotes):
+        insumos = []
+        existentes = set(CategoriaInsumo.objects.values_list('nombre', flat=True))
+        id_categoria = _siguiente_id(CategoriaInsumo)
+        id_insumo = _siguiente_id(Insumo)
+        for nombre_categoria, nombres in INSUMOS_BASE.items():
+            if nombre_categoria in existentes:
+                nombre_categoria = f'{nombre_categoria} ({id_categoria})'
+            lotes.agregar(CategoriaInsumo(id=id_categoria, nombre=nombre_categoria))
+            for nombre in nombres:
+                insumo = Insumo(id=id_insumo, nombre=nombre, categoria_insumo_id=id_categoria)
+                # Precio de compra de referencia (no se guarda en Insumo)
+                insumo.precio_referencia = Decimal(self.rng.randrange(2000, 60000, 500))
+                lotes.agregar(insumo)
+                insumos.append(insumo)
+                id_insumo += 1
+            id_categoria += 1
+        return insumos
+
+    def _crear_proveedores(self, lotes, cantidad):
+        proveedores = []
+        id_proveedor = _siguiente_id(Proveedor)
+        for i in range(cantidad):
+            pk = id_proveedor + i
+            apellido = self.rng.choice(APELLIDOS)
+            lotes.agregar(Proveedor(
+                id=pk, tipo_persona='juridica', nombre_empresa=f'Distribuidora {apellido} {pk} SAS',
+                nit=f'900{pk:07d}', nombre=self._nombre(), direccion=f'Zona industrial {self.rng.choice(CIUDADES)}',
+                correo_electronico=f'ventas{pk}@proveedor.winespa.local', celular=self._celular(),
+            ))
+            proveedores.append(pk)
+        return proveedores
+
+    # --- Agenda ---
+
+    def _pesos_dias(self):
+        """[(fecha, peso)] del período: día de la semana, crecimiento del negocio y menos reservas a futuro"""
+        dias_pasados = max((self.hoy - self.inicio).days, 1)
+        dias_futuros = max((self.fin - self.hoy).days, 1)
+        pesos = []
+        fecha = self.inicio
+        while fecha <= self.fin:
+            peso = PESO_DIA_SEMANA[fecha.weekday()]
+            if fecha < self.hoy:
+                peso *= 0.6 + 0.4 * (fecha - self.inicio).days / dias_pasados
+            else:
+                peso *= max(0.1, 1 - (fecha - self.hoy).days / dias_futuros)
+            pesos.append((fecha, peso))
+            fecha += timedelta(days=1)
+        return pesos
+
+    def _elegir_servicios(self):
+        cantidad = self.rng.choices(
+            [cantidad for cantidad, _ in SERVICIOS_POR_CITA], [peso for _, peso in SERVICIOS_POR_CITA]
+        )[0]
+        return self.rng.sample(self.servicios, min(cantidad, len(self.servicios)))
+
+    def _fecha_hora(self, fecha, hora):
+        return timezone.make_aware(datetime.combine(fecha, hora), self.zona)
+
+    def _crear_agenda(self, lotes, total_citas):
+        """Citas, novedades y ventas día por día. Retorna {(manicurista, inicio de quincena): total finalizado}"""
+        pesos = self._pesos_dias()
+        suma_pesos = sum(peso for _, peso in pesos)
+        slots_por_cita = max(1, math.ceil(
+            _duracion_por_cita([servicio.duracion for servicio in self.servicios]) / INTERVALO_MINUTOS
+        ))
+        peso_slot = [
+            PESO_HORA.get(HORA_INICIO_CITAS.hour + (i * INTERVALO_MINUTOS) // 60, 1) for i in range(self.slots)
+        ]
+
+        id_cita = _siguiente_id(Cita)
+        id_venta = _siguiente_id(VentaServicio)
+        produccion = defaultdict(Decimal)
+        pendientes = 0.0
+        for numero, (fecha, peso) in enumerate(pesos):
+            # Lo que no cupo en un día se intenta en los siguientes
+            objetivo = total_citas * peso / suma_pesos + pendientes
+            ausentes, tardanzas = self._crear_novedades(lotes, fecha)
+            disponibles = [pk for pk in self.manicuristas if pk not in ausentes]
+            if not disponibles:
+                pendientes = objetivo
+                continue
+
+            # Probabilidad de reservar un intervalo libre para que cada manicurista atienda en promedio 'por_manicurista' citas
+            por_manicurista = objetivo / len(disponibles)
+            libre = self.slots - por_manicurista * (slots_por_cita - 1)
+            probabilidad = min(0.97, por_manicurista / libre) if libre > 0 else 0.97
+
+            creadas = 0
+            self.rng.shuffle(disponibles)
+            for manicurista_id in disponibles:
+                slot = tardanzas.get(manicurista_id, 0)
+                while slot < self.slots and creadas < objetivo:
+                    if self.rng.random() >= min(0.97, probabilidad * peso_slot[slot]):
+                        slot += 1
+                        continue
+                    servicios = self._elegir_servicios()
+                    duracion = sum(servicio.duracion for servicio in servicios)
+                    ocupa = math.ceil(duracion / INTERVALO_MINUTOS)
+                    if slot + ocupa > self.slots:
+                        servicios = servicios[:1]
+                        duracion = servicios[0].duracion
+                        ocupa = math.ceil(duracion / INTERVALO_MINUTOS)
+                        if slot + ocupa > self.slots:
+                            break
+                    cita = self._crear_cita(lotes, id_cita, manicurista_id, fecha, slot, servicios, duracion)
+                    if cita.estado == 'finalizada':
+                        self._crear_venta(lotes, id_venta, cita, servicios)
+                        quincena = fecha.replace(day=1 if fecha.day <= 15 else 16)
+                        produccion[(manicurista_id, quincena)] += cita.precio_total
+                        id_venta += 1
+                    id_cita += 1
+                    creadas += 1
+                    slot += ocupa
+            pendientes = max(0.0, objetivo - creadas)
+
+            if numero % 30 == 29:
+                self.stdout.write(f'  {fecha}: {lotes.totales[Cita] + len(lotes.pendientes[Cita])} citas')
+        return produccion
+
+    def _crear_novedades(self, lotes, fecha):
+        """Ausencias y tardanzas del día. Retorna (ausentes, {manicurista: primer intervalo libre})"""
+        ausentes = set()
+        tardanzas = {}
+        for manicurista_id in self.manicuristas:
+            azar = self.rng.random()
+            if azar < PROBABILIDAD_AUSENCIA:
+                ausentes.add(manicurista_id)
+                lotes.agregar(Novedad(
+                    manicurista_id=manicurista_id, fecha=fecha, estado='ausente', tipo_ausencia='completa',
+                    motivo='Cita médica' if self.rng.random() < 0.5 else 'Calamidad doméstica',
+                ))
+            elif azar < PROBABILIDAD_AUSENCIA + PROBABILIDAD_TARDANZA:
+                minutos = self.rng.randint(5, 55)
+                tardanzas[manicurista_id] = math.ceil(minutos / INTERVALO_MINUTOS)
+                lotes.agregar(Novedad(
+                    manicurista_id=manicurista_id, fecha=fecha, estado='tardanza',
+                    hora_entrada=time(HORA_INICIO_CITAS.hour, minutos), motivo='Transporte',
+                ))
+        return ausentes, tardanzas
+
+    def _crear_cita(self, lotes, id_cita, manicurista_id, fecha, slot, servicios, duracion):
+        minutos = HORA_INICIO_CITAS.hour * 60 + HORA_INICIO_CITAS.minute + slot * INTERVALO_MINUTOS
+        hora = time(minutos // 60, minutos % 60)
+        inicio = self._fecha_hora(fecha, hora)
+        # Las citas se reservan entre el mismo día y dos semanas antes
+        creada = inicio - timedelta(days=self.rng.randint(0, 14), minutes=self.rng.randint(0, 600))
+        # Clientes frecuentes: los primeros de la lista concentran más citas
+        cliente_id = self.clientes[int(len(self.clientes) * self.rng.random() ** 2)]
+
+        estado = 'pendiente'
+        fecha_finalizacion = None
+        motivo_cancelacion = None
+        if fecha < self.hoy:
+            if self.rng.random() < PROBABILIDAD_CANCELACION:
+                estado = 'cancelada'
+                motivo_cancelacion = 'Cancelada por el cliente'
+            else:
+                estado = 'finalizada'
+                fecha_finalizacion = inicio + timedelta(minutes=duracion)
+
+        principal = servicios[0]
+        cita = Cita(
+            id=id_cita, cliente_id=cliente_id, manicurista_id=manicurista_id, servicio=principal,
+            fecha_cita=fecha, hora_cita=hora, estado=estado, motivo_cancelacion=motivo_cancelacion,
+            precio_total=sum(servicio.precio for servicio in servicios), duracion_total=duracion,
+            precio_servicio=principal.precio, duracion_estimada=principal.duracion,
+            fecha_finalizacion=fecha_finalizacion, created_at=creada, updated_at=fecha_finalizacion or creada,
+        )
+        lotes.agregar(cita)
+        for servicio in servicios:
+            lotes.agregar(Cita.servicios.through(cita_id=id_cita, servicio_id=servicio.pk))
+        return cita
+
+    def _crear_venta(self, lotes, id_venta, cita, servicios):
+        pagada = self.rng.random() < 0.97
+        total = cita.precio_total
+        lotes.agregar(VentaServicio(
+            id=id_venta, cliente_id=cita.cliente_id, manicurista_id=cita.manicurista_id, servicio=servicios[0],
+            cita_id=cita.pk, precio_unitario=servicios[0].precio, total=total,
+            metodo_pago='efectivo' if self.rng.random() < 0.65 else 'transferencia',
+            estado='pagada' if pagada else 'pendiente', fecha_venta=cita.fecha_finalizacion,
+            fecha_pago=cita.fecha_finalizacion if pagada else None,
+            porcentaje_comision=PORCENTAJE_COMISION,
+            comision_manicurista=(total * PORCENTAJE_COMISION / 100).quantize(Decimal('0.01')),
+            created_at=cita.fecha_finalizacion, updated_at=cita.fecha_finalizacion,
+        ))
+        for servicio in servicios:
+            lotes.agregar(DetalleVentaServicio(
+                venta_id=id_venta, servicio_id=servicio.pk, cantidad=1, precio_unitario=servicio.precio,
+                subtotal=servicio.precio,
+            ))
+        lotes.agregar(VentaServicio.citas.through(ventaservicio_id=id_venta, cita_id=cita.pk))
+
+    # --- Compras y liquidaciones ---
+
+    def _crear_compras(self, lotes, cantidad):
+        """Compras repartidas en el período, con el kardex de las finalizadas"""
+        if not cantidad or not self.proveedores:
+            return
+        dias = max((self.hoy - self.inicio).days, 1)
+        segundos = sorted(self.rng.randrange(dias * 86400) for _ in range(cantidad))
+        saldos = {insumo.pk: 0 for insumo in self.insumos}
+        id_compra = _siguiente_id(Compra)
+        for i, segundo in enumerate(segundos):
+            pk = id_compra + i
+            fecha = self._fecha_hora(self.inicio, time(8)) + timedelta(seconds=segundo)
+            azar = self.rng.random()
+            estado = 'finalizada' if azar < 0.9 else 'pendiente' if azar < 0.95 else 'anulada'
+            compra = Compra(
+                id=pk, proveedor_id=self.rng.choice(self.proveedores), codigo_factura=f'FAC-{pk:06d}',
+                estado=estado, fecha=fecha,
+            )
+            detalles = []
+            for insumo in self.rng.sample(self.insumos, min(self.rng.randint(1, 6), len(self.insumos))):
+                precio = (insumo.precio_referencia * Decimal(self.rng.uniform(0.9, 1.1))).quantize(Decimal('0.01'))
+                detalles.append(DetalleCompra(
+                    compra_id=pk, insumo_id=insumo.pk, cantidad=self.rng.randint(5, 60), precio_unitario=precio,
+                ))
+            compra.asignar_totales(sum(detalle.subtotal for detalle in detalles))
+            lotes.agregar(compra)
+            for detalle in detalles:
+                lotes.agregar(detalle)
+                if estado == 'finalizada':
+                    saldos[detalle.insumo_id] += detalle.cantidad
+                    lotes.agregar(MovimientoInventario(
+                        insumo_id=detalle.insumo_id, tipo='compra', cantidad=detalle.cantidad,
+                        saldo=saldos[detalle.insumo_id], documento_id=pk, fecha=fecha,
+                    ))
+
+        for insumo in self.insumos:
+            insumo.cantidad = saldos[insumo.pk]
+        lotes.vaciar()
+        Insumo.objects.bulk_update(self.insumos, ['cantidad'], batch_size=self.lote)
+
+    def _crear_liquidaciones(self, lotes, produccion):
+        """Una liquidación por manicurista y quincena cerrada; la última queda pendiente"""
+        cerradas = []
+        for (manicurista_id, inicio), total in produccion.items():
+            if inicio.day == 1:
+                final = inicio.replace(day=15)
+            else:
+                final = (inicio.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+            if final < self.hoy:
+                cerradas.append((manicurista_id, inicio, final, total))
+        ultima = max((inicio for _, inicio, _, _ in cerradas), default=None)
+        for manicurista_id, inicio, final, total in sorted(cerradas):
+            lotes.agregar(Liquidacion(
+                manicurista_id=manicurista_id, fecha_inicio=inicio, fecha_final=final,
+                valor=(total * ProduccionDiaria.PORCENTAJE_COMISION).quantize(Decimal('0.01')),
+                estado='pendiente' if inicio == ultima else 'pagado',
+            ))
+
+    def _reiniciar_secuencias(self, modelos):
+        """Con IDs explícitos, PostgreSQL necesita mover sus secuencias (MySQL y SQLite lo hacen solos)"""
+        sentencias = connection.ops.sequence_reset_sql(no_style(), modelos)
+        if sentencias:
+            with connection.cursor() as cursor:
+                for sentencia in sentencias:
+                    cursor.execute(sentencia)
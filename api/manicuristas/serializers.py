@@ -1,11 +1,12 @@
 from rest_framework import serializers
+from api.base.serializers import CamposDinamicosMixin
 from .models import Manicurista
 from api.usuarios.models import Usuario
 from api.roles.models import Rol
 
-class ManicuristaSerializer(serializers.ModelSerializer):
+class ManicuristaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     contraseña_generada = serializers.CharField(read_only=True)  # Para mostrar la contraseña generada en la respuesta
-    usuario_id = serializers.IntegerField(read_only=True, source='usuario.id')  # Para mostrar el ID del usuario creado
+    usuario_id = serializers.IntegerField(read_only=True)  # Para mostrar el ID del usuario creado
     
     # AGREGADO: Campos de compatibilidad para el frontend
     nombres = serializers.CharField(read_only=True)
@@ -2,12 +2,13 @@ from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.db.models import Count, Sum
-from django.core.mail import send_mail
+from api.correos.cola import encolar_correo
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.db import transaction
 from django.contrib.auth import get_user_model
+from api.base.cache_respuestas import respuesta_en_cache
 from .models import Manicurista
 from .serializers import (
     ManicuristaSerializer, 
@@ -226,13 +227,11 @@ class ManicuristaViewSet(viewsets.ModelViewSet):
         Si tienes alguna pregunta, contacta al administrador.
         """
         
-        send_mail(
+        encolar_correo(
             asunto,
             mensaje_texto,
-            settings.DEFAULT_FROM_EMAIL,
             [manicurista.correo],
             html_message=mensaje_html,
-            fail_silently=False,
         )
     
     @action(detail=False, methods=['post'])
@@ -396,13 +395,11 @@ class ManicuristaViewSet(viewsets.ModelViewSet):
         Gracias por mantener tu información actualizada.
         """
         
-        send_mail(
+        encolar_correo(
             asunto,
             mensaje_texto,
-            settings.DEFAULT_FROM_EMAIL,
             [manicurista.correo],
             html_message=mensaje_html,
-            fail_silently=False,
         )
     
     @action(detail=True, methods=['post'])
@@ -522,16 +519,15 @@ class ManicuristaViewSet(viewsets.ModelViewSet):
         ¿Necesitas ayuda? Contacta al administrador.
         """
         
-        send_mail(
+        encolar_correo(
             asunto,
             mensaje_texto,
-            settings.DEFAULT_FROM_EMAIL,
             [manicurista.correo],
             html_message=mensaje_html,
-            fail_silently=False,
         )
     
     @action(detail=False, methods=['get'])
+    @respuesta_en_cache(Manicurista)
     def activos(self, request):
         """
         Devuelve solo los manicuristas activos.
@@ -541,6 +537,7 @@ class ManicuristaViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @respuesta_en_cache(Manicurista)
     def disponibles(self, request):
         """
         Devuelve solo los manicuristas disponibles.
@@ -593,25 +590,15 @@ class ManicuristaViewSet(viewsets.ModelViewSet):
         """
         manicurista = self.get_object()
         
-        # Esta implementación dependerá de cómo están relacionados los modelos
-        try:
-            from ventaservicios.models import VentaServicio
-            
-            # Total de servicios realizados
-            total_servicios = VentaServicio.objects.filter(manicurista=manicurista).count()
-            
-            # Total facturado
-            total_facturado = VentaServicio.objects.filter(manicurista=manicurista).aggregate(
-                total=Sum('total')
-            )['total'] or 0
-            
-            return Response({
-                'total_servicios': total_servicios,
-                'total_facturado': total_facturado,
-            })
-        except ImportError:
-            return Response({
-                'mensaje': 'Estadísticas no disponibles',
-                'total_servicios': 0,
-                'total_facturado': 0,
-            })
+        from api.ventaservicios.models import VentaDiariaManicurista
+
+        # Total de servicios realizados y total facturado desde el resumen diario de ventas
+        totales = VentaDiariaManicurista.objects.filter(manicurista=manicurista).aggregate(
+            total_servicios=Sum('cantidad'),
+            total_facturado=Sum('total')
+        )
+
+        return Response({
+            'total_servicios': totales['total_servicios'] or 0,
+            'total_facturado': totales['total_facturado'] or 0,
+        })
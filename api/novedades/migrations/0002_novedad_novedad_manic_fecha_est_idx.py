@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manicuristas', '0002_initial'),
+        ('novedades', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='novedad',
+            index=models.Index(fields=['manicurista', 'fecha', 'estado'], name='novedad_manic_fecha_est_idx'),
+        ),
+    ]
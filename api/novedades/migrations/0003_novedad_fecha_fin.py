@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 04:06
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def calcular_fecha_fin(apps, schema_editor):
+    Novedad = apps.get_model('novedades', 'Novedad')
+    vacaciones = list(Novedad.objects.filter(estado='vacaciones').only('id', 'fecha', 'dias'))
+    for novedad in vacaciones:
+        novedad.fecha_fin = novedad.fecha + timedelta(days=(novedad.dias or 1) - 1)
+    Novedad.objects.bulk_update(vacaciones, ['fecha_fin'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manicuristas', '0002_initial'),
+        ('novedades', '0002_novedad_novedad_manic_fecha_est_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='novedad',
+            name='fecha_fin',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(calcular_fecha_fin, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='novedad',
+            index=models.Index(fields=['manicurista', 'estado', 'fecha_fin'], name='novedad_manic_est_fin_idx'),
+        ),
+    ]
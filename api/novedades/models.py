@@ -30,6 +30,12 @@ class Novedad(models.Model):
     HORA_MIN_PERMITIDA = time(8, 0) # Para validaciones de entrada/salida
     HORA_MAX_PERMITIDA = time(22, 0) # Para validaciones de entrada/salida
 
+    # Horario efectivo de cada turno (ver TURNO_CHOICES)
+    HORARIO_TURNOS = {
+        'apertura': (time(10, 0), time(19, 0)),
+        'cierre': (time(11, 0), time(20, 0)),
+    }
+
     manicurista = models.ForeignKey('manicuristas.Manicurista', on_delete=models.CASCADE, related_name='novedades')
     fecha = models.DateField(default=timezone.localdate)
     estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='normal')
@@ -45,6 +51,8 @@ class Novedad(models.Model):
 
     # Para vacaciones
     dias = models.PositiveIntegerField(null=True, blank=True)
+    # Último día cubierto por las vacaciones (fecha + dias - 1), calculado al guardar; None en otras novedades
+    fecha_fin = models.DateField(null=True, blank=True, editable=False)
     
     # Campos para estado 'ausente'
     tipo_ausencia = models.CharField(max_length=20, choices=TIPO_AUSENCIA_CHOICES, null=True, blank=True)
@@ -66,6 +74,11 @@ class Novedad(models.Model):
         verbose_name_plural = "Novedades"
         unique_together = [['manicurista', 'fecha']] # Una novedad por manicurista por día
         ordering = ['-fecha', 'manicurista__nombre'] # Corregido a 'manicurista__nombre'
+        indexes = [
+            models.Index(fields=['manicurista', 'fecha', 'estado'], name='novedad_manic_fecha_est_idx'),
+            # Vacaciones que siguen vigentes en una fecha (fecha_fin >= fecha)
+            models.Index(fields=['manicurista', 'estado', 'fecha_fin'], name='novedad_manic_est_fin_idx'),
+        ]
 
     def __str__(self):
         return f"Novedad de {self.manicurista.nombre} el {self.fecha} - Estado: {self.get_estado_display()}"
@@ -136,4 +149,13 @@ class Novedad(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean() # Ejecuta las validaciones definidas en clean()
+        self.fecha_fin = self.calcular_fecha_fin(self.fecha, self.estado, self.dias)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'fecha_fin'}
         super().save(*args, **kwargs)
+
+    @staticmethod
+    def calcular_fecha_fin(fecha, estado, dias):
+        if estado != 'vacaciones' or fecha is None:
+            return None
+        return fecha + timedelta(days=(dias or 1) - 1)
@@ -0,0 +1,171 @@
+"""
+Planificador de la programación automática de turnos.
+
+Calcula en memoria la rotación completa de varias semanas (turno de
+apertura/cierre por semana, domingos trabajados y descanso posterior) y la
+compara con las novedades que ya existen en el rango con una sola consulta.
+Solo se escribe la diferencia: un bulk_create para los días nuevos y un
+bulk_update para los días generados antes cuyo contenido cambió.
+
+Los días generados llevan en observaciones una marca fija (TURNO_OBSERVACIONES
+o DESCANSO_OBSERVACIONES). Los días con una novedad sin esa marca (registrada a
+mano, incluidos los turnos 'horario') nunca se sobrescriben; se reportan como
+conflictos.
+
+Lo usa NovedadViewSet.generar_programacion.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Novedad
+
+
+DESCANSO_OBSERVACIONES = "Descanso post domingo trabajado"
+TURNO_OBSERVACIONES = "Turno de programación automática"
+
+# Campos que define el planificador en cada día programado
+CAMPOS_PLAN = ('estado', 'turno', 'tipo_ausencia', 'observaciones')
+
+DiaPlan = namedtuple('DiaPlan', CAMPOS_PLAN)
+
+
+def inicio_programacion(fecha):
+    """Lunes desde el que se programa: el mismo día si es lunes, si no el siguiente"""
+    return fecha + timedelta(days=(7 - fecha.weekday()) % 7)
+
+
+def es_generada(novedad):
+    """True si la novedad la creó el planificador (y por tanto se puede reprogramar)"""
+    if novedad.estado == 'horario':
+        return novedad.observaciones == TURNO_OBSERVACIONES
+    return (
+        novedad.estado == 'ausente'
+        and novedad.tipo_ausencia == 'completa'
+        and novedad.observaciones == DESCANSO_OBSERVACIONES
+    )
+
+
+def planificar(manicurista_ids, fecha_inicio, semanas):
+    """
+    Rotación en memoria: {(manicurista_id, fecha): DiaPlan}.
+
+    - Cada semana la manicurista recibe un turno, alternando apertura/cierre
+      por semana y por posición.
+    - Las semanas pares trabaja el domingo con el mismo turno y descansa un día
+      entre el lunes y el miércoles de la semana siguiente.
+    - Si el descanso cae el lunes en que empieza su turno de la semana, el
+      descanso tiene prioridad y el turno se registra el día siguiente.
+    """
+    plan = {}
+    descansos = set()
+    for semana in range(semanas):
+        fecha_semana = fecha_inicio + timedelta(weeks=semana)
+        for i, manicurista_id in enumerate(manicurista_ids):
+            # Alternar turnos apertura/cierre por semana
+            turno = "apertura" if (semana + i) % 2 == 0 else "cierre"
+            dia_turno = fecha_semana
+            if (manicurista_id, dia_turno) in descansos:
+                dia_turno += timedelta(days=1)
+            plan[(manicurista_id, dia_turno)] = DiaPlan('horario', turno, None, TURNO_OBSERVACIONES)
+
+            # Reglas domingos
+            if semana % 2 == 0:  # Domingo sí
+                plan[(manicurista_id, fecha_semana + timedelta(days=6))] = DiaPlan('horario', turno, None, TURNO_OBSERVACIONES)
+                # Descanso entre lunes y miércoles de la siguiente semana
+                descanso = (manicurista_id, fecha_semana + timedelta(days=7 + (i % 3)))
+                descansos.add(descanso)
+                plan[descanso] = DiaPlan('ausente', None, 'completa', DESCANSO_OBSERVACIONES)
+    return plan
+
+
+class ResultadoProgramacion:
+    """Diferencia entre el plan y las novedades existentes"""
+
+    def __init__(self, fecha_inicio, fecha_fin):
+        self.fecha_inicio = fecha_inicio
+        self.fecha_fin = fecha_fin
+        self.crear = []        # Novedad sin guardar
+        self.actualizar = []   # Novedad existente con los campos del plan aplicados
+        self.sin_cambios = 0
+        self.conflictos = []   # Novedad existente registrada a mano
+
+    def resumen(self, nombres=None, detalle=False):
+        nombres = nombres or {}
+
+        def describir(novedad):
+            return {
+                'manicurista_id': novedad.manicurista_id,
+                'manicurista': nombres.get(novedad.manicurista_id),
+                'fecha': novedad.fecha.isoformat(),
+                'estado': novedad.estado,
+                'turno': novedad.turno,
+            }
+
+        datos = {
+            'fecha_inicio': self.fecha_inicio.isoformat(),
+            'fecha_fin': self.fecha_fin.isoformat(),
+            'cantidad_crear': len(self.crear),
+            'cantidad_actualizar': len(self.actualizar),
+            'cantidad_sin_cambios': self.sin_cambios,
+            'cantidad_conflictos': len(self.conflictos),
+            'conflictos': [describir(n) for n in self.conflictos],
+        }
+        if detalle:
+            datos['crear'] = [describir(n) for n in self.crear]
+            datos['actualizar'] = [describir(n) for n in self.actualizar]
+        return datos
+
+
+def comparar_plan(plan, fecha_inicio, fecha_fin):
+    """Compara el plan con las novedades del rango (una sola consulta)"""
+    resultado = ResultadoProgramacion(fecha_inicio, fecha_fin)
+    manicurista_ids = {manicurista_id for manicurista_id, _ in plan}
+
+    existentes = {
+        (n.manicurista_id, n.fecha): n
+        for n in Novedad.objects.filter(
+            manicurista_id__in=manicurista_ids,
+            fecha__range=(fecha_inicio, fecha_fin)
+        ).only('id', 'manicurista_id', 'fecha', *CAMPOS_PLAN)
+    }
+
+    for (manicurista_id, fecha), dia in sorted(plan.items(), key=lambda item: (item[0][1], item[0][0])):
+        existente = existentes.get((manicurista_id, fecha))
+        if existente is None:
+            resultado.crear.append(Novedad(manicurista_id=manicurista_id, fecha=fecha, **dia._asdict()))
+        elif not es_generada(existente):
+            resultado.conflictos.append(existente)
+        elif DiaPlan(*(getattr(existente, campo) for campo in CAMPOS_PLAN)) == dia:
+            resultado.sin_cambios += 1
+        else:
+            for campo, valor in dia._asdict().items():
+                setattr(existente, campo, valor)
+            resultado.actualizar.append(existente)
+    return resultado
+
+
+def generar_programacion(manicurista_ids, fecha_inicio, semanas, dry_run=False):
+    """
+    Planifica y, salvo en dry_run, aplica la diferencia en una transacción.
+    Las novedades se escriben en bloque: no pasan por Novedad.save()/full_clean(),
+    el planificador ya produce días válidos para sus estados.
+    """
+    # El descanso de la última semana par cae en la semana siguiente
+    fecha_fin = fecha_inicio + timedelta(weeks=semanas, days=2)
+    plan = planificar(manicurista_ids, fecha_inicio, semanas)
+
+    with transaction.atomic():
+        resultado = comparar_plan(plan, fecha_inicio, fecha_fin)
+        if not dry_run:
+            Novedad.objects.bulk_create(resultado.crear, batch_size=500)
+            if resultado.actualizar:
+                ahora = timezone.now()
+                for novedad in resultado.actualizar:
+                    novedad.fecha_actualizacion = ahora
+                Novedad.objects.bulk_update(
+                    resultado.actualizar, [*CAMPOS_PLAN, 'fecha_actualizacion'], batch_size=500
+                )
+    return resultado
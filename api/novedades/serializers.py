@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from api.base.serializers import CamposDinamicosMixin
 from api.novedades.models import Novedad
 from api.manicuristas.models import Manicurista
 from api.manicuristas.serializers import ManicuristaSerializer
@@ -143,7 +144,7 @@ class NovedadSerializer(serializers.ModelSerializer):
         return data
 
 
-class NovedadDetailSerializer(serializers.ModelSerializer):
+class NovedadDetailSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     manicurista = ManicuristaSerializer(read_only=True)
     mensaje_personalizado = serializers.SerializerMethodField()
     horario_base = serializers.SerializerMethodField()
@@ -213,11 +214,11 @@ class NovedadDetailSerializer(serializers.ModelSerializer):
     def get_citas_afectadas(self, obj):
         """Obtener información de citas afectadas por esta novedad"""
         try:
-            from api.citas.models import Cita
-            citas = Cita.objects.filter(
-                novedad_relacionada=obj
-            ).values('id', 'hora_cita', 'estado', 'cliente__nombre')
-            return list(citas)
+            # Usa las citas precargadas por el ViewSet (prefetch_related) si las hay
+            return [
+                {'id': cita.id, 'hora_cita': cita.hora_cita, 'estado': cita.estado, 'cliente__nombre': cita.cliente.nombre}
+                for cita in obj.citas_afectadas.all()
+            ]
         except Exception as e:
             print(f"Error al obtener citas afectadas: {e}")
             return []
@@ -2,17 +2,21 @@ from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.db import transaction, IntegrityError
-from django.db.models import Q
+from django.db.models import Q, F, Case, When, IntegerField, Prefetch
+from django.db.models.functions import ExtractHour, ExtractMinute
 from django.utils import timezone
 from datetime import datetime, timedelta, time
 from django.core.exceptions import ValidationError
 import traceback
 from .models import Novedad
+from . import programacion
 from .serializers import NovedadSerializer, NovedadDetailSerializer, NovedadUpdateEstadoSerializer
 from api.manicuristas.models import Manicurista
 from api.manicuristas.serializers import ManicuristaSerializer
 from api.citas.models import Cita # Importar el modelo Cita
-from django.core.mail import send_mail
+from api.citas.disponibilidad import AgendaManicurista, hora_a_minutos, minutos_a_hora
+from api.correos.cola import encolar_correos
+from api.authentication.permisos_cache import perfil_desde_request
 from django.conf import settings
 
 
@@ -22,10 +26,13 @@ class NovedadViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         queryset = Novedad.objects.select_related('manicurista').all()
-        user = self.request.user
+        # Perfil desde los claims del token; los tokens sin claims lo buscan en el usuario
+        tipo_usuario, perfil_id = perfil_desde_request(self.request)
+        if tipo_usuario is None and hasattr(self.request.user, "manicurista"):
+            tipo_usuario, perfil_id = 'manicurista', self.request.user.manicurista.pk
         
-        if hasattr(user, "manicurista"):
-            queryset = queryset.filter(manicurista=user.manicurista)
+        if tipo_usuario == 'manicurista' and perfil_id:
+            queryset = queryset.filter(manicurista_id=perfil_id)
         else:
             # Filtros solo si NO es manicurista (ej: admin)
             manicurista_id = self.request.query_params.get('manicurista')
@@ -61,6 +68,12 @@ class NovedadViewSet(viewsets.ModelViewSet):
             except ValueError:
                 pass
 
+        if self.action in ['retrieve', 'list']:
+            # NovedadDetailSerializer incluye las citas afectadas de cada novedad
+            queryset = queryset.prefetch_related(
+                Prefetch('citas_afectadas', queryset=Cita.objects.select_related('cliente'))
+            )
+
         return queryset.order_by('-fecha', 'manicurista__nombre') # Corregido a 'manicurista__nombre'
 
     def get_serializer_class(self):
@@ -223,97 +236,22 @@ class NovedadViewSet(viewsets.ModelViewSet):
             horario_base_inicio = Novedad.HORA_ENTRADA_BASE
             horario_base_fin = Novedad.HORA_SALIDA_BASE
 
-            # Lista para almacenar los slots ocupados
-            slots_ocupados = []
-
-            # 2. Obtener novedades activas para esa manicurista en esa fecha
-            novedades = Novedad.objects.filter(
-                manicurista_id=manicurista_id,
-                fecha=fecha,
-                estado__in=['ausente', 'tardanza']
+            # 2. Construir la ocupación del día (novedades + citas con su duración)
+            agenda = AgendaManicurista.cargar(
+                manicurista_id, fecha, inicio=horario_base_inicio, fin=horario_base_fin
             )
-            
-            for novedad in novedades:
-                if novedad.estado == 'ausente':
-                    if novedad.tipo_ausencia == 'completa':
-                        # Ausencia completa: ocupa todo el horario base
-                        slots_ocupados.append({
-                            'inicio': horario_base_inicio,
-                            'fin': horario_base_fin,
-                            'motivo': f"Ausencia completa: {novedad.observaciones or 'Sin motivo'}" # Usar observaciones
-                        })
-                    elif novedad.tipo_ausencia == 'por_horas':
-                        # Ausencia por horas
-                        slots_ocupados.append({
-                            'inicio': novedad.hora_inicio_ausencia,
-                            'fin': novedad.hora_fin_ausencia,
-                            'motivo': f"Ausencia por horas: {novedad.observaciones or 'Sin motivo'}" # Usar observaciones
-                        })
-                elif novedad.estado == 'tardanza':
-                    # Tardanza: ocupa desde el inicio del horario base hasta la hora de llegada
-                    slots_ocupados.append({
-                        'inicio': horario_base_inicio,
-                        'fin': novedad.hora_entrada,
-                        'motivo': f"Tardanza: llega a las {novedad.hora_entrada.strftime('%H:%M')}"
-                    })
-            
-            # 3. Obtener citas existentes para esa manicurista en esa fecha
-            citas = Cita.objects.filter(
-                manicurista_id=manicurista_id,
-                fecha_cita=fecha,
-                estado__in=['pendiente', 'en_proceso'] # Citas que ocupan tiempo
-            )
-            
-            for cita in citas:
-                # Usar duracion_total del modelo Cita
-                duracion_cita_minutos = cita.duracion_total
-                
-                cita_inicio_dt = datetime.combine(fecha, cita.hora_cita)
-                cita_fin_dt = cita_inicio_dt + timedelta(minutes=duracion_cita_minutos)
-                
-                slots_ocupados.append({
-                    'inicio': cita_inicio_dt.time(),
-                    'fin': cita_fin_dt.time(),
-                    'motivo': f"Cita agendada con {cita.cliente.nombre if hasattr(cita, 'cliente') else 'Cliente'}"
-                })
 
-            # 4. Generar todos los slots de 30 minutos en el horario base
-            intervalo_minutos = 30
+            # 3. Evaluar cada slot de 30 minutos contra los intervalos ocupados
             horarios_disponibles_response = []
-            
-            current_time = datetime.combine(fecha, horario_base_inicio)
-            end_time = datetime.combine(fecha, horario_base_fin)
-
-            while current_time < end_time:
-                slot_inicio = current_time.time()
-                slot_fin = (current_time + timedelta(minutes=intervalo_minutos)).time()
-                
-                is_available = True
-                motivo_ocupado = None
-
-                # Verificar si este slot se solapa con algún slot ocupado
-                for ocupado in slots_ocupados:
-                    ocupado_inicio_dt = datetime.combine(fecha, ocupado['inicio'])
-                    ocupado_fin_dt = datetime.combine(fecha, ocupado['fin'])
-                    
-                    slot_inicio_dt = datetime.combine(fecha, slot_inicio)
-                    slot_fin_dt = datetime.combine(fecha, slot_fin)
-
-                    # Comprobar solapamiento
-                    if (slot_inicio_dt < ocupado_fin_dt and slot_fin_dt > ocupado_inicio_dt):
-                        is_available = False
-                        motivo_ocupado = ocupado['motivo']
-                        break
-                
+            for inicio, fin, bloqueo_novedad, bloqueo_cita in agenda.slots(30):
+                bloqueo = bloqueo_novedad or bloqueo_cita
                 horarios_disponibles_response.append({
-                    'slot': f"{slot_inicio.strftime('%H:%M')}-{slot_fin.strftime('%H:%M')}",
-                    'inicio': slot_inicio.strftime('%H:%M'),
-                    'fin': slot_fin.strftime('%H:%M'),
-                    'disponible': is_available,
-                    'motivo_ocupado': motivo_ocupado
+                    'slot': f"{minutos_a_hora(inicio)}-{minutos_a_hora(fin)}",
+                    'inicio': minutos_a_hora(inicio),
+                    'fin': minutos_a_hora(fin),
+                    'disponible': bloqueo is None,
+                    'motivo_ocupado': bloqueo.motivo if bloqueo else None
                 })
-                
-                current_time += timedelta(minutes=intervalo_minutos)
             
             return Response({
                 'fecha': fecha_str,
@@ -362,115 +300,142 @@ class NovedadViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     def _manejar_citas_afectadas(self, novedad):
-        """Manejar citas afectadas por la novedad"""
+        """
+        Cancela en un solo UPDATE las citas activas que caen en el horario afectado
+        por la novedad y encola las notificaciones a los clientes en un lote.
+        """
         try:
-            # Buscar citas activas para esa manicurista en esa fecha
-            citas_afectadas = Cita.objects.filter(
-                manicurista=novedad.manicurista,
-                fecha_cita=novedad.fecha,
-                estado__in=['pendiente', 'en_proceso'] # Solo citas pendientes o en proceso
-            )
+            with transaction.atomic():
+                citas = list(
+                    self._citas_en_horario_afectado(novedad).select_for_update().values(
+                        'id', 'hora_cita', 'cliente__nombre', 'cliente__correo_electronico'
+                    )
+                )
+                if not citas:
+                    return 0
+
+                Cita.objects.filter(
+                    id__in=[cita['id'] for cita in citas],
+                    estado__in=['pendiente', 'en_proceso']
+                ).update(
+                    estado='cancelada_por_novedad',
+                    motivo_cancelacion=f"Novedad de manicurista: {novedad.get_estado_display()} - {novedad.observaciones or 'Sin motivo'}",
+                    novedad_relacionada=novedad,
+                    updated_at=timezone.now()
+                )
+
+                # Se encolan al confirmar la transacción para no avisar de cancelaciones revertidas
+                transaction.on_commit(lambda: self._notificar_clientes_cancelacion(citas, novedad))
+            return len(citas)
 
-            for cita in citas_afectadas:
-                # Verificar si la cita está en el horario afectado
-                if self._cita_en_horario_afectado(cita, novedad):
-                    # Cancelar la cita
-                    cita.estado = 'cancelada_por_novedad'
-                    cita.motivo_cancelacion = f"Novedad de manicurista: {novedad.get_estado_display()} - {novedad.observaciones or 'Sin motivo'}"
-                    cita.novedad_relacionada = novedad
-                    cita.save()
-
-                    # Enviar notificación al cliente
-                    self._notificar_cliente_cancelacion(cita, novedad)
-                    
         except Exception as e:
             print(f"Error manejando citas afectadas: {e}")
+            return 0
 
-    def _cita_en_horario_afectado(self, cita, novedad):
-        """Verificar si una cita está en el horario afectado por la novedad"""
-        # Convertir horas a objetos datetime para comparación precisa
-        fecha_cita_dt = datetime.combine(cita.fecha_cita, time(0,0)) # Usar la fecha de la cita para combinar
-        
-        cita_inicio_dt = datetime.combine(fecha_cita_dt, cita.hora_cita)
-        # Usar duracion_total del modelo Cita
-        duracion_cita_minutos = cita.duracion_total
-        cita_fin_dt = cita_inicio_dt + timedelta(minutes=duracion_cita_minutos)
+    def _citas_en_horario_afectado(self, novedad):
+        """
+        Citas activas de la manicurista en la fecha de la novedad que se solapan con
+        el horario afectado. El solapamiento se evalúa en SQL con minutos del día:
+        inicio = hora*60 + minuto y fin = inicio + duración de la cita.
+        """
+        citas = Cita.objects.filter(
+            manicurista_id=novedad.manicurista_id,
+            fecha_cita=novedad.fecha,
+            estado__in=['pendiente', 'en_proceso'] # Solo citas pendientes o en proceso
+        )
 
         if novedad.estado == 'ausente':
             if novedad.tipo_ausencia == 'completa':
-                return True  # Toda la jornada afectada
-            elif novedad.tipo_ausencia == 'por_horas':
-                novedad_inicio_dt = datetime.combine(fecha_cita_dt, novedad.hora_inicio_ausencia)
-                novedad_fin_dt = datetime.combine(fecha_cita_dt, novedad.hora_fin_ausencia)
+                return citas  # Toda la jornada afectada
+            if novedad.tipo_ausencia == 'por_horas':
+                inicio = hora_a_minutos(novedad.hora_inicio_ausencia)
+                fin = hora_a_minutos(novedad.hora_fin_ausencia)
                 # Comprobar solapamiento: (A_inicio < B_fin) and (A_fin > B_inicio)
-                return (cita_inicio_dt < novedad_fin_dt and cita_fin_dt > novedad_inicio_dt)
-        
+                return citas.annotate(
+                    inicio_minutos=ExtractHour('hora_cita') * 60 + ExtractMinute('hora_cita'),
+                    duracion_minutos=Case(
+                        When(duracion_total__gt=0, then=F('duracion_total')),
+                        default=F('duracion_estimada'),
+                        output_field=IntegerField()
+                    )
+                ).filter(
+                    inicio_minutos__lt=fin,
+                    inicio_minutos__gt=inicio - F('duracion_minutos')
+                )
+
         elif novedad.estado == 'tardanza':
-            novedad_llegada_dt = datetime.combine(fecha_cita_dt, novedad.hora_entrada)
-            # Si la cita se solapa con el periodo de tardanza (es decir, la cita empieza antes de la llegada)
-            return cita_inicio_dt < novedad_llegada_dt
-        
-        return False
+            # Si la cita empieza antes de la llegada de la manicurista
+            return citas.filter(hora_cita__lt=novedad.hora_entrada)
+
+        return citas.none()
 
     def _reactivar_citas_canceladas(self, novedad):
-        """Reactivar citas que fueron canceladas por esta novedad"""
+        """Reactivar en un solo UPDATE las citas que fueron canceladas por esta novedad"""
         try:
-            citas_canceladas = Cita.objects.filter(
-                novedad_relacionada=novedad,
-                estado='cancelada_por_novedad'
-            )
-            
-            for cita in citas_canceladas:
-                cita.estado = 'pendiente' # O el estado original que tenía antes de la cancelación
-                cita.motivo_cancelacion = None
-                cita.novedad_relacionada = None
-                cita.save()
-                
-                # Notificar al cliente que su cita fue reactivada
-                self._notificar_cliente_reactivacion(cita)
-                
+            with transaction.atomic():
+                citas = list(
+                    Cita.objects.filter(
+                        novedad_relacionada=novedad,
+                        estado='cancelada_por_novedad'
+                    ).select_for_update().values(
+                        'id', 'fecha_cita', 'hora_cita', 'cliente__nombre', 'cliente__correo_electronico'
+                    )
+                )
+                if not citas:
+                    return 0
+
+                Cita.objects.filter(id__in=[cita['id'] for cita in citas]).update(
+                    estado='pendiente', # O el estado original que tenía antes de la cancelación
+                    motivo_cancelacion=None,
+                    novedad_relacionada=None,
+                    updated_at=timezone.now()
+                )
+
+                # Notificar a los clientes que sus citas fueron reactivadas
+                transaction.on_commit(lambda: self._notificar_clientes_reactivacion(citas, novedad))
+            return len(citas)
+
         except Exception as e:
             print(f"Error reactivando citas: {e}")
+            return 0
 
-    def _notificar_cliente_cancelacion(self, cita, novedad):
-        """Notificar al cliente sobre la cancelación de su cita"""
+    def _notificar_clientes_cancelacion(self, citas, novedad):
+        """Encolar en un lote los avisos de cancelación a los clientes"""
         try:
-            # Asegúrate de que cita.cliente y cita.cliente.email existan
-            if hasattr(cita, 'cliente') and cita.cliente and hasattr(cita.cliente, 'email') and cita.cliente.email:
-                send_mail(
-                    subject='Cancelación de tu cita en Spa',
-                    message=f"Hola {cita.cliente.nombre},\n\n"
-                            f"Lamentamos informarte que tu cita con {novedad.manicurista.nombre} " # Usar .nombre
-                            f"el {novedad.fecha.strftime('%d/%m/%Y')} a las {cita.hora_cita.strftime('%H:%M')} "
-                            f"ha sido cancelada debido a una novedad de la manicurista.\n\n"
-                            f"Motivo: {novedad.get_estado_display()} - {novedad.observaciones or 'Sin motivo'}\n\n"
-                            f"Te invitamos a agendar una nueva cita desde nuestra plataforma.\n\n"
-                            f"Gracias por tu comprensión.",
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[cita.cliente.email],
-                    fail_silently=True
-                )
+            encolar_correos([
+                {
+                    'asunto': 'Cancelación de tu cita en Spa',
+                    'mensaje': f"Hola {cita['cliente__nombre']},\n\n"
+                               f"Lamentamos informarte que tu cita con {novedad.manicurista.nombre} "
+                               f"el {novedad.fecha.strftime('%d/%m/%Y')} a las {cita['hora_cita'].strftime('%H:%M')} "
+                               f"ha sido cancelada debido a una novedad de la manicurista.\n\n"
+                               f"Motivo: {novedad.get_estado_display()} - {novedad.observaciones or 'Sin motivo'}\n\n"
+                               f"Te invitamos a agendar una nueva cita desde nuestra plataforma.\n\n"
+                               f"Gracias por tu comprensión.",
+                    'destinatarios': [cita['cliente__correo_electronico']],
+                }
+                for cita in citas if cita['cliente__correo_electronico']
+            ])
         except Exception as e:
             print(f"Error enviando notificación de cancelación: {e}")
 
-    def _notificar_cliente_reactivacion(self, cita):
-        """Notificar al cliente que su cita fue reactivada"""
+    def _notificar_clientes_reactivacion(self, citas, novedad):
+        """Encolar en un lote los avisos de reactivación a los clientes"""
         try:
-            # Asegúrate de que cita.cliente y cita.cliente.email existan
-            if hasattr(cita, 'cliente') and cita.cliente and hasattr(cita.cliente, 'email') and cita.cliente.email:
-                send_mail(
-                    subject='Tu cita ha sido reactivada',
-                    message=f"Hola {cita.cliente.nombre},\n\n"
-                            f"Te informamos que tu cita con {cita.manicurista.nombre} " # Usar .nombre
-                            f"el {cita.fecha_cita.strftime('%d/%m/%Y')} a las {cita.hora_cita.strftime('%H:%M')} "
-                            f"ha sido reactivada.\n\n"
-                            f"La novedad que causó la cancelación ha sido anulada.\n\n"
-                            f"Tu cita está confirmada nuevamente.\n\n"
-                            f"¡Te esperamos!",
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[cita.cliente.email],
-                    fail_silently=True
-                )
+            encolar_correos([
+                {
+                    'asunto': 'Tu cita ha sido reactivada',
+                    'mensaje': f"Hola {cita['cliente__nombre']},\n\n"
+                               f"Te informamos que tu cita con {novedad.manicurista.nombre} "
+                               f"el {cita['fecha_cita'].strftime('%d/%m/%Y')} a las {cita['hora_cita'].strftime('%H:%M')} "
+                               f"ha sido reactivada.\n\n"
+                               f"La novedad que causó la cancelación ha sido anulada.\n\n"
+                               f"Tu cita está confirmada nuevamente.\n\n"
+                               f"¡Te esperamos!",
+                    'destinatarios': [cita['cliente__correo_electronico']],
+                }
+                for cita in citas if cita['cliente__correo_electronico']
+            ])
         except Exception as e:
             print(f"Error enviando notificación de reactivación: {e}")
             
@@ -479,43 +444,35 @@ class NovedadViewSet(viewsets.ModelViewSet):
         """
         Generar programación automática semanal o mensual
         con turnos de apertura/cierre, domingos y descansos.
+        Con dry_run=true solo devuelve la vista previa de los cambios.
         """
-        semanas = int(request.data.get("semanas", 4))
-        fecha_inicio = timezone.now().date()
-
-        manicuristas = Manicurista.objects.filter(estado="activo").order_by("id")
-
-        with transaction.atomic():
-            for semana in range(semanas):
-                for i, manicurista in enumerate(manicuristas):
-                    fecha_semana = fecha_inicio + timedelta(weeks=semana)
-
-                    # Alternar turnos apertura/cierre por semana
-                    turno = "apertura" if (semana + i) % 2 == 0 else "cierre"
-
-                    Novedad.objects.create(
-                        manicurista=manicurista,
-                        fecha=fecha_semana,
-                        estado="horario",
-                        turno=turno,
-                    )
+        try:
+            semanas = int(request.data.get("semanas", 4))
+        except (TypeError, ValueError):
+            return Response({'error': 'El número de semanas debe ser un entero'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= semanas <= 52:
+            return Response({'error': 'El número de semanas debe estar entre 1 y 52'}, status=status.HTTP_400_BAD_REQUEST)
 
-                    # Reglas domingos
-                    if semana % 2 == 0:  # Domingo sí
-                        Novedad.objects.create(
-                            manicurista=manicurista,
-                            fecha=fecha_semana + timedelta(days=6),  # domingo
-                            estado="horario",
-                            turno=turno,
-                        )
-                        # Descanso entre lunes y miércoles de la siguiente semana
-                        descanso = fecha_semana + timedelta(days=7 + (i % 3))
-                        Novedad.objects.create(
-                            manicurista=manicurista,
-                            fecha=descanso,
-                            estado="ausente",
-                            tipo_ausencia="completa",
-                            observaciones="Descanso post domingo trabajado",
-                        )
-
-        return Response({"message": "Programación generada con éxito"})
+        fecha_inicio = request.data.get("fecha_inicio")
+        try:
+            fecha_inicio = (
+                datetime.strptime(fecha_inicio, '%Y-%m-%d').date() if fecha_inicio
+                else timezone.localdate()
+            )
+        except (TypeError, ValueError):
+            return Response({'error': 'Formato de fecha inválido. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        fecha_inicio = programacion.inicio_programacion(fecha_inicio)
+
+        dry_run = str(request.data.get("dry_run", "false")).lower() in ('true', '1')
+
+        nombres = dict(
+            Manicurista.objects.filter(estado="activo").order_by("id").values_list("id", "nombre")
+        )
+        resultado = programacion.generar_programacion(list(nombres), fecha_inicio, semanas, dry_run=dry_run)
+
+        datos = resultado.resumen(nombres, detalle=dry_run)
+        datos['dry_run'] = dry_run
+        datos['message'] = (
+            "Vista previa de la programación" if dry_run else "Programación generada con éxito"
+        )
+        return Response(datos)
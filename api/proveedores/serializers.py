@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from api.base.serializers import CamposDinamicosMixin
 from .models import Proveedor
 
 
-class ProveedorSerializer(serializers.ModelSerializer):
+class ProveedorSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Proveedor
         fields = '__all__'
@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from api.base.serializers import CamposDinamicosMixin
 from .models import Permiso, Rol, RolHasPermiso, Modulo, Accion
 
 
-class PermisoSerializer(serializers.ModelSerializer):
+class PermisoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Permiso
         fields = '__all__'
@@ -14,13 +15,13 @@ class PermisoSerializer(serializers.ModelSerializer):
         return value
 
 
-class RolHasPermisoSerializer(serializers.ModelSerializer):
+class RolHasPermisoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = RolHasPermiso
         fields = ['id', 'rol', 'permiso']
 
 
-class RolSerializer(serializers.ModelSerializer):
+class RolSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     permisos_ids = serializers.PrimaryKeyRelatedField(
         many=True, 
         queryset=Permiso.objects.all(),
@@ -71,7 +72,7 @@ class RolDetailSerializer(serializers.ModelSerializer):
         fields = ['id', 'nombre', 'estado', 'permisos', 'created_at', 'updated_at']
 
 
-class ModuloSerializer(serializers.ModelSerializer):
+class ModuloSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Modulo
         fields = '__all__'
@@ -82,7 +83,7 @@ class ModuloSerializer(serializers.ModelSerializer):
         return value
 
 
-class AccionSerializer(serializers.ModelSerializer):
+class AccionSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Accion
         fields = '__all__'
@@ -4,6 +4,9 @@ from rest_framework.decorators import action
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from django.apps import apps
+from django.core.cache import cache
+from api.authentication.permisos_cache import TIMEOUT, claims_vigentes, obtener_version
+from api.base.cache_respuestas import respuesta_en_cache
 from .models import Rol, Permiso, RolHasPermiso, Modulo, Accion
 from .serializers import (
     RolSerializer,
@@ -15,6 +18,17 @@ from .serializers import (
 )
 
 
+def permisos_activos_de_rol(rol_id):
+    """Permisos activos del rol serializados, en caché hasta el próximo cambio de permisos"""
+    key = f'permisos:rol:{rol_id}:activos:v{obtener_version()}'
+    permisos = cache.get(key)
+    if permisos is None:
+        serializer = PermisoSerializer(Rol(pk=rol_id).permisos.filter(estado='activo'), many=True)
+        permisos = [dict(permiso) for permiso in serializer.data]
+        cache.set(key, permisos, TIMEOUT)
+    return permisos
+
+
 class RolViewSet(viewsets.ModelViewSet):
     """
     ViewSet para el modelo Rol.
@@ -41,8 +55,19 @@ class RolViewSet(viewsets.ModelViewSet):
     def permisos_usuario(self, request):
         """
         Endpoint para obtener los permisos de un usuario específico.
+        Sin usuario_id retorna los del usuario autenticado.
         """
         usuario_id = request.query_params.get('usuario_id')
+
+        # Permisos propios: el rol viene en los claims del token, sin consultar el usuario
+        token = request.auth
+        if claims_vigentes(token) and (not usuario_id or str(usuario_id) == str(token['user_id'])):
+            return Response({
+                "usuario_id": usuario_id or token['user_id'],
+                "rol": token.get('rol'),
+                "permisos": permisos_activos_de_rol(token['rol_id'])
+            })
+
         if not usuario_id:
             return Response(
                 {"error": "Se requiere el parámetro usuario_id"},
@@ -52,7 +77,7 @@ class RolViewSet(viewsets.ModelViewSet):
         try:
             # Obtener el usuario
             Usuario = apps.get_model('usuarios', 'Usuario')
-            usuario = Usuario.objects.get(pk=usuario_id)
+            usuario = Usuario.objects.select_related('rol').get(pk=usuario_id)
             
             if not usuario.rol:
                 return Response(
@@ -60,14 +85,10 @@ class RolViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            # Obtener los permisos del rol del usuario
-            permisos = usuario.rol.permisos.filter(estado='activo')
-            serializer = PermisoSerializer(permisos, many=True)
-            
             return Response({
                 "usuario_id": usuario_id,
                 "rol": usuario.rol.nombre,
-                "permisos": serializer.data
+                "permisos": permisos_activos_de_rol(usuario.rol_id)
             })
             
         except Usuario.DoesNotExist:
@@ -241,6 +262,7 @@ class RolViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @respuesta_en_cache(Rol)
     def activos(self, request):
         """
         Endpoint para listar solo los roles activos.
@@ -377,6 +399,7 @@ class ModuloViewSet(viewsets.ModelViewSet):
     ordering = ['nombre']
 
     @action(detail=False, methods=['get'])
+    @respuesta_en_cache(Modulo)
     def activos(self, request):
         """
         Endpoint para listar solo los módulos activos.
@@ -399,6 +422,7 @@ class AccionViewSet(viewsets.ModelViewSet):
     ordering = ['nombre']
 
     @action(detail=False, methods=['get'])
+    @respuesta_en_cache(Accion)
     def activas(self, request):
         """
         Endpoint para listar solo las acciones activas.
@@ -421,6 +445,7 @@ class PermisoViewSet(viewsets.ModelViewSet):
     ordering = ['modulo__nombre', 'accion__nombre']
 
     @action(detail=False, methods=['get'])
+    @respuesta_en_cache(Permiso)
     def activos(self, request):
         """
         Endpoint para listar solo los permisos activos.
@@ -430,6 +455,7 @@ class PermisoViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @respuesta_en_cache(Permiso)
     def by_modulo(self, request):
         """
         Endpoint para filtrar permisos por módulo.
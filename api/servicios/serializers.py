@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from api.base.serializers import CamposDinamicosMixin
 from decimal import Decimal, InvalidOperation
 from .models import Servicio
 
 
-class ServicioSerializer(serializers.ModelSerializer):
+class ServicioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     precio = serializers.CharField()  # Fuerza DRF a aceptarlo como string y luego validarlo
     duracion_formateada = serializers.ReadOnlyField()  # Campo calculado para mostrar duración formateada
 
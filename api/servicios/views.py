@@ -2,8 +2,11 @@ from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from django.db.models import Q, Avg, Count
+from django.db.models import Q, Avg, Count, Min, Max
 from .models import Servicio
+from api.base.estadisticas import estadisticas_en_cache
+from api.base.cache_respuestas import respuesta_en_cache
+from api.busqueda import indice
 from .serializers import ServicioSerializer
 import requests
 import base64
@@ -56,12 +59,9 @@ class ServicioViewSet(viewsets.ModelViewSet):
             except ValueError:
                 pass
         
-        # Búsqueda general en nombre y descripción
+        # Búsqueda general en nombre y descripción (sin tildes, con el índice de búsqueda)
         if search:
-            queryset = queryset.filter(
-                Q(nombre__icontains=search) | 
-                Q(descripcion__icontains=search)
-            )
+            queryset = queryset.filter(pk__in=indice.buscar_ids('servicio', search, limite=100))
 
         return queryset
 
@@ -157,6 +157,7 @@ class ServicioViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @respuesta_en_cache(Servicio)
     def activos(self, request):
         """Obtener solo servicios activos"""
         servicios = Servicio.objects.filter(estado='activo')
@@ -199,54 +200,63 @@ class ServicioViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
         """Obtener estadísticas de servicios"""
-        total_servicios = Servicio.objects.count()
-        servicios_activos = Servicio.objects.filter(estado='activo').count()
-        servicios_inactivos = Servicio.objects.filter(estado='inactivo').count()
-        
-        # Estadísticas de precios
-        precios_stats = Servicio.objects.aggregate(
+        return Response(estadisticas_en_cache('servicios', request, self._calcular_estadisticas))
+
+    def _calcular_estadisticas(self):
+        # Conteos, precios y duraciones en una sola consulta
+        datos = Servicio.objects.aggregate(
+            total_servicios=Count('id'),
+            servicios_activos=Count('id', filter=Q(estado='activo')),
+            servicios_inactivos=Count('id', filter=Q(estado='inactivo')),
             precio_promedio=Avg('precio'),
-            precio_min=models.Min('precio'),
-            precio_max=models.Max('precio')
-        )
-        
-        # Estadísticas de duración
-        duracion_stats = Servicio.objects.aggregate(
+            precio_min=Min('precio'),
+            precio_max=Max('precio'),
             duracion_promedio=Avg('duracion'),
-            duracion_min=models.Min('duracion'),
-            duracion_max=models.Max('duracion')
+            duracion_min=Min('duracion'),
+            duracion_max=Max('duracion'),
         )
 
-        return Response({
-            'total_servicios': total_servicios,
-            'servicios_activos': servicios_activos,
-            'servicios_inactivos': servicios_inactivos,
-            'precios': precios_stats,
-            'duracion': duracion_stats
-        })
+        return {
+            'total_servicios': datos['total_servicios'],
+            'servicios_activos': datos['servicios_activos'],
+            'servicios_inactivos': datos['servicios_inactivos'],
+            'precios': {
+                'precio_promedio': datos['precio_promedio'],
+                'precio_min': datos['precio_min'],
+                'precio_max': datos['precio_max'],
+            },
+            'duracion': {
+                'duracion_promedio': datos['duracion_promedio'],
+                'duracion_min': datos['duracion_min'],
+                'duracion_max': datos['duracion_max'],
+            }
+        }
 
     @action(detail=False, methods=['get'])
     def top_vendidos(self, request):
         """Obtener servicios más vendidos"""
-        try:
-            from ventaservicios.models import VentaServicio
-            from django.db.models import Case, When, IntegerField
+        from api.ventaservicios.models import VentaDiariaServicio
+        from django.db.models import Case, When, IntegerField, Sum
 
-            limit = int(request.query_params.get('limit', 5))
+        limit = int(request.query_params.get('limit', 5))
 
-            servicios_ids = VentaServicio.objects.values('servicio') \
-                .annotate(total=Count('servicio')) \
-                .order_by('-total')[:limit] \
-                .values_list('servicio', flat=True)
-
-            order = Case(*[When(pk=pk, then=pos) for pos, pk in enumerate(servicios_ids)],
-                         output_field=IntegerField())
-
-            servicios = Servicio.objects.filter(pk__in=servicios_ids).order_by(order)
-            serializer = self.get_serializer(servicios, many=True)
-            return Response(serializer.data)
-        except ImportError:
-            # Si no existe el modelo VentaServicio, retornar servicios activos
-            servicios = Servicio.objects.filter(estado='activo')[:5]
+        # Unidades vendidas por servicio desde el resumen diario (sin ventas canceladas)
+        servicios_ids = list(
+            VentaDiariaServicio.objects.exclude(estado='cancelada')
+            .values('servicio')
+            .annotate(total=Sum('cantidad'))
+            .order_by('-total')[:limit]
+            .values_list('servicio', flat=True)
+        )
+        if not servicios_ids:
+            # Sin ventas registradas, retornar servicios activos
+            servicios = Servicio.objects.filter(estado='activo')[:limit]
             serializer = self.get_serializer(servicios, many=True)
             return Response(serializer.data)
+
+        order = Case(*[When(pk=pk, then=pos) for pos, pk in enumerate(servicios_ids)],
+                     output_field=IntegerField())
+
+        servicios = Servicio.objects.filter(pk__in=servicios_ids).order_by(order)
+        serializer = self.get_serializer(servicios, many=True)
+        return Response(serializer.data)
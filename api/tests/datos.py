@@ -0,0 +1,175 @@
+"""
+Datos de prueba para los tests de la API.
+
+sembrar(escala) agrega `escala` bloques de datos relacionados (servicios,
+manicuristas con usuario, clientes con usuario, citas de hoy, de mañana y
+finalizadas con varios servicios, ventas con detalles, novedades, insumos,
+compras, abastecimientos, liquidaciones y correos). Se puede llamar varias
+veces: cada llamada agrega filas nuevas sin repetir documentos ni correos, lo
+que permite comparar el número de consultas de un endpoint con pocos y con
+muchos datos. Los objetos se crean con el ORM (save/create) para que las
+señales mantengan los resúmenes, el índice de búsqueda y el kardex igual que
+en producción.
+"""
+import itertools
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from api.abastecimientos.models import Abastecimiento
+from api.categoriainsumos.models import CategoriaInsumo
+from api.citas.models import Cita
+from api.clientes.models import Cliente
+from api.comprahasinsumos.models import CompraHasInsumo
+from api.compras.models import Compra, DetalleCompra
+from api.correos.models import CorreoSaliente
+from api.insumos.models import Insumo, MovimientoInventario
+from api.insumoshasabastecimientos.models import InsumoHasAbastecimiento
+from api.liquidaciones.models import Liquidacion
+from api.manicuristas.models import Manicurista
+from api.novedades.models import Novedad
+from api.proveedores.models import Proveedor
+from api.roles.models import Accion, Modulo, Permiso, Rol, RolHasPermiso
+from api.servicios.models import Servicio
+from api.usuarios.models import Usuario
+from api.ventaservicios.models import VentaServicio
+
+
+MODULOS = ['clientes', 'manicuristas', 'citas', 'servicios', 'venta_servicios', 'insumos']
+ACCIONES = ['listar', 'ver_detalles', 'crear', 'editar', 'eliminar']
+
+_consecutivo = itertools.count(1)
+
+
+def sembrar_catalogo():
+    """Roles, módulos, acciones, permisos y el usuario administrador. Retorna el administrador"""
+    roles = {
+        nombre: Rol.objects.get_or_create(nombre=nombre, defaults={'estado': 'activo'})[0]
+        for nombre in ['Administrador', 'Manicurista', 'Cliente']
+    }
+    acciones = {nombre: Accion.objects.get_or_create(nombre=nombre)[0] for nombre in ACCIONES}
+    for nombre_modulo in MODULOS:
+        modulo = Modulo.objects.get_or_create(nombre=nombre_modulo)[0]
+        for nombre_accion, accion in acciones.items():
+            permiso = Permiso.objects.get_or_create(
+                modulo=modulo, accion=accion, defaults={'nombre': f'{nombre_modulo}_{nombre_accion}'}
+            )[0]
+            RolHasPermiso.objects.get_or_create(rol=roles['Administrador'], permiso=permiso)
+            if nombre_accion in ('listar', 'ver_detalles'):
+                RolHasPermiso.objects.get_or_create(rol=roles['Manicurista'], permiso=permiso)
+
+    admin = Usuario.objects.filter(correo_electronico='admin@winespa.test').first()
+    if admin is None:
+        admin = Usuario.objects.create_superuser(
+            'admin@winespa.test', 'admin12345',
+            nombre='Administrador', tipo_documento='CC', documento='900000001',
+            celular='3000000001', rol=roles['Administrador'],
+        )
+    return admin
+
+
+def sembrar(escala=1):
+    """Agrega `escala` bloques de datos. Retorna el usuario administrador"""
+    admin = sembrar_catalogo()
+    hoy = timezone.localdate()
+    categoria = CategoriaInsumo.objects.get_or_create(nombre='Esmaltes')[0]
+
+    for _ in range(escala):
+        n = next(_consecutivo)
+
+        servicios = [
+            Servicio.objects.create(
+                nombre=f'Servicio {n}-{i}', precio=Decimal(20000 + 5000 * i),
+                descripcion=f'Servicio de manicura número {n}-{i}', duracion=30 + 30 * i,
+            )
+            for i in range(2)
+        ]
+
+        manicurista = Manicurista.objects.create(
+            nombre=f'Manicurista Número {n}', tipo_documento='CC', numero_documento=f'{1000000 + n}',
+            celular=f'310{n:07d}', correo=f'manicurista{n}@winespa.test', direccion='Calle 1',
+            especialidad='Manicure Gel', fecha_ingreso=hoy - timedelta(days=365),
+        )
+        manicurista.crear_usuario_relacionado()
+
+        cliente = Cliente.objects.create(
+            tipo_documento='CC', documento=f'{2000000 + n}', nombre=f'Cliente María {n}',
+            celular=f'320{n:07d}', correo_electronico=f'cliente{n}@winespa.test', direccion='Carrera 2',
+        )
+        cliente.crear_usuario_relacionado()
+
+        # Citas: hoy pendiente, mañana pendiente y una finalizada la semana pasada
+        citas = []
+        for fecha, hora, estado in [
+            (hoy, time(10 + n % 8, 0), 'pendiente'),
+            (hoy + timedelta(days=1), time(11 + n % 8, 0), 'pendiente'),
+            (hoy - timedelta(days=7), time(12, 0), 'finalizada'),
+        ]:
+            cita = Cita.objects.create(
+                cliente=cliente, manicurista=manicurista, servicio=servicios[0],
+                fecha_cita=fecha, hora_cita=hora, estado=estado,
+                precio_servicio=servicios[0].precio, duracion_estimada=servicios[0].duracion,
+            )
+            cita.servicios.set(servicios)
+            cita.calcular_totales()
+            citas.append(cita)
+
+        venta = VentaServicio.objects.create(
+            cliente=cliente, manicurista=manicurista, cita=citas[2], estado='pagada',
+            metodo_pago='efectivo' if n % 2 else 'transferencia', total=Decimal('0.00'),
+        )
+        venta.agregar_detalles([
+            {'servicio': servicio, 'cantidad': 1, 'precio_unitario': servicio.precio} for servicio in servicios
+        ])
+        venta.citas.set([citas[2]])
+        VentaServicio.objects.create(
+            cliente=cliente, manicurista=manicurista, servicio=servicios[1], estado='pendiente',
+            precio_unitario=servicios[1].precio, total=servicios[1].precio,
+        )
+
+        Novedad.objects.create(manicurista=manicurista, fecha=hoy, estado='tardanza', hora_entrada=time(10, 30))
+        Novedad.objects.create(
+            manicurista=manicurista, fecha=hoy + timedelta(days=2), estado='ausente', tipo_ausencia='completa'
+        )
+
+        insumos = [
+            Insumo.objects.create(nombre=f'Insumo {n}-{i}', categoria_insumo=categoria) for i in range(2)
+        ]
+        proveedor = Proveedor.objects.create(
+            tipo_persona='juridica', nombre_empresa=f'Proveedor {n} SAS', nit=f'800{n:06d}', nombre=f'Contacto {n}',
+            direccion='Avenida 3', correo_electronico=f'proveedor{n}@winespa.test', celular=f'300{n:07d}',
+        )
+        compra = Compra(proveedor=proveedor, estado='finalizada', codigo_factura=f'F-{n}')
+        compra.asignar_totales(sum(Decimal(10 * 1500) for _ in insumos))
+        compra.save()
+        DetalleCompra.objects.bulk_create([
+            DetalleCompra(compra=compra, insumo=insumo, cantidad=10, precio_unitario=Decimal('1500.00'))
+            for insumo in insumos
+        ])
+        MovimientoInventario.aplicar([(insumo.pk, 10) for insumo in insumos], 'compra', documento_id=compra.id)
+        for insumo in insumos:
+            CompraHasInsumo.objects.create(
+                compra=compra, insumo=insumo, cantidad=10, precio_unitario=Decimal('1500.00'),
+                subtotal=Decimal('15000.00'),
+            )
+
+        abastecimiento = Abastecimiento.objects.create(fecha=hoy, cantidad=2, manicurista=manicurista)
+        InsumoHasAbastecimiento.objects.bulk_create([
+            InsumoHasAbastecimiento(abastecimiento=abastecimiento, insumo=insumo, cantidad=1) for insumo in insumos
+        ])
+        MovimientoInventario.aplicar(
+            [(insumo.pk, -1) for insumo in insumos], 'abastecimiento', documento_id=abastecimiento.id
+        )
+
+        Liquidacion.objects.create(
+            manicurista=manicurista, fecha_inicio=hoy - timedelta(days=14), fecha_final=hoy - timedelta(days=1),
+            valor=Decimal('50000.00'), bonificacion=Decimal('5000.00'),
+        )
+
+        CorreoSaliente.objects.create(
+            asunto=f'Recordatorio de cita {n}', mensaje='Su cita es mañana', remitente='noreply@winespa.test',
+            destinatarios=[cliente.correo_electronico],
+        )
+
+    return admin
@@ -0,0 +1,64 @@
+"""Búsqueda sin tildes: coincidencias por prefijo y permisos por entidad"""
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.authentication.tokens import tokens_para_usuario
+from api.busqueda import indice
+from api.busqueda.models import TerminoBusqueda
+from api.roles.models import Rol
+from api.usuarios.models import Usuario
+
+from .datos import sembrar
+
+
+class CoincidenciasPrefijoTests(TestCase):
+
+    def indexar(self, objeto_id, *palabras):
+        return [
+            TerminoBusqueda(entidad='cliente', objeto_id=objeto_id, tipo='palabra', termino=palabra)
+            for palabra in palabras
+        ]
+
+    def test_encuentra_objetos_detras_de_una_palabra_muy_comun(self):
+        terminos = []
+        for objeto_id in range(1, 701):
+            terminos += self.indexar(objeto_id, 'andrea', 'perez')
+        terminos += self.indexar(701, 'andrea', 'zu')
+        TerminoBusqueda.objects.bulk_create(terminos)
+
+        self.assertEqual(indice.buscar_claves('andrea zu', ['cliente']), [(('cliente', 701), 4)])
+
+    def test_puntua_palabra_exacta_sobre_prefijo_y_aplica_el_limite(self):
+        TerminoBusqueda.objects.bulk_create(
+            self.indexar(1, 'mariana') + self.indexar(2, 'maria') + self.indexar(3, 'marisol', 'maria')
+        )
+
+        self.assertEqual(
+            indice.buscar_claves('maria', ['cliente'], limite=2),
+            [(('cliente', 2), 2), (('cliente', 3), 2)]
+        )
+
+
+class BuscarPermisosTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = sembrar(1)
+        self.client = APIClient()
+
+    def buscar(self, usuario):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens_para_usuario(usuario).access_token}')
+        return self.client.get('/api/buscar/', {'q': 'maria', 'tipo': 'cliente'})
+
+    def test_sin_token_responde_401(self):
+        self.assertEqual(self.client.get('/api/buscar/', {'q': 'maria'}).status_code, 401)
+
+    def test_solo_busca_en_entidades_permitidas(self):
+        sin_permisos = Usuario.objects.create_user(
+            'sinpermisos@winespa.test', 'clave12345', nombre='Sin permisos', tipo_documento='CC',
+            documento='900000004', celular='3000000004', rol=Rol.objects.get(nombre='Cliente'),
+        )
+
+        self.assertGreater(self.buscar(self.admin).json()['total'], 0)
+        self.assertEqual(self.buscar(sin_permisos).json()['resultados'], [])
@@ -0,0 +1,82 @@
+"""Bandeja de salida: estado solo con permiso y sin conservar el contenido de los correos terminados"""
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.authentication.tokens import tokens_para_usuario
+from api.correos.cola import MAX_INTENTOS, procesar_lote, purgar_terminados
+from api.correos.models import CorreoSaliente
+from api.roles.models import Rol
+from api.usuarios.models import Usuario
+
+from .datos import sembrar_catalogo
+
+
+class EstadoCorreosTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = sembrar_catalogo()
+        self.client = APIClient()
+
+    def autenticar(self, usuario):
+        token = tokens_para_usuario(usuario).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_sin_permiso_responde_403(self):
+        manicurista = Usuario.objects.create_user(
+            'mani@winespa.test', 'mani12345', nombre='Mani', tipo_documento='CC',
+            documento='900000003', celular='3000000003', rol=Rol.objects.get(nombre='Manicurista'),
+        )
+        self.autenticar(manicurista)
+
+        self.assertEqual(self.client.get('/api/correos/').status_code, 403)
+
+    def test_no_expone_ultimo_error(self):
+        CorreoSaliente.objects.create(
+            destinatarios=['cliente@ejemplo.com'], asunto='Cita', mensaje='...', remitente='spa@ejemplo.com',
+            estado='pendiente', intentos=1, ultimo_error='550 cliente@ejemplo.com rechazado',
+        )
+        self.autenticar(self.admin)
+
+        response = self.client.get('/api/correos/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['ultimos_errores']), 1)
+        self.assertNotIn('ultimo_error', response.json()['ultimos_errores'][0])
+
+
+class CorreosFallidosTests(TestCase):
+
+    def setUp(self):
+        self.correo = CorreoSaliente.objects.create(
+            destinatarios=['cliente@ejemplo.com'], asunto='Recuperación', mensaje='Código: 123456',
+            mensaje_html='<p>Código: 123456</p>', remitente='spa@ejemplo.com', intentos=MAX_INTENTOS - 1,
+        )
+
+    def test_fallo_definitivo_borra_el_contenido(self):
+        with mock.patch('api.correos.cola.EmailMultiAlternatives.send', side_effect=OSError('SMTP caído')):
+            resultado = procesar_lote()
+
+        self.assertEqual(resultado['fallidos'], 1)
+        self.correo.refresh_from_db()
+        self.assertEqual((self.correo.estado, self.correo.mensaje, self.correo.mensaje_html), ('fallido', '', None))
+
+    def test_purga_fallidos_viejos_y_vacia_los_recientes(self):
+        reciente = CorreoSaliente.objects.create(
+            destinatarios=['otro@ejemplo.com'], asunto='Clave', mensaje='Temporal: abc', remitente='spa@ejemplo.com',
+            estado='fallido', proximo_intento=timezone.now(),
+        )
+        CorreoSaliente.objects.filter(pk=self.correo.pk).update(
+            estado='fallido', proximo_intento=timezone.now() - timedelta(days=10)
+        )
+
+        self.assertEqual(purgar_terminados(7), 1)
+
+        self.assertFalse(CorreoSaliente.objects.filter(pk=self.correo.pk).exists())
+        reciente.refresh_from_db()
+        self.assertEqual(reciente.mensaje, '')
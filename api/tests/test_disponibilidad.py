@@ -0,0 +1,37 @@
+"""Vacaciones en la agenda: cubren desde su fecha hasta fecha_fin, sin importar su duración"""
+from datetime import date, timedelta
+
+from django.test import TestCase
+
+from api.citas.disponibilidad import consulta_novedades_del_dia
+from api.manicuristas.models import Manicurista
+from api.novedades.models import Novedad
+
+
+class VacacionesVigentesTests(TestCase):
+
+    def setUp(self):
+        self.manicurista = Manicurista.objects.create(
+            nombre='Manicurista Vacaciones', tipo_documento='CC', numero_documento='2000002',
+            celular='3100000002', correo='vacaciones@winespa.test', direccion='Calle 1',
+        )
+        self.inicio = date(2026, 1, 5)
+        self.vacaciones = Novedad.objects.create(
+            manicurista=self.manicurista, fecha=self.inicio, estado='vacaciones', dias=84
+        )
+
+    def novedades_del_dia(self, fecha):
+        return list(Novedad.objects.filter(consulta_novedades_del_dia(fecha), manicurista=self.manicurista))
+
+    def test_vacaciones_largas_cubren_hasta_su_ultimo_dia(self):
+        self.assertEqual(self.vacaciones.fecha_fin, self.inicio + timedelta(days=83))
+        self.assertEqual(self.novedades_del_dia(self.inicio + timedelta(days=83)), [self.vacaciones])
+        self.assertEqual(self.novedades_del_dia(self.inicio + timedelta(days=84)), [])
+
+    def test_cambiar_dias_actualiza_fecha_fin(self):
+        self.vacaciones.dias = 7
+        self.vacaciones.save(update_fields=['dias'])
+
+        self.vacaciones.refresh_from_db()
+        self.assertEqual(self.vacaciones.fecha_fin, self.inicio + timedelta(days=6))
+        self.assertEqual(self.novedades_del_dia(self.inicio + timedelta(days=7)), [])
@@ -0,0 +1,119 @@
+"""Stock de insumos: todo cambio de cantidad debe quedar en el kardex (MovimientoInventario)"""
+from datetime import date
+
+from django.db.models import Sum
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.abastecimientos.models import Abastecimiento
+from api.categoriainsumos.models import CategoriaInsumo
+from api.insumos.models import Insumo, MovimientoInventario
+from api.insumoshasabastecimientos.models import InsumoHasAbastecimiento
+from api.manicuristas.models import Manicurista
+
+from .datos import sembrar_catalogo
+
+
+class InsumoKardexTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(sembrar_catalogo())
+        self.categoria = CategoriaInsumo.objects.create(nombre='Esmaltes')
+
+    def assertKardexCuadra(self, insumo):
+        total = insumo.movimientos.aggregate(total=Sum('cantidad'))['total'] or 0
+        insumo.refresh_from_db()
+        self.assertEqual(insumo.cantidad, total)
+
+    def crear_insumo(self, stock):
+        insumo = self.client.post('/api/insumos/', {
+            'nombre': 'Top coat', 'categoria_insumo': self.categoria.pk,
+        }, format='json').json()
+        self.client.patch(f"/api/insumos/{insumo['id']}/ajustar_stock/", {'cantidad': stock}, format='json')
+        return insumo['id']
+
+    def test_crear_siempre_empieza_en_cero(self):
+        response = self.client.post('/api/insumos/', {
+            'nombre': 'Top coat', 'cantidad': 50, 'categoria_insumo': self.categoria.pk,
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['cantidad'], 0)
+        insumo = Insumo.objects.get(pk=response.json()['id'])
+        self.assertFalse(insumo.movimientos.exists())
+        self.assertKardexCuadra(insumo)
+
+    def test_actualizar_rechaza_otra_cantidad(self):
+        insumo_id = self.crear_insumo(50)
+
+        for metodo in ('put', 'patch'):
+            response = getattr(self.client, metodo)(f"/api/insumos/{insumo_id}/", {
+                'nombre': 'Top coat', 'cantidad': 99, 'categoria_insumo': self.categoria.pk,
+            }, format='json')
+            self.assertEqual(response.status_code, 400)
+
+        # Reenviar la cantidad actual (el objeto completo) sí se permite
+        response = self.client.put(f"/api/insumos/{insumo_id}/", {
+            'nombre': 'Top coat base', 'cantidad': 50, 'categoria_insumo': self.categoria.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['nombre'], 'Top coat base')
+
+        instancia = Insumo.objects.get(pk=insumo_id)
+        self.assertEqual(instancia.cantidad, 50)
+        self.assertEqual(MovimientoInventario.objects.filter(insumo=instancia).count(), 1)
+        self.assertKardexCuadra(instancia)
+
+    def test_lineas_de_abastecimiento_son_de_solo_lectura(self):
+        insumo_id = self.crear_insumo(50)
+
+        response = self.client.post('/api/insumo-abastecimiento/', {
+            'insumo': insumo_id, 'cantidad': 10,
+        }, format='json')
+
+        self.assertEqual(response.status_code, 405)
+        self.assertKardexCuadra(Insumo.objects.get(pk=insumo_id))
+
+
+class AbastecimientoKardexTests(TestCase):
+    """Los abastecimientos anteriores al kardex nunca descontaron stock: no se les devuelve nada"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(sembrar_catalogo())
+        categoria = CategoriaInsumo.objects.create(nombre='Esmaltes')
+        self.insumo = Insumo.objects.create(nombre='Top coat', cantidad=0, categoria_insumo=categoria)
+        MovimientoInventario.aplicar([(self.insumo.pk, 50)], 'ajuste')
+        manicurista = Manicurista.objects.create(
+            nombre='Manicurista Legado', tipo_documento='CC', numero_documento='2000001',
+            celular='3100000001', correo='legado@winespa.test', direccion='Calle 1',
+        )
+        # Abastecimiento anterior al kardex: tiene líneas pero ningún movimiento
+        self.abastecimiento = Abastecimiento.objects.create(fecha=date(2024, 1, 10), cantidad=1, manicurista=manicurista)
+        InsumoHasAbastecimiento.objects.create(abastecimiento=self.abastecimiento, insumo=self.insumo, cantidad=10)
+
+    def assertStock(self, esperado):
+        self.insumo.refresh_from_db()
+        self.assertEqual(self.insumo.cantidad, esperado)
+        total = self.insumo.movimientos.aggregate(total=Sum('cantidad'))['total']
+        self.assertEqual(total, esperado)
+
+    def test_eliminar_abastecimiento_anterior_no_devuelve_stock(self):
+        response = self.client.delete(f'/api/abastecimientos/{self.abastecimiento.pk}/')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertStock(50)
+
+    def test_editar_abastecimiento_anterior_solo_descuenta_lo_nuevo(self):
+        response = self.client.put(f'/api/abastecimientos/{self.abastecimiento.pk}/', {
+            'fecha': '2024-01-10', 'cantidad': 1, 'manicurista': self.abastecimiento.manicurista_id,
+            'insumos': [{'insumo': self.insumo.pk, 'cantidad': 5}],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertStock(45)
+
+        # Ya en el kardex: eliminarlo devuelve solo esos 5
+        self.client.delete(f'/api/abastecimientos/{self.abastecimiento.pk}/')
+        self.assertStock(50)
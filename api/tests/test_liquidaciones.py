@@ -0,0 +1,73 @@
+"""Creación de liquidaciones: automática por manicurista y en bloque por período"""
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.liquidaciones.models import Liquidacion
+from api.manicuristas.models import Manicurista
+
+from .datos import sembrar
+
+
+class LiquidacionAutomaticaTests(TestCase):
+
+    def setUp(self):
+        # Dos manicuristas activas: la liquidación automática solo debe crear la pedida
+        self.admin = sembrar(2)
+        self.manicurista = Manicurista.objects.order_by('pk').first()
+        hoy = timezone.localdate()
+        self.periodo = {
+            'fecha_inicio': (hoy - timedelta(days=14)).isoformat(),
+            'fecha_final': hoy.isoformat(),
+        }
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        # sembrar() ya deja liquidaciones de otros períodos
+        self.existentes = Liquidacion.objects.count()
+
+    def crear(self, **datos):
+        return self.client.post(
+            '/api/liquidaciones/crear_liquidacion_automatica/',
+            {'manicurista_id': self.manicurista.pk, **self.periodo, **datos},
+            format='json'
+        )
+
+    def test_crea_una_sola_liquidacion_por_periodo(self):
+        response = self.crear(bonificacion='10')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['liquidacion']['manicurista']['id'], self.manicurista.pk)
+
+        response = self.crear()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Liquidacion.objects.count(), self.existentes + 1)
+
+    def test_solo_liquida_la_manicurista_pedida(self):
+        self.assertEqual(self.crear().status_code, 201)
+        self.assertEqual(Liquidacion.objects.count(), self.existentes + 1)
+
+    def test_bonificacion_invalida_responde_400(self):
+        for bonificacion in ['abc', 'NaN']:
+            with self.subTest(bonificacion=bonificacion):
+                self.assertEqual(self.crear(bonificacion=bonificacion).status_code, 400)
+        self.assertEqual(Liquidacion.objects.count(), self.existentes)
+
+
+class GenerarLiquidacionesComandoTests(TestCase):
+
+    def setUp(self):
+        sembrar(1)
+        self.hoy = timezone.localdate().isoformat()
+        self.existentes = Liquidacion.objects.count()
+
+    def test_bonificacion_invalida_es_error_del_comando(self):
+        for bonificacion in ['abc', 'NaN']:
+            with self.subTest(bonificacion=bonificacion):
+                with self.assertRaisesMessage(CommandError, 'Bonificación inválida'):
+                    call_command(
+                        'generar_liquidaciones', desde=self.hoy, hasta=self.hoy, bonificacion=bonificacion
+                    )
+        self.assertEqual(Liquidacion.objects.count(), self.existentes)
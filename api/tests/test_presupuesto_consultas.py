@@ -0,0 +1,325 @@
+"""
+Presupuesto de consultas SQL por endpoint.
+
+Recorre el URLconf, llama cada ruta GET de la API (listas, detalles y
+acciones @action) y verifica que el número de consultas no pase del
+presupuesto declarado en PRESUPUESTOS ni crezca con los datos: cada ruta se
+mide con un conjunto de datos pequeño y de nuevo después de agregar más
+filas. Una consulta por fila (N+1) hace fallar el test con la lista de SQL
+ejecutado.
+
+    python manage.py test api --settings=winespa.settings_test
+
+Al agregar una ruta GET hay que declarar su presupuesto aquí; si necesita
+parámetros obligatorios, agregarlos en PARAMETROS.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import timezone
+from rest_framework.routers import APIRootView
+from rest_framework.test import APIClient
+
+from api.abastecimientos.models import Abastecimiento
+from api.authentication.permisos_cache import permisos_de_rol
+from api.authentication.rutas_permisos import COMODIN, _segmentos
+from api.authentication.tokens import tokens_para_usuario
+from api.categoriainsumos.models import CategoriaInsumo
+from api.clientes.models import Cliente
+from api.compras.models import Compra
+from api.insumos.models import Insumo
+from api.manicuristas.models import Manicurista
+from api.roles.models import Accion, Modulo, Permiso
+from api.usuarios.models import Usuario
+
+from .datos import sembrar
+
+
+ESCALA_INICIAL = 2
+ESCALA_AGREGADA = 4
+
+# Consultas máximas por ruta (patrón con '*' en lugar de los parámetros)
+PRESUPUESTOS = {
+    '/api/usuarios/': 1,
+    '/api/usuarios/activos/': 1,
+    '/api/usuarios/por-rol/': 1,
+    '/api/usuarios/detallado/': 1,
+    '/api/usuarios/*/': 2,
+    '/api/clientes/': 1,
+    '/api/clientes/activos/': 1,
+    '/api/clientes/by_documento/': 1,
+    '/api/clientes/search/': 3,
+    '/api/clientes/*/': 1,
+    '/api/manicuristas/': 1,
+    '/api/manicuristas/activos/': 1,
+    '/api/manicuristas/disponibles/': 1,
+    '/api/manicuristas/*/': 1,
+    '/api/manicuristas/*/estadisticas/': 2,
+    '/api/roles/permisos_usuario/': 3,
+    '/api/roles/verificar_permiso/': 3,
+    '/api/roles/roles/': 1,
+    '/api/roles/roles/activos/': 1,
+    '/api/roles/roles/list_detail/': 4,
+    '/api/roles/roles/permisos_usuario/': 3,
+    '/api/roles/roles/verificar_permiso/': 3,
+    '/api/roles/roles/*/': 2,
+    '/api/roles/roles/*/check_usuarios/': 2,
+    '/api/roles/permisos/': 1,
+    '/api/roles/permisos/activos/': 1,
+    '/api/roles/permisos/by_accion/': 1,
+    '/api/roles/permisos/by_modulo/': 1,
+    '/api/roles/permisos/by_modulo_accion/': 1,
+    '/api/roles/permisos/*/': 1,
+    '/api/roles/roles-permisos/': 1,
+    '/api/roles/roles-permisos/by_permiso/': 1,
+    '/api/roles/roles-permisos/by_rol/': 1,
+    '/api/roles/roles-permisos/*/': 1,
+    '/api/roles/modulos/': 1,
+    '/api/roles/modulos/activos/': 1,
+    '/api/roles/modulos/*/': 1,
+    '/api/roles/acciones/': 1,
+    '/api/roles/acciones/activas/': 1,
+    '/api/roles/acciones/*/': 1,
+    '/api/abastecimientos/': 3,
+    '/api/abastecimientos/por_manicurista/': 4,
+    '/api/abastecimientos/por_periodo/': 3,
+    '/api/abastecimientos/*/': 3,
+    '/api/buscar/': 3,
+    '/api/categoria-insumos/': 1,
+    '/api/categoria-insumos/activas/': 1,
+    '/api/categoria-insumos/inactivas/': 1,
+    '/api/categoria-insumos/*/': 1,
+    '/api/categoria-insumos/*/check_insumos/': 2,
+    '/api/citas/': 2,
+    '/api/citas/citas_hoy/': 2,
+    '/api/citas/citas_pendientes/': 2,
+    '/api/citas/disponibilidad/': 2,
+    '/api/citas/disponibilidad_cliente/': 2,
+    '/api/citas/disponibilidad_manicurista/': 2,
+    '/api/citas/disponibilidad_matriz/': 3,
+    '/api/citas/estadisticas/': 3,
+    '/api/citas/manicuristas_disponibles/': 1,
+    '/api/citas/servicios_activos/': 1,
+    '/api/citas/*/': 2,
+    '/api/compras/': 3,
+    '/api/compras/*/': 3,
+    '/api/compra-insumo/': 1,
+    '/api/compra-insumo/by_compra/': 1,
+    '/api/compra-insumo/by_insumo/': 1,
+    '/api/compra-insumo/list_detail/': 1,
+    '/api/compra-insumo/top_insumos/': 1,
+    '/api/compra-insumo/*/': 2,
+    '/api/correos/': 3,
+    '/api/insumos/': 1,
+    '/api/insumos/activos/': 1,
+    '/api/insumos/por_categoria/': 1,
+    '/api/insumos/*/': 1,
+    '/api/insumos/*/check_associations/': 3,
+    '/api/insumo-abastecimiento/': 1,
+    '/api/insumo-abastecimiento/by_abastecimiento/': 1,
+    '/api/insumo-abastecimiento/by_insumo/': 1,
+    '/api/insumo-abastecimiento/list_detail/': 1,
+    '/api/insumo-abastecimiento/*/': 2,
+    '/api/liquidaciones/': 1,
+    '/api/liquidaciones/con_detalles_completos/': 3,
+    '/api/liquidaciones/estadisticas_generales/': 5,
+    '/api/liquidaciones/pendientes/': 1,
+    '/api/liquidaciones/por_manicurista/': 1,
+    '/api/liquidaciones/*/': 1,
+    '/api/liquidaciones/*/detalle_citas/': 3,
+    '/api/liquidaciones/*/detalle_completo/': 3,
+    '/api/novedades/': 3,
+    '/api/novedades/disponibilidad_citas/': 2,
+    '/api/novedades/manicuristas_con_novedades/': 1,
+    '/api/novedades/novedades_activas/': 2,
+    '/api/novedades/novedades_hoy/': 2,
+    '/api/novedades/*/': 3,
+    '/api/proveedores/': 1,
+    '/api/proveedores/activos/': 1,
+    '/api/proveedores/inactivos/': 1,
+    '/api/proveedores/*/': 1,
+    '/api/proveedores/*/check_compras/': 2,
+    '/api/servicios/': 1,
+    '/api/servicios/activos/': 1,
+    '/api/servicios/estadisticas/': 1,
+    '/api/servicios/inactivos/': 1,
+    '/api/servicios/por_duracion/': 1,
+    '/api/servicios/por_precio/': 1,
+    '/api/servicios/top_vendidos/': 2,
+    '/api/servicios/*/': 1,
+    '/api/venta-servicios/': 5,
+    '/api/venta-servicios/estadisticas/': 5,
+    '/api/venta-servicios/metodos_pago_disponibles/': 0,
+    '/api/venta-servicios/reporte_comisiones/': 1,
+    '/api/venta-servicios/ventas_desde_citas/': 5,
+    '/api/venta-servicios/ventas_hoy/': 1,
+    '/api/venta-servicios/ventas_pendientes/': 5,
+    '/api/venta-servicios/*/': 5,
+}
+
+HOY = timezone.localdate()
+
+
+def _primero(modelo):
+    return modelo.objects.order_by('pk').values_list('pk', flat=True).first()
+
+
+def _admin():
+    return Usuario.objects.get(correo_electronico='admin@winespa.test')
+
+
+# Parámetros de query obligatorios u opcionales que cambian el plan de consultas.
+# Los valores callables se evalúan con los datos ya sembrados.
+PARAMETROS = {
+    '/api/buscar/': {'q': 'maria'},
+    '/api/clientes/search/': {'q': 'maria'},
+    '/api/clientes/by_documento/': {'documento': lambda: Cliente.objects.order_by('pk').first().documento},
+    '/api/roles/permisos_usuario/': {'usuario_id': lambda: _admin().pk},
+    '/api/roles/verificar_permiso/': {'usuario_id': lambda: _admin().pk, 'permiso_nombre': 'clientes_listar'},
+    '/api/roles/roles/permisos_usuario/': {'usuario_id': lambda: _admin().pk},
+    '/api/roles/roles/verificar_permiso/': {'usuario_id': lambda: _admin().pk, 'permiso_nombre': 'clientes_listar'},
+    '/api/roles/permisos/by_accion/': {'accion_id': lambda: _primero(Accion)},
+    '/api/roles/permisos/by_modulo/': {'modulo_id': lambda: _primero(Modulo)},
+    '/api/roles/permisos/by_modulo_accion/': {'modulo_id': lambda: _primero(Modulo), 'accion_id': lambda: _primero(Accion)},
+    '/api/roles/roles-permisos/by_permiso/': {'permiso_id': lambda: _primero(Permiso)},
+    '/api/roles/roles-permisos/by_rol/': {'rol_id': lambda: _admin().rol_id},
+    '/api/usuarios/por-rol/': {'rol_id': lambda: _admin().rol_id},
+    '/api/abastecimientos/por_manicurista/': {'manicurista_id': lambda: _primero(Manicurista)},
+    '/api/abastecimientos/por_periodo/': {
+        'fecha_inicio': (HOY - timedelta(days=30)).isoformat(), 'fecha_fin': HOY.isoformat(),
+    },
+    '/api/citas/disponibilidad/': {'manicurista': lambda: _primero(Manicurista), 'fecha': HOY.isoformat()},
+    '/api/citas/disponibilidad_manicurista/': {'manicurista': lambda: _primero(Manicurista), 'fecha': HOY.isoformat()},
+    '/api/citas/disponibilidad_cliente/': {'cliente_id': lambda: _primero(Cliente), 'fecha': HOY.isoformat()},
+    '/api/citas/disponibilidad_matriz/': {
+        'fecha_inicio': HOY.isoformat(), 'fecha_fin': (HOY + timedelta(days=2)).isoformat(),
+    },
+    '/api/compra-insumo/by_compra/': {'compra_id': lambda: _primero(Compra)},
+    '/api/compra-insumo/by_insumo/': {'insumo_id': lambda: _primero(Insumo)},
+    '/api/insumos/por_categoria/': {'id': lambda: _primero(CategoriaInsumo)},
+    '/api/insumo-abastecimiento/by_abastecimiento/': {'abastecimiento_id': lambda: _primero(Abastecimiento)},
+    '/api/insumo-abastecimiento/by_insumo/': {'insumo_id': lambda: _primero(Insumo)},
+    '/api/liquidaciones/por_manicurista/': {'id': lambda: _primero(Manicurista)},
+    '/api/novedades/disponibilidad_citas/': {'manicurista': lambda: _primero(Manicurista), 'fecha': HOY.isoformat()},
+}
+
+
+def rutas_get(urlconf=None):
+    """[(patron, view)] de las rutas GET de la API en el URLconf"""
+    rutas = []
+    _recorrer(get_resolver(urlconf).url_patterns, [], rutas, set())
+    return rutas
+
+
+def _recorrer(patrones, prefijo, rutas, vistos):
+    for patron in patrones:
+        if isinstance(patron, URLResolver):
+            _recorrer(patron.url_patterns, prefijo + _segmentos(patron.pattern), rutas, vistos)
+            continue
+        if not isinstance(patron, URLPattern):
+            continue
+        texto = str(patron.pattern)
+        # Variantes con sufijo de formato (.json) de los routers
+        if '(?P<format>' in texto or '<drf_format_suffix' in texto:
+            continue
+
+        view = patron.callback
+        if not hasattr(view, 'cls') or issubclass(view.cls, APIRootView):
+            continue
+        segmentos = prefijo + _segmentos(patron.pattern)
+        if len(segmentos) < 2 or segmentos[0] != 'api':
+            continue
+        acciones = getattr(view, 'actions', None)
+        if not ('get' in acciones if acciones else hasattr(view.cls, 'get')):
+            continue
+        ruta = '/' + '/'.join(segmentos) + '/'
+        # Si dos patrones coinciden, Django resuelve siempre el primero
+        if ruta not in vistos:
+            vistos.add(ruta)
+            rutas.append((ruta, view))
+
+
+def _modelo(view):
+    queryset = getattr(view.cls, 'queryset', None)
+    return queryset.model if queryset is not None else None
+
+
+def _sql(capturadas):
+    return '\n'.join(f"{i}. {consulta['sql']}" for i, consulta in enumerate(capturadas.captured_queries, 1))
+
+
+class PresupuestoConsultasTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = sembrar(ESCALA_INICIAL)
+        cls.rutas = rutas_get()
+
+    def _url(self, patron, view):
+        """Ruta concreta: cada '*' se reemplaza por el pk del primer objeto del modelo del ViewSet"""
+        if COMODIN not in patron:
+            return patron
+        modelo = _modelo(view)
+        objeto = modelo.objects.order_by('pk').first() if modelo is not None else None
+        self.assertIsNotNone(objeto, f'No hay datos sembrados para {patron}')
+        return patron.replace(COMODIN, str(objeto.pk))
+
+    def _parametros(self, patron):
+        return {
+            clave: valor() if callable(valor) else valor
+            for clave, valor in PARAMETROS.get(patron, {}).items()
+        }
+
+    def _medir(self, patron, view):
+        """(status, consultas capturadas) de un GET a la ruta, sin caché de respuestas"""
+        cache.clear()
+        url = self._url(patron, view)
+        parametros = self._parametros(patron)
+        # Token real: las rutas con decoradores require_* leen el header Authorization.
+        # Los permisos del rol se precargan en la caché, como en un servidor en marcha
+        token = tokens_para_usuario(self.admin).access_token
+        permisos_de_rol(self.admin.rol_id)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        with CaptureQueriesContext(connection) as capturadas:
+            response = self.client.get(url, parametros)
+        return response.status_code, capturadas
+
+    def test_todas_las_rutas_tienen_presupuesto(self):
+        sin_presupuesto = sorted({patron for patron, _ in self.rutas} - set(PRESUPUESTOS))
+        self.assertEqual(sin_presupuesto, [], 'Rutas GET sin presupuesto de consultas declarado')
+
+    def test_presupuesto_de_consultas(self):
+        medidas = {}
+        for patron, view in self.rutas:
+            if patron in PRESUPUESTOS:
+                medidas[patron] = self._medir(patron, view)
+
+        sembrar(ESCALA_AGREGADA)
+
+        for patron, view in self.rutas:
+            if patron not in PRESUPUESTOS:
+                continue
+            presupuesto = PRESUPUESTOS[patron]
+            status_inicial, inicial = medidas[patron]
+            status_final, final = self._medir(patron, view)
+            with self.subTest(ruta=patron):
+                self.assertTrue(200 <= status_inicial < 300, f'{patron} respondió {status_inicial}')
+                self.assertTrue(200 <= status_final < 300, f'{patron} respondió {status_final}')
+                self.assertLessEqual(
+                    len(inicial), presupuesto,
+                    f'{patron}: {len(inicial)} consultas > {presupuesto}\n{_sql(inicial)}'
+                )
+                self.assertLessEqual(
+                    len(final), presupuesto,
+                    f'{patron}: {len(final)} consultas > {presupuesto} con más datos\n{_sql(final)}'
+                )
+                if status_inicial == status_final:
+                    self.assertEqual(
+                        len(final), len(inicial),
+                        f'{patron}: las consultas crecen con los datos ({len(inicial)} -> {len(final)})\n{_sql(final)}'
+                    )
@@ -0,0 +1,40 @@
+"""Programación automática: solo reprograma los días que generó ella misma"""
+from datetime import date
+
+from django.test import TestCase
+
+from api.manicuristas.models import Manicurista
+from api.novedades.models import Novedad
+from api.novedades.programacion import TURNO_OBSERVACIONES, generar_programacion
+
+
+class ProgramacionTests(TestCase):
+
+    def setUp(self):
+        self.manicurista = Manicurista.objects.create(
+            nombre='Manicurista Turnos', tipo_documento='CC', numero_documento='2000003',
+            celular='3100000003', correo='turnos@winespa.test', direccion='Calle 1',
+        )
+        self.lunes = date(2026, 3, 2)
+
+    def test_turno_registrado_a_mano_es_conflicto(self):
+        manual = Novedad.objects.create(
+            manicurista=self.manicurista, fecha=self.lunes, estado='horario', turno='cierre',
+        )
+
+        resultado = generar_programacion([self.manicurista.pk], self.lunes, 1)
+
+        self.assertEqual(resultado.conflictos, [manual])
+        manual.refresh_from_db()
+        self.assertEqual((manual.turno, manual.observaciones), ('cierre', None))
+
+    def test_reprograma_los_turnos_generados(self):
+        generar_programacion([self.manicurista.pk], self.lunes, 1)
+        Novedad.objects.filter(fecha=self.lunes).update(turno='cierre')
+
+        resultado = generar_programacion([self.manicurista.pk], self.lunes, 1)
+
+        self.assertEqual(resultado.conflictos, [])
+        self.assertEqual(len(resultado.actualizar), 1)
+        turno = Novedad.objects.get(manicurista=self.manicurista, fecha=self.lunes)
+        self.assertEqual((turno.turno, turno.observaciones), ('apertura', TURNO_OBSERVACIONES))
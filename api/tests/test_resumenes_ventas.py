@@ -0,0 +1,79 @@
+"""Resúmenes diarios de ventas: las señales deben dejar lo mismo que reconstruir_resumenes_ventas()"""
+from datetime import timedelta
+
+from django.test import TestCase
+
+from api.servicios.models import Servicio
+from api.ventaservicios.models import (
+    DetalleVentaServicio,
+    VentaDiariaManicurista,
+    VentaDiariaMetodoPago,
+    VentaDiariaServicio,
+    VentaServicio,
+    reconstruir_resumenes_ventas,
+)
+
+from .datos import sembrar
+
+
+RESUMENES = (VentaDiariaManicurista, VentaDiariaMetodoPago, VentaDiariaServicio)
+
+
+def resumenes():
+    """Filas de cada resumen, sin ids ni fechas de actualización"""
+    return {
+        modelo.__name__: sorted(
+            modelo.objects.values_list(
+                'fecha', 'estado', modelo.DIMENSION, 'cantidad', 'total',
+                *(['comision'] if modelo is VentaDiariaManicurista else [])
+            )
+        )
+        for modelo in RESUMENES
+    }
+
+
+class ResumenesVentasTests(TestCase):
+    maxDiff = None
+
+    def setUp(self):
+        sembrar(2)
+        self.venta = VentaServicio.objects.filter(detalles__isnull=False).distinct().order_by('pk').first()
+        self.detalle = self.venta.detalles.order_by('pk').first()
+
+    def assertResumenesConsistentes(self):
+        incrementales = resumenes()
+        reconstruir_resumenes_ventas()
+        self.assertEqual(incrementales, resumenes())
+
+    def test_datos_sembrados(self):
+        self.assertTrue(all(modelo.objects.exists() for modelo in RESUMENES))
+        self.assertResumenesConsistentes()
+
+    def test_editar_detalle(self):
+        self.detalle.cantidad += 2
+        self.detalle.save()
+        self.assertResumenesConsistentes()
+
+    def test_cambiar_estado(self):
+        self.venta.estado = 'cancelada'
+        self.venta.save()
+        self.assertResumenesConsistentes()
+
+    def test_cambiar_fecha(self):
+        self.venta.fecha_venta -= timedelta(days=3)
+        self.venta.save()
+        self.assertResumenesConsistentes()
+
+    def test_eliminar_detalle(self):
+        self.detalle.delete()
+        self.assertResumenesConsistentes()
+
+    def test_eliminar_venta(self):
+        self.venta.delete()
+        self.assertResumenesConsistentes()
+
+    def test_eliminar_servicio(self):
+        servicio = Servicio.objects.get(pk=self.detalle.servicio_id)
+        servicio.delete()
+        self.assertFalse(DetalleVentaServicio.objects.filter(servicio_id=servicio.pk).exists())
+        self.assertResumenesConsistentes()
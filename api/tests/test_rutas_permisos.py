@@ -0,0 +1,26 @@
+"""Permiso requerido por ruta y método en PermisosMiddleware"""
+from django.test import RequestFactory, SimpleTestCase
+
+from api.authentication.middleware import PermisosMiddleware
+from api.authentication.rutas_permisos import obtener_resolver
+
+
+class PermisoRequeridoTests(SimpleTestCase):
+
+    def setUp(self):
+        self.resolver = obtener_resolver()
+        self.middleware = PermisosMiddleware(lambda request: None)
+
+    def test_head_requiere_el_permiso_de_get(self):
+        self.assertEqual(self.resolver.permiso_requerido('/api/citas/', 'HEAD'), (True, 'citas_listar'))
+        self.assertEqual(self.resolver.permiso_requerido('/api/citas/5/', 'head'), (True, 'citas_ver_detalles'))
+        self.assertFalse(self.middleware.usuario_tiene_acceso('/api/citas/', 'HEAD', {'citas_crear'}))
+
+    def test_metodo_no_declarado_usa_el_permiso_del_prefijo(self):
+        self.assertEqual(self.resolver.permiso_requerido('/api/correos/', 'DELETE'), (False, None))
+        self.assertFalse(self.middleware.usuario_tiene_acceso('/api/correos/', 'DELETE', set()))
+        self.assertTrue(self.middleware.usuario_tiene_acceso('/api/correos/', 'DELETE', {'correos_eliminar'}))
+
+    def test_correos_exige_permiso(self):
+        self.assertEqual(self.resolver.permiso_requerido('/api/correos/', 'GET'), (True, 'correos_listar'))
+        self.assertFalse(self.middleware.usuario_tiene_acceso('/api/correos/', 'GET', set()))
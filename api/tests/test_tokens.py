@@ -0,0 +1,65 @@
+"""Claims de autorización de los tokens: solo dejan de valer si cambia lo que afirman"""
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication.permisos_cache import claims_vigentes, perfil_desde_request
+from api.authentication.tokens import tokens_para_usuario
+from api.roles.models import Rol
+from api.usuarios.models import Usuario
+
+from .datos import sembrar_catalogo
+
+
+class ClaimsVigentesTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = sembrar_catalogo()
+        self.token = AccessToken(str(tokens_para_usuario(self.admin).access_token))
+
+    def test_editar_datos_del_usuario_no_invalida_sus_tokens(self):
+        self.admin.nombre = 'Otro nombre'
+        self.admin.save()
+        Usuario.objects.get(pk=self.admin.pk).save()
+
+        self.assertTrue(claims_vigentes(self.token))
+
+    def test_cambiar_rol_invalida_solo_los_tokens_del_usuario(self):
+        otro = Usuario.objects.create_user(
+            'otro@winespa.test', 'otro12345', nombre='Otro', tipo_documento='CC',
+            documento='900000002', celular='3000000002', rol=self.admin.rol,
+        )
+        token_otro = AccessToken(str(tokens_para_usuario(otro).access_token))
+
+        otro.rol = Rol.objects.get(nombre='Manicurista')
+        otro.save()
+
+        self.assertFalse(claims_vigentes(token_otro))
+        self.assertTrue(claims_vigentes(self.token))
+
+    def test_desactivar_o_eliminar_invalida_sus_tokens(self):
+        usuario = Usuario.objects.get(pk=self.admin.pk)
+        usuario.is_active = False
+        usuario.save(update_fields=['is_active'])
+        self.assertFalse(claims_vigentes(self.token))
+
+        token = AccessToken(str(tokens_para_usuario(usuario).access_token))
+        usuario.delete()
+        self.assertFalse(claims_vigentes(token))
+
+    def test_cambio_de_permisos_invalida_todos_los_tokens(self):
+        Rol.objects.filter(nombre='Administrador').get().save()
+
+        self.assertFalse(claims_vigentes(self.token))
+
+    def test_perfil_de_un_token_viejo_no_se_usa(self):
+        request = SimpleNamespace(auth=self.token)
+        self.assertEqual(perfil_desde_request(request), ('usuario', None))
+
+        self.admin.rol = Rol.objects.get(nombre='Manicurista')
+        self.admin.save()
+
+        self.assertEqual(perfil_desde_request(request), (None, None))
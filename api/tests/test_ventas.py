@@ -0,0 +1,24 @@
+"""Totales de las ventas de servicios a partir de sus detalles"""
+from decimal import Decimal
+
+from django.test import TestCase
+
+from api.ventaservicios.models import VentaServicio
+
+from .datos import sembrar
+
+
+class TotalVentaTests(TestCase):
+
+    def setUp(self):
+        sembrar(1)
+        self.venta = VentaServicio.objects.filter(servicio__isnull=True, detalles__isnull=False).distinct().get()
+
+    def test_eliminar_todos_los_detalles_deja_el_total_en_cero(self):
+        self.assertGreater(self.venta.total, 0)
+
+        for detalle in list(self.venta.detalles.all()):
+            detalle.delete()
+
+        self.venta.refresh_from_db()
+        self.assertEqual(self.venta.total, Decimal('0.00') - self.venta.descuento)
@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenRefreshView
+from api.base.views import metricas_prometheus
 
 urlpatterns = [
     # Sistema de autenticación unificado
@@ -17,10 +18,12 @@ urlpatterns = [
     
     # Restaurar todas las URLs que faltaban
     path('abastecimientos/', include('api.abastecimientos.urls')),
+    path('buscar/', include('api.busqueda.urls')),
     path('categoria-insumos/', include('api.categoriainsumos.urls')),
     path('citas/', include('api.citas.urls')),
     path('compras/', include('api.compras.urls')),
     path('compra-insumo/', include('api.comprahasinsumos.urls')),
+    path('correos/', include('api.correos.urls')),
     path('insumos/', include('api.insumos.urls')),
     path('insumo-abastecimiento/', include('api.insumoshasabastecimientos.urls')),
     path('liquidaciones/', include('api.liquidaciones.urls')),
@@ -28,4 +31,7 @@ urlpatterns = [
     path('proveedores/', include('api.proveedores.urls')),
     path('servicios/', include('api.servicios.urls')),
     path('venta-servicios/', include('api.ventaservicios.urls')),
+    
+    # Métricas de rendimiento (Prometheus)
+    path('_metrics', metricas_prometheus, name='metricas'),
 ]
\ No newline at end of file
@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from api.base.serializers import CamposDinamicosMixin
 from api.usuarios.models import Usuario
 from api.roles.models import Rol
 from api.roles.serializers import RolSerializer
 
-class UsuarioSerializer(serializers.ModelSerializer):
+class UsuarioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     password = serializers.CharField(
         write_only=True,
         required=False,  # No requerido para permitir generación automática
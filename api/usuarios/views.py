@@ -3,7 +3,7 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.contrib.auth.hashers import make_password
 from django.db import transaction
-from django.core.mail import send_mail
+from api.correos.cola import encolar_correo
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
@@ -209,19 +209,17 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         ¡Gracias y bienvenido al equipo!
         """
         
-        send_mail(
+        encolar_correo(
             asunto,
             mensaje_texto,
-            settings.DEFAULT_FROM_EMAIL,
             [usuario.correo_electronico],
             html_message=mensaje_html,
-            fail_silently=False,
         )
 
     # --- Acciones Personalizadas ---
     @action(detail=False, methods=['get'], url_path='detallado')
     def list_detail(self, request):
-        usuarios = self.get_queryset()
+        usuarios = self.get_queryset().select_related('rol')
         serializer = UsuarioDetailSerializer(usuarios, many=True, context={'request': request})
         return Response(serializer.data)
     
@@ -406,13 +404,11 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         ¡Tu cuenta está segura!
         """
         
-        send_mail(
+        encolar_correo(
             asunto,
             mensaje_texto,
-            settings.DEFAULT_FROM_EMAIL,
             [usuario.correo_electronico],
             html_message=mensaje_html,
-            fail_silently=False,
         )
             
     @action(detail=True, methods=['post'], url_path='cambiar-password')
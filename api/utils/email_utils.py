@@ -1,15 +1,14 @@
-from django.core.mail import send_mail
+from api.correos.cola import encolar_correo
 from django.conf import settings
 
 def enviar_correo(destinatario, asunto, mensaje):
-    """Envía un correo electrónico"""
+    """Encola un correo electrónico para el worker procesar_correos"""
     try:
-        send_mail(
-            subject=asunto,
-            message=mensaje,
+        encolar_correo(
+            asunto=asunto,
+            mensaje=mensaje,
+            destinatarios=[destinatario],
             from_email=settings.EMAIL_HOST_USER,
-            recipient_list=[destinatario],
-            fail_silently=False,
         )
         return True
     except Exception as e:
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('citas', '0004_cita_cita_manic_fecha_estado_idx_and_more'),
+        ('clientes', '0002_initial'),
+        ('manicuristas', '0002_initial'),
+        ('servicios', '0001_initial'),
+        ('ventaservicios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ventaservicio',
+            index=models.Index(fields=['estado', 'fecha_venta'], name='venta_estado_fecha_idx'),
+        ),
+    ]
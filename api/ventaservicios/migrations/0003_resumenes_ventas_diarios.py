@@ -0,0 +1,122 @@
+# Generated by Django 5.2 on 2026-10-18 03:03
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def poblar_resumenes(apps, schema_editor):
+    VentaServicio = apps.get_model('ventaservicios', 'VentaServicio')
+    DetalleVentaServicio = apps.get_model('ventaservicios', 'DetalleVentaServicio')
+    VentaDiariaManicurista = apps.get_model('ventaservicios', 'VentaDiariaManicurista')
+    VentaDiariaMetodoPago = apps.get_model('ventaservicios', 'VentaDiariaMetodoPago')
+    VentaDiariaServicio = apps.get_model('ventaservicios', 'VentaDiariaServicio')
+
+    por_manicurista = VentaServicio.objects.order_by().values(
+        'manicurista_id', 'estado', dia=F('fecha_venta__date')
+    ).annotate(cantidad=Count('id'), suma_total=Sum('total'), suma_comision=Sum('comision_manicurista'))
+    VentaDiariaManicurista.objects.bulk_create([
+        VentaDiariaManicurista(
+            fecha=fila['dia'], estado=fila['estado'], manicurista_id=fila['manicurista_id'],
+            cantidad=fila['cantidad'], total=fila['suma_total'] or Decimal('0.00'),
+            comision=fila['suma_comision'] or Decimal('0.00'),
+        )
+        for fila in por_manicurista
+    ], batch_size=500)
+
+    por_metodo = VentaServicio.objects.order_by().values(
+        'metodo_pago', 'estado', dia=F('fecha_venta__date')
+    ).annotate(cantidad=Count('id'), suma_total=Sum('total'))
+    VentaDiariaMetodoPago.objects.bulk_create([
+        VentaDiariaMetodoPago(
+            fecha=fila['dia'], estado=fila['estado'], metodo_pago=fila['metodo_pago'],
+            cantidad=fila['cantidad'], total=fila['suma_total'] or Decimal('0.00'),
+        )
+        for fila in por_metodo
+    ], batch_size=500)
+
+    por_servicio = DetalleVentaServicio.objects.order_by().values(
+        'servicio_id', estado=F('venta__estado'), dia=F('venta__fecha_venta__date')
+    ).annotate(suma_cantidad=Sum('cantidad'), suma_total=Sum('subtotal'))
+    VentaDiariaServicio.objects.bulk_create([
+        VentaDiariaServicio(
+            fecha=fila['dia'], estado=fila['estado'], servicio_id=fila['servicio_id'],
+            cantidad=fila['suma_cantidad'] or 0, total=fila['suma_total'] or Decimal('0.00'),
+        )
+        for fila in por_servicio
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manicuristas', '0002_initial'),
+        ('servicios', '0001_initial'),
+        ('ventaservicios', '0002_ventaservicio_venta_estado_fecha_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaDiariaMetodoPago',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('pagada', 'Pagada'), ('cancelada', 'Cancelada')], max_length=20)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('metodo_pago', models.CharField(choices=[('efectivo', 'Efectivo'), ('transferencia', 'Transferencia')], max_length=20)),
+            ],
+            options={
+                'verbose_name': 'Venta diaria por método de pago',
+                'verbose_name_plural': 'Ventas diarias por método de pago',
+                'db_table': 'venta_diaria_metodo_pago',
+                'ordering': ['-fecha'],
+                'abstract': False,
+                'unique_together': {('fecha', 'metodo_pago', 'estado')},
+            },
+        ),
+        migrations.CreateModel(
+            name='VentaDiariaManicurista',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('pagada', 'Pagada'), ('cancelada', 'Cancelada')], max_length=20)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('comision', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('manicurista', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas_diarias', to='manicuristas.manicurista')),
+            ],
+            options={
+                'verbose_name': 'Venta diaria por manicurista',
+                'verbose_name_plural': 'Ventas diarias por manicurista',
+                'db_table': 'venta_diaria_manicurista',
+                'ordering': ['-fecha'],
+                'abstract': False,
+                'unique_together': {('fecha', 'manicurista', 'estado')},
+            },
+        ),
+        migrations.CreateModel(
+            name='VentaDiariaServicio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('pagada', 'Pagada'), ('cancelada', 'Cancelada')], max_length=20)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('servicio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas_diarias', to='servicios.servicio')),
+            ],
+            options={
+                'verbose_name': 'Venta diaria por servicio',
+                'verbose_name_plural': 'Ventas diarias por servicio',
+                'db_table': 'venta_diaria_servicio',
+                'ordering': ['-fecha'],
+                'abstract': False,
+                'unique_together': {('fecha', 'servicio', 'estado')},
+            },
+        ),
+        migrations.RunPython(poblar_resumenes, migrations.RunPython.noop),
+    ]
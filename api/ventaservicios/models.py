@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Q, Sum, Count
 from django.utils import timezone
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
@@ -7,6 +8,8 @@ from api.clientes.models import Cliente
 from api.servicios.models import Servicio
 from api.manicuristas.models import Manicurista
 from decimal import Decimal
+from contextlib import contextmanager
+from contextvars import ContextVar
 
 
 class VentaServicio(BaseModel):
@@ -146,6 +149,9 @@ class VentaServicio(BaseModel):
         verbose_name = "Venta de Servicio"
         verbose_name_plural = "Ventas de Servicios"
         ordering = ['-fecha_venta']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_venta'], name='venta_estado_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"Venta {self.id} - {self.cliente.nombre}" # Modificado para no depender de self.servicio
@@ -186,10 +192,11 @@ class VentaServicio(BaseModel):
                 else:
                     self.total = Decimal('0.00')
         else:
-            # Solo verificar detalles si la instancia ya existe
-            if hasattr(self, 'detalles') and self.detalles.exists():
-                # Si hay detalles, el total se recalcula en la señal post_save de DetalleVentaServicio
-                self.total = sum(detalle.subtotal for detalle in self.detalles.all()) - self.descuento
+            # Solo verificar detalles si la instancia ya existe (un solo SUM en la BD)
+            subtotal_detalles = self.detalles.aggregate(total=Sum('subtotal'))['total']
+            if subtotal_detalles is not None:
+                # Si hay detalles, el total es la suma de sus subtotales
+                self.total = subtotal_detalles - self.descuento
             elif self.servicio and self.precio_unitario and self.cantidad:
                 # Si no hay detalles, usar el servicio principal
                 if not self.precio_unitario:
@@ -206,6 +213,36 @@ class VentaServicio(BaseModel):
         
         super().save(*args, **kwargs)
 
+    def recalcular_total(self):
+        """Recalcula total y comisión desde los detalles y los guarda"""
+        # Sin detalles ni servicio principal el total queda en 0 menos el descuento;
+        # save() lo reemplaza por la suma de los detalles o el precio del servicio
+        self.total = Decimal('0.00') - self.descuento
+        self.save(update_fields=['total', 'comision_manicurista'])
+
+    def agregar_detalles(self, detalles):
+        """
+        Crea los detalles de la venta con un solo INSERT y recalcula el total y la
+        comisión una sola vez. bulk_create no dispara las señales por detalle, así
+        que el resumen diario por servicio se actualiza aquí mismo.
+        """
+        nuevos = []
+        for datos in detalles:
+            detalle = DetalleVentaServicio(venta=self, **datos)
+            detalle.calcular_subtotal()
+            nuevos.append(detalle)
+        if not nuevos:
+            return nuevos
+
+        with transaction.atomic():
+            DetalleVentaServicio.objects.bulk_create(nuevos)
+            _aplicar_diferencia({}, _aportes_detalles(
+                fecha_resumen(self.fecha_venta), self.estado,
+                [(detalle.servicio_id, detalle.cantidad, detalle.subtotal) for detalle in nuevos]
+            ))
+            self.recalcular_total()
+        return nuevos
+
     def sincronizar_con_citas(self):
         """Sincronizar información con las citas asociadas"""
         citas_asociadas = self.citas.all()
@@ -334,8 +371,7 @@ class DetalleVentaServicio(BaseModel):
     def __str__(self):
         return f"Detalle {self.venta.id} - {self.servicio.nombre}"
 
-    def save(self, *args, **kwargs):
-        # Calcular subtotal automáticamente
+    def calcular_subtotal(self):
         if self.precio_unitario is None and self.servicio:
             self.precio_unitario = self.servicio.precio
         
@@ -343,31 +379,385 @@ class DetalleVentaServicio(BaseModel):
             self.subtotal = (self.precio_unitario * self.cantidad) - self.descuento_linea
         else:
             self.subtotal = Decimal('0.00') # Asegurar un valor por defecto
-        
+
+    def save(self, *args, **kwargs):
+        # Calcular subtotal automáticamente
+        self.calcular_subtotal()
         super().save(*args, **kwargs)
 
 
 # Señales para actualizar totales automáticamente
-from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 
+# Ventas cuyo total se recalcula al final de un bloque total_diferido()
+_ventas_con_total_diferido = ContextVar('ventas_con_total_diferido', default=frozenset())
+
+
+@contextmanager
+def total_diferido(venta, recalcular=True):
+    """
+    Suspende el recálculo del total de la venta en cada escritura de detalle
+    dentro del bloque y, si recalcular es True, lo hace una sola vez al salir.
+    """
+    token = _ventas_con_total_diferido.set(_ventas_con_total_diferido.get() | {venta.pk})
+    try:
+        yield venta
+    finally:
+        _ventas_con_total_diferido.reset(token)
+    if recalcular:
+        venta.recalcular_total()
+
+
 @receiver(post_save, sender=DetalleVentaServicio)
 @receiver(post_delete, sender=DetalleVentaServicio)
 def actualizar_total_venta(sender, instance, **kwargs):
-    """Actualiza el total de la venta cuando se modifican los detalles"""
+    """Actualiza el total de la venta cuando se modifica un detalle suelto"""
+    origen = kwargs.get('origin')
+    if origen is not None and getattr(origen, 'model', type(origen)) not in (DetalleVentaServicio, Servicio):
+        return  # Borrado en cascada desde la venta (o su cliente/manicurista): la venta también se elimina
+    if instance.venta_id in _ventas_con_total_diferido.get():
+        return
     if hasattr(instance, 'venta') and instance.venta:
-        venta = instance.venta
-        total_detalles = sum(detalle.subtotal for detalle in venta.detalles.all())
-        
-        # Actualizar el total de la venta principal y la comisión
-        venta.total = total_detalles - venta.descuento # Considerar el descuento general de la venta
-        if venta.porcentaje_comision is not None and venta.total is not None:
-            venta.comision_manicurista = (venta.total * venta.porcentaje_comision) / 100
-        
-        venta.save(update_fields=['total', 'comision_manicurista'])
+        # Total (suma de detalles menos el descuento general) y comisión
+        instance.venta.recalcular_total()
 
 @receiver(m2m_changed, sender=VentaServicio.citas.through)
 def sincronizar_fecha_con_citas(sender, instance, action, **kwargs):
     """Sincronizar fecha de venta cuando se modifican las citas asociadas"""
     if action in ['post_add', 'post_remove', 'post_clear']:
         instance.sincronizar_con_citas()
+
+
+class ResumenVentaDiario(models.Model):
+    """
+    Base de los resúmenes diarios de ventas. Cada fila acumula las ventas de un
+    día (fecha local de fecha_venta) y un estado de venta para una dimensión.
+    Se mantienen de forma incremental con las señales de VentaServicio y
+    DetalleVentaServicio (ver más abajo) para que los reportes sumen unas pocas
+    filas por día en lugar de recorrer todas las ventas. Si las ventas se
+    modifican con QuerySet.update() u otro medio que no dispare señales, usar el
+    comando reconstruir_resumenes_ventas.
+    """
+    DIMENSION = None
+
+    fecha = models.DateField()
+    estado = models.CharField(max_length=20, choices=VentaServicio.ESTADO_CHOICES)
+    cantidad = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+        ordering = ['-fecha']
+
+    @classmethod
+    def registrar(cls, claves, cantidad, total, comision=None):
+        """Suma (o resta, con valores negativos) a la fila del día identificada por claves"""
+        cambios = {
+            'cantidad': F('cantidad') + cantidad,
+            'total': F('total') + total,
+            'fecha_actualizacion': timezone.now(),
+        }
+        if comision is not None:
+            cambios['comision'] = F('comision') + comision
+        filas = cls.objects.filter(**claves)
+        if filas.update(**cambios):
+            if cantidad < 0:
+                # La fila quedó sin ventas: se elimina para no listar días vacíos
+                filas.filter(cantidad__lte=0).delete()
+            return
+        if cantidad <= 0:
+            # Nada que descontar: la fila ya no existe (p. ej. se borró en cascada con su servicio)
+            return
+        valores = {'cantidad': cantidad, 'total': total}
+        if comision is not None:
+            valores['comision'] = comision
+        try:
+            with transaction.atomic():
+                cls.objects.create(**claves, **valores)
+        except IntegrityError:
+            # Otra petición creó la fila al mismo tiempo
+            filas.update(**cambios)
+
+
+    @classmethod
+    def registrar_lote(cls, movimientos):
+        """
+        registrar() para varias filas [(claves, cantidad, total, comision)]: las
+        filas que aún no existen se crean con un solo INSERT y las demás se
+        actualizan con F() una por una.
+        """
+        if len(movimientos) == 1:
+            cls.registrar(*movimientos[0])
+            return
+
+        campos = ('fecha', 'estado', cls.DIMENSION)
+        filtro = Q()
+        for claves, *_ in movimientos:
+            filtro |= Q(**claves)
+        existentes = set(cls.objects.filter(filtro).values_list(*campos))
+
+        nuevos = []
+        for claves, cantidad, total, comision in movimientos:
+            if tuple(claves[campo] for campo in campos) in existentes:
+                cls.registrar(claves, cantidad, total, comision)
+            elif cantidad > 0:
+                nuevos.append((claves, cantidad, total, comision))
+        if not nuevos:
+            return
+
+        try:
+            with transaction.atomic():
+                cls.objects.bulk_create([
+                    cls(**claves, cantidad=cantidad, total=total,
+                        **({'comision': comision} if comision is not None else {}))
+                    for claves, cantidad, total, comision in nuevos
+                ])
+        except IntegrityError:
+            # Otra petición creó alguna de las filas al mismo tiempo
+            for movimiento in nuevos:
+                cls.registrar(*movimiento)
+
+
+class VentaDiariaManicurista(ResumenVentaDiario):
+    """Ventas por día, manicurista y estado (cantidad = número de ventas)"""
+    DIMENSION = 'manicurista_id'
+
+    manicurista = models.ForeignKey(
+        Manicurista,
+        on_delete=models.CASCADE,
+        related_name='ventas_diarias'
+    )
+    comision = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta(ResumenVentaDiario.Meta):
+        db_table = 'venta_diaria_manicurista'
+        verbose_name = 'Venta diaria por manicurista'
+        verbose_name_plural = 'Ventas diarias por manicurista'
+        unique_together = ['fecha', 'manicurista', 'estado']
+
+
+class VentaDiariaServicio(ResumenVentaDiario):
+    """Detalles vendidos por día, servicio y estado (cantidad = unidades vendidas)"""
+    DIMENSION = 'servicio_id'
+
+    servicio = models.ForeignKey(
+        Servicio,
+        on_delete=models.CASCADE,
+        related_name='ventas_diarias'
+    )
+
+    class Meta(ResumenVentaDiario.Meta):
+        db_table = 'venta_diaria_servicio'
+        verbose_name = 'Venta diaria por servicio'
+        verbose_name_plural = 'Ventas diarias por servicio'
+        unique_together = ['fecha', 'servicio', 'estado']
+
+
+class VentaDiariaMetodoPago(ResumenVentaDiario):
+    """Ventas por día, método de pago y estado (cantidad = número de ventas)"""
+    DIMENSION = 'metodo_pago'
+
+    metodo_pago = models.CharField(max_length=20, choices=VentaServicio.METODO_PAGO_CHOICES)
+
+    class Meta(ResumenVentaDiario.Meta):
+        db_table = 'venta_diaria_metodo_pago'
+        verbose_name = 'Venta diaria por método de pago'
+        verbose_name_plural = 'Ventas diarias por método de pago'
+        unique_together = ['fecha', 'metodo_pago', 'estado']
+
+
+def fecha_resumen(fecha_venta):
+    """Día (en la zona horaria local) al que se asigna una venta en los resúmenes"""
+    if timezone.is_aware(fecha_venta):
+        return timezone.localdate(fecha_venta)
+    return fecha_venta.date()
+
+
+def reconstruir_resumenes_ventas(fecha_inicio=None, fecha_final=None):
+    """Recalcula los resúmenes diarios desde las ventas. Retorna las filas creadas."""
+    ventas = VentaServicio.objects.all()
+    detalles = DetalleVentaServicio.objects.all()
+    if fecha_inicio:
+        ventas = ventas.filter(fecha_venta__date__gte=fecha_inicio)
+        detalles = detalles.filter(venta__fecha_venta__date__gte=fecha_inicio)
+    if fecha_final:
+        ventas = ventas.filter(fecha_venta__date__lte=fecha_final)
+        detalles = detalles.filter(venta__fecha_venta__date__lte=fecha_final)
+
+    agrupados = [
+        (VentaDiariaManicurista, ventas.order_by().values(
+            'manicurista_id', 'estado', dia=models.F('fecha_venta__date')
+        ).annotate(suma_cantidad=Count('id'), suma_total=Sum('total'), suma_comision=Sum('comision_manicurista'))),
+        (VentaDiariaMetodoPago, ventas.order_by().values(
+            'metodo_pago', 'estado', dia=models.F('fecha_venta__date')
+        ).annotate(suma_cantidad=Count('id'), suma_total=Sum('total'))),
+        (VentaDiariaServicio, detalles.order_by().values(
+            'servicio_id', estado=models.F('venta__estado'), dia=models.F('venta__fecha_venta__date')
+        ).annotate(suma_cantidad=Sum('cantidad'), suma_total=Sum('subtotal'))),
+    ]
+
+    creadas = 0
+    with transaction.atomic():
+        for modelo, agrupado in agrupados:
+            filas = modelo.objects.all()
+            if fecha_inicio:
+                filas = filas.filter(fecha__gte=fecha_inicio)
+            if fecha_final:
+                filas = filas.filter(fecha__lte=fecha_final)
+            nuevas = []
+            for fila in agrupado:
+                valores = {
+                    'fecha': fila['dia'],
+                    'estado': fila['estado'],
+                    modelo.DIMENSION: fila[modelo.DIMENSION],
+                    'cantidad': fila['suma_cantidad'] or 0,
+                    'total': fila['suma_total'] or Decimal('0.00'),
+                }
+                if 'suma_comision' in fila:
+                    valores['comision'] = fila['suma_comision'] or Decimal('0.00')
+                nuevas.append(modelo(**valores))
+            filas.delete()
+            modelo.objects.bulk_create(nuevas, batch_size=500)
+            creadas += len(nuevas)
+    return creadas
+
+
+# Señales para mantener los resúmenes diarios al día.
+# VentaServicio aporta a los resúmenes por manicurista y método de pago;
+# cada DetalleVentaServicio aporta al resumen por servicio bajo el día y estado de su venta.
+
+def _aportes_venta(fecha_venta, estado, manicurista_id, metodo_pago, total, comision):
+    """{(modelo, claves): (cantidad, total, comision)} con que la venta aporta a los resúmenes"""
+    fecha = fecha_resumen(fecha_venta)
+    total = Decimal(total or 0)
+    return {
+        (VentaDiariaManicurista, (('fecha', fecha), ('estado', estado), ('manicurista_id', manicurista_id))):
+            (1, total, Decimal(comision or 0)),
+        (VentaDiariaMetodoPago, (('fecha', fecha), ('estado', estado), ('metodo_pago', metodo_pago))):
+            (1, total, None),
+    }
+
+
+def _aportes_detalles(fecha, estado, detalles):
+    """Aportes al resumen por servicio de los detalles [(servicio_id, cantidad, subtotal)]"""
+    aportes = {}
+    for servicio_id, cantidad, subtotal in detalles:
+        clave = (VentaDiariaServicio, (('fecha', fecha), ('estado', estado), ('servicio_id', servicio_id)))
+        anterior = aportes.get(clave, (0, Decimal('0.00'), None))
+        aportes[clave] = (anterior[0] + cantidad, anterior[1] + Decimal(subtotal or 0), None)
+    return aportes
+
+
+def _aplicar_diferencia(anteriores, actuales):
+    """Registra en los resúmenes la diferencia entre dos conjuntos de aportes"""
+    movimientos = {}
+    for clave in anteriores.keys() | actuales.keys():
+        cantidad, total, comision = actuales.get(clave, (0, Decimal('0.00'), None))
+        cantidad_ant, total_ant, comision_ant = anteriores.get(clave, (0, Decimal('0.00'), None))
+        delta_comision = None
+        if comision is not None or comision_ant is not None:
+            delta_comision = (comision or 0) - (comision_ant or 0)
+        if cantidad == cantidad_ant and total == total_ant and not delta_comision:
+            continue
+        modelo, claves = clave
+        movimientos.setdefault(modelo, []).append(
+            (dict(claves), cantidad - cantidad_ant, total - total_ant, delta_comision)
+        )
+    for modelo, movimientos_modelo in movimientos.items():
+        modelo.registrar_lote(movimientos_modelo)
+
+
+@receiver(pre_save, sender=VentaServicio)
+def guardar_aportes_anteriores_venta(sender, instance, raw=False, **kwargs):
+    instance._aportes_resumen_anteriores = {}
+    instance._dia_resumen_anterior = None
+    if raw or not instance.pk:
+        return
+    anterior = VentaServicio.objects.filter(pk=instance.pk).values(
+        'fecha_venta', 'estado', 'manicurista_id', 'metodo_pago', 'total', 'comision_manicurista'
+    ).first()
+    if anterior:
+        instance._aportes_resumen_anteriores = _aportes_venta(
+            anterior['fecha_venta'], anterior['estado'], anterior['manicurista_id'],
+            anterior['metodo_pago'], anterior['total'], anterior['comision_manicurista']
+        )
+        instance._dia_resumen_anterior = (fecha_resumen(anterior['fecha_venta']), anterior['estado'])
+
+
+@receiver(post_save, sender=VentaServicio)
+def actualizar_resumenes_por_venta(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _aplicar_diferencia(
+        getattr(instance, '_aportes_resumen_anteriores', {}),
+        _aportes_venta(
+            instance.fecha_venta, instance.estado, instance.manicurista_id,
+            instance.metodo_pago, instance.total, instance.comision_manicurista
+        )
+    )
+    # Si cambió el día o el estado, los detalles pasan a la fila correspondiente
+    dia_anterior = getattr(instance, '_dia_resumen_anterior', None)
+    dia_actual = (fecha_resumen(instance.fecha_venta), instance.estado)
+    if dia_anterior and dia_anterior != dia_actual:
+        detalles = list(instance.detalles.values_list('servicio_id', 'cantidad', 'subtotal'))
+        if detalles:
+            _aplicar_diferencia(
+                _aportes_detalles(*dia_anterior, detalles),
+                _aportes_detalles(*dia_actual, detalles)
+            )
+
+
+@receiver(post_delete, sender=VentaServicio)
+def descontar_resumenes_por_venta(sender, instance, **kwargs):
+    _aplicar_diferencia(
+        _aportes_venta(
+            instance.fecha_venta, instance.estado, instance.manicurista_id,
+            instance.metodo_pago, instance.total, instance.comision_manicurista
+        ),
+        {}
+    )
+
+
+def _dia_venta(venta_id):
+    venta = VentaServicio.objects.filter(pk=venta_id).values('fecha_venta', 'estado').first()
+    if venta is None:
+        return None
+    return (fecha_resumen(venta['fecha_venta']), venta['estado'])
+
+
+@receiver(pre_save, sender=DetalleVentaServicio)
+def guardar_aporte_anterior_detalle(sender, instance, raw=False, **kwargs):
+    instance._detalle_resumen_anterior = None
+    if raw or not instance.pk:
+        return
+    instance._detalle_resumen_anterior = DetalleVentaServicio.objects.filter(pk=instance.pk).values_list(
+        'venta_id', 'servicio_id', 'cantidad', 'subtotal'
+    ).first()
+
+
+@receiver(post_save, sender=DetalleVentaServicio)
+def actualizar_resumen_por_detalle(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = getattr(instance, '_detalle_resumen_anterior', None)
+    actual = (instance.venta_id, instance.servicio_id, instance.cantidad, instance.subtotal)
+    if anterior == actual:
+        return
+    aportes_anteriores = {}
+    if anterior:
+        dia = _dia_venta(anterior[0])
+        if dia:
+            aportes_anteriores = _aportes_detalles(*dia, [anterior[1:]])
+    dia = _dia_venta(instance.venta_id)
+    _aplicar_diferencia(aportes_anteriores, _aportes_detalles(*dia, [actual[1:]]) if dia else {})
+
+
+@receiver(post_delete, sender=DetalleVentaServicio)
+def descontar_resumen_por_detalle(sender, instance, **kwargs):
+    dia = _dia_venta(instance.venta_id)
+    if dia:
+        _aplicar_diferencia(
+            _aportes_detalles(*dia, [(instance.servicio_id, instance.cantidad, instance.subtotal)]), {}
+        )
@@ -1,6 +1,7 @@
 from rest_framework import serializers
+from api.base.serializers import CamposDinamicosMixin
 from django.utils import timezone
-from .models import VentaServicio, DetalleVentaServicio
+from .models import VentaServicio, DetalleVentaServicio, total_diferido
 from api.clientes.serializers import ClienteSerializer
 from api.servicios.serializers import ServicioSerializer
 from api.manicuristas.serializers import ManicuristaSerializer
@@ -12,6 +13,8 @@ class DetalleVentaServicioSerializer(serializers.ModelSerializer):
     class Meta:
         model = DetalleVentaServicio
         fields = '__all__'
+        # La venta se asigna al crear los detalles anidados en VentaServicioCreateSerializer
+        extra_kwargs = {'venta': {'read_only': True}}
 
     def validate(self, data):
         """Validar que el subtotal sea correcto"""
@@ -32,7 +35,7 @@ class DetalleVentaServicioSerializer(serializers.ModelSerializer):
         return data
 
 
-class VentaServicioSerializer(serializers.ModelSerializer):
+class VentaServicioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     # Campos de solo lectura para mostrar información completa
     cliente_info = ClienteSerializer(source='cliente', read_only=True)
     manicurista_info = ManicuristaSerializer(source='manicurista', read_only=True)
@@ -71,7 +74,7 @@ class VentaServicioSerializer(serializers.ModelSerializer):
 
     def get_citas_ids(self, obj):
         """Obtener IDs de las citas asociadas"""
-        return list(obj.citas.values_list('id', flat=True))
+        return [cita.id for cita in obj.citas.all()]
 
     def get_fecha_para_mostrar(self, obj):
         """Obtener fecha formateada"""
@@ -195,9 +198,8 @@ class VentaServicioCreateSerializer(serializers.ModelSerializer):
         # Crear la venta principal
         venta = VentaServicio.objects.create(**validated_data)
         
-        # Crear los detalles de la venta
-        for detalle_data in detalles_data:
-            DetalleVentaServicio.objects.create(venta=venta, **detalle_data)
+        # Crear los detalles de la venta (un solo INSERT y un solo recálculo del total)
+        venta.agregar_detalles(detalles_data)
         
         # Asignar citas si se proporcionaron
         if citas_ids:
@@ -216,7 +218,6 @@ class VentaServicioCreateSerializer(serializers.ModelSerializer):
             except ImportError:
                 pass
         
-        # La señal post_save de DetalleVentaServicio se encargará de actualizar el total de la venta
         return venta
 
     def update(self, instance, validated_data):
@@ -230,26 +231,28 @@ class VentaServicioCreateSerializer(serializers.ModelSerializer):
         
         # Actualizar detalles de la venta
         if detalles_data is not None:
-            # Eliminar detalles existentes que no estén en los nuevos datos
-            detalle_ids_existentes = [d.id for d in instance.detalles.all()]
-            detalle_ids_enviados = [d.get('id') for d in detalles_data if d.get('id')]
+            # El total se recalcula una sola vez en instance.save() al final
+            with total_diferido(instance, recalcular=False):
+                # Eliminar detalles existentes que no estén en los nuevos datos
+                detalle_ids_existentes = [d.id for d in instance.detalles.all()]
+                detalle_ids_enviados = [d.get('id') for d in detalles_data if d.get('id')]
 
-            # Eliminar detalles que ya no están en la lista enviada
-            for detalle_id in set(detalle_ids_existentes) - set(detalle_ids_enviados):
-                instance.detalles.filter(id=detalle_id).delete()
+                # Eliminar detalles que ya no están en la lista enviada
+                for detalle_id in set(detalle_ids_existentes) - set(detalle_ids_enviados):
+                    instance.detalles.filter(id=detalle_id).delete()
 
-            # Crear o actualizar detalles
-            for detalle_data in detalles_data:
-                detalle_id = detalle_data.get('id')
-                if detalle_id:
-                    # Actualizar detalle existente
-                    detalle_instance = instance.detalles.get(id=detalle_id)
-                    for attr, value in detalle_data.items():
-                        setattr(detalle_instance, attr, value)
-                    detalle_instance.save()
-                else:
-                    # Crear nuevo detalle
-                    DetalleVentaServicio.objects.create(venta=instance, **detalle_data)
+                # Crear o actualizar detalles
+                for detalle_data in detalles_data:
+                    detalle_id = detalle_data.get('id')
+                    if detalle_id:
+                        # Actualizar detalle existente
+                        detalle_instance = instance.detalles.get(id=detalle_id)
+                        for attr, value in detalle_data.items():
+                            setattr(detalle_instance, attr, value)
+                        detalle_instance.save()
+                    else:
+                        # Crear nuevo detalle
+                        DetalleVentaServicio.objects.create(venta=instance, **detalle_data)
         
         # Actualizar citas si se proporcionaron
         if citas_ids is not None:
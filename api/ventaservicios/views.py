@@ -1,16 +1,24 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from django.db.models import Q, Count, Sum, Avg
+from django.db.models import Q, Count, Sum, Avg, Prefetch
 from django.utils import timezone
 from datetime import datetime, timedelta
-from .models import VentaServicio, DetalleVentaServicio
+from api.base.estadisticas import estadisticas_en_cache
+from .models import (
+    VentaServicio,
+    DetalleVentaServicio,
+    VentaDiariaManicurista,
+    VentaDiariaServicio,
+    VentaDiariaMetodoPago
+)
 from .serializers import (
     VentaServicioSerializer,
     VentaServicioCreateSerializer,
     VentaServicioUpdateEstadoSerializer,
     DetalleVentaServicioSerializer
 )
+from api.citas.models import Cita
 
 
 class VentaServicioViewSet(viewsets.ModelViewSet):
@@ -28,9 +36,48 @@ class VentaServicioViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filtrar ventas según parámetros de consulta"""
         queryset = VentaServicio.objects.select_related(
-            'cliente', 'manicurista', 'cita' # 'servicio' ya no es el principal
-        ).prefetch_related('citas', 'detalles__servicio').all() # Cargar detalles y sus servicios
-        
+            'cliente', 'manicurista', 'cita', 'servicio' # 'servicio' ya no es el principal, pero se serializa
+        ).prefetch_related(
+            # citas_info serializa cada cita con su cliente, manicurista y servicios
+            Prefetch('citas', queryset=Cita.objects.select_related(
+                'cliente', 'manicurista', 'servicio'
+            ).prefetch_related('servicios')),
+            'detalles__servicio'
+        ).all() # Cargar detalles y sus servicios
+        return self.filtrar_queryset(queryset).order_by('-fecha_venta')
+
+    def filtrar_resumen(self, modelo):
+        """
+        Resumen diario (VentaDiaria*) con los filtros de la consulta aplicados, o
+        None si algún filtro no se puede resolver con ese resumen.
+        """
+        params = self.request.query_params
+        if params.get('cliente'):
+            return None
+
+        queryset = modelo.objects.all()
+        for parametro, campo in (('manicurista', 'manicurista_id'), ('metodo_pago', 'metodo_pago')):
+            valor = params.get(parametro)
+            if valor:
+                if modelo.DIMENSION != campo:
+                    return None
+                queryset = queryset.filter(**{campo: valor})
+
+        estado = params.get('estado')
+        if estado:
+            queryset = queryset.filter(estado=estado)
+
+        for parametro, lookup in (('fecha_desde', 'fecha__gte'), ('fecha_hasta', 'fecha__lte')):
+            valor = params.get(parametro)
+            if valor:
+                try:
+                    queryset = queryset.filter(**{lookup: datetime.strptime(valor, '%Y-%m-%d').date()})
+                except ValueError:
+                    pass
+        return queryset
+
+    def filtrar_queryset(self, queryset):
+        """Aplicar los filtros de la consulta (sin joins ni orden)"""
         # Filtros
         estado = self.request.query_params.get('estado')
         fecha_desde = self.request.query_params.get('fecha_desde')
@@ -65,7 +112,7 @@ class VentaServicioViewSet(viewsets.ModelViewSet):
         if metodo_pago:
             queryset = queryset.filter(metodo_pago=metodo_pago)
         
-        return queryset.order_by('-fecha_venta')
+        return queryset
 
     def create(self, request, *args, **kwargs):
         """Crear nueva venta con múltiples citas y detalles de servicio"""
@@ -155,98 +202,122 @@ class VentaServicioViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
         """Obtener estadísticas de ventas"""
+        return Response(estadisticas_en_cache('ventas', request, self._calcular_estadisticas))
+
+    def _calcular_estadisticas(self):
         hoy = timezone.now().date()
         inicio_mes = hoy.replace(day=1)
-        
-        # Estadísticas generales
-        total_ventas = self.get_queryset().count()
-        ventas_hoy = self.get_queryset().filter(fecha_venta__date=hoy).count()
-        ventas_pendientes = self.get_queryset().filter(estado='pendiente').count()
-        ventas_mes = self.get_queryset().filter(fecha_venta__date__gte=inicio_mes).count()
-        
-        # Ingresos
-        ingresos_hoy = self.get_queryset().filter(
-            fecha_venta__date=hoy,
-            estado='pagada'
-        ).aggregate(total=Sum('total'))['total'] or 0
-        
-        ingresos_mes = self.get_queryset().filter(
-            fecha_venta__date__gte=inicio_mes,
-            estado='pagada'
-        ).aggregate(total=Sum('total'))['total'] or 0
+
+        # Los totales salen de los resúmenes diarios si los filtros lo permiten;
+        # si no (p. ej. filtro por cliente), de las ventas sin los joins de get_queryset
+        resumen = self.filtrar_resumen(VentaDiariaMetodoPago)
+        if resumen is None:
+            resumen = self.filtrar_resumen(VentaDiariaManicurista)
+        if resumen is not None:
+            base, campo_fecha = resumen, 'fecha'
+        else:
+            base, campo_fecha = self.filtrar_queryset(VentaServicio.objects.all()), 'fecha_venta__date'
+
+        def contar(condicion=None):
+            if resumen is not None:
+                return Sum('cantidad', filter=condicion)
+            return Count('id', filter=condicion)
+
+        # Estadísticas generales e ingresos en una sola consulta
+        generales = base.aggregate(
+            total_ventas=contar(),
+            ventas_hoy=contar(Q(**{campo_fecha: hoy})),
+            ventas_pendientes=contar(Q(estado='pendiente')),
+            ventas_mes=contar(Q(**{f'{campo_fecha}__gte': inicio_mes})),
+            ingresos_hoy=Sum('total', filter=Q(**{campo_fecha: hoy}, estado='pagada')),
+            ingresos_mes=Sum('total', filter=Q(**{f'{campo_fecha}__gte': inicio_mes}, estado='pagada')),
+        )
         
         # Ventas por estado
-        por_estado = self.get_queryset().values('estado').annotate(
-            count=Count('id'),
+        por_estado = base.values('estado').annotate(
+            count=contar(),
             total_ingresos=Sum('total')
         ).order_by('estado')
         
         # Ventas por método de pago (solo efectivo y transferencia)
-        por_metodo_pago = self.get_queryset().filter(
+        por_metodo = self.filtrar_resumen(VentaDiariaMetodoPago)
+        if por_metodo is not None:
+            por_metodo_pago = por_metodo.filter(estado='pagada').values('metodo_pago').annotate(
+                count=Sum('cantidad'),
+                total=Sum('total')
+            ).order_by('-total')
+        else:
+            por_metodo_pago = self.filtrar_queryset(VentaServicio.objects.all()).filter(
+                estado='pagada'
+            ).values('metodo_pago').annotate(
+                count=Count('id'),
+                total=Sum('total')
+            ).order_by('-total')
+        
+        # Servicios más vendidos (a través de los detalles resumidos por día)
+        servicios_top = VentaDiariaServicio.objects.filter(
             estado='pagada'
-        ).values('metodo_pago').annotate(
-            count=Count('id'),
-            total=Sum('total')
-        ).order_by('-total')
-        
-        # Servicios más vendidos (a través de detalles)
-        servicios_top = DetalleVentaServicio.objects.filter(
-            venta__estado='pagada'
         ).values(
             'servicio__nombre'
         ).annotate(
             total_vendido=Sum('cantidad'),
-            ingresos=Sum('subtotal')
+            ingresos=Sum('total')
         ).order_by('-total_vendido')[:10]
         
         # Manicuristas con más ventas
-        manicuristas_top = self.get_queryset().values(
-            'manicurista__nombres', 'manicurista__apellidos'
-        ).annotate(
-            total_ventas=Count('id'),
-            total_ingresos=Sum('total'),
-            total_comisiones=Sum('comision_manicurista')
-        ).order_by('-total_ventas')[:10]
-        
-        return Response({
-            'total_ventas': total_ventas,
-            'ventas_hoy': ventas_hoy,
-            'ventas_pendientes': ventas_pendientes,
-            'ventas_mes': ventas_mes,
-            'ingresos_hoy': float(ingresos_hoy),
-            'ingresos_mes': float(ingresos_mes),
+        por_manicurista = self.filtrar_resumen(VentaDiariaManicurista)
+        if por_manicurista is not None:
+            manicuristas_top = por_manicurista.values('manicurista__nombre').annotate(
+                total_ventas=Sum('cantidad'),
+                total_ingresos=Sum('total'),
+                total_comisiones=Sum('comision')
+            ).order_by('-total_ventas')[:10]
+        else:
+            manicuristas_top = self.filtrar_queryset(VentaServicio.objects.all()).values(
+                'manicurista__nombre'
+            ).annotate(
+                total_ventas=Count('id'),
+                total_ingresos=Sum('total'),
+                total_comisiones=Sum('comision_manicurista')
+            ).order_by('-total_ventas')[:10]
+        
+        return {
+            'total_ventas': generales['total_ventas'] or 0,
+            'ventas_hoy': generales['ventas_hoy'] or 0,
+            'ventas_pendientes': generales['ventas_pendientes'] or 0,
+            'ventas_mes': generales['ventas_mes'] or 0,
+            'ingresos_hoy': float(generales['ingresos_hoy'] or 0),
+            'ingresos_mes': float(generales['ingresos_mes'] or 0),
             'por_estado': list(por_estado),
             'por_metodo_pago': list(por_metodo_pago),
             'servicios_top': list(servicios_top),
             'manicuristas_top': list(manicuristas_top)
-        })
+        }
 
     @action(detail=False, methods=['get'])
     def reporte_comisiones(self, request):
         """Reporte de comisiones por manicurista"""
-        fecha_desde = request.query_params.get('fecha_desde')
-        fecha_hasta = request.query_params.get('fecha_hasta')
-        
-        queryset = self.get_queryset().filter(estado='pagada')
-        
-        if fecha_desde:
-            try:
-                fecha_desde = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
-                queryset = queryset.filter(fecha_venta__date__gte=fecha_desde)
-            except ValueError:
-                pass
-        
-        if fecha_hasta:
-            try:
-                fecha_hasta = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
-                queryset = queryset.filter(fecha_venta__date__lte=fecha_hasta)
-            except ValueError:
-                pass
-        
-        comisiones = queryset.values(
+        queryset = self.filtrar_resumen(VentaDiariaManicurista)
+        if queryset is not None:
+            comisiones = queryset.filter(estado='pagada').values(
+                'manicurista__id',
+                'manicurista__nombre'
+            ).annotate(
+                total_ventas=Sum('cantidad'),
+                total_ingresos=Sum('total'),
+                total_comisiones=Sum('comision')
+            ).order_by('-total_comisiones')
+            comisiones = list(comisiones)
+            for fila in comisiones:
+                fila['promedio_venta'] = (
+                    fila['total_ingresos'] / fila['total_ventas'] if fila['total_ventas'] else 0
+                )
+            return Response(comisiones)
+
+        # Filtros que los resúmenes no cubren (cliente, método de pago)
+        comisiones = self.filtrar_queryset(VentaServicio.objects.all()).filter(estado='pagada').values(
             'manicurista__id',
-            'manicurista__nombres',
-            'manicurista__apellidos'
+            'manicurista__nombre'
         ).annotate(
             total_ventas=Count('id'),
             total_ingresos=Sum('total'),
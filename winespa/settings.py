@@ -46,12 +46,14 @@ INSTALLED_APPS = [
     'api.abastecimientos',
     'api.authentication',
     'api.base',
+    'api.busqueda',
     'api.categoriainsumos',
     'api.citas',
     'api.clientes',
     'api.codigorecuperacion',
     'api.compras',
     'api.comprahasinsumos',
+    'api.correos',
     'api.insumos',
     'api.insumoshasabastecimientos',
     'api.liquidaciones',
@@ -74,6 +76,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'simple_history.middleware.HistoryRequestMiddleware',
+    'api.base.middleware.RendimientoMiddleware',  # Métricas por endpoint; inactivo si METRICAS_HABILITADAS es False
     # 'api.authentication.middleware.PermisosMiddleware',  # Middleware de permisos personalizado - DESHABILITADO PARA DESARROLLO
 ]
 
@@ -153,12 +156,14 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication sin consultar el usuario mientras los claims del token estén vigentes
+        'api.authentication.autenticacion.JWTAutenticacion',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_PAGINATION_CLASS': 'api.base.pagination.CursorPaginacion',
 }
 
 # JWT Configuration
@@ -211,19 +216,32 @@ CORS_ALLOW_METHODS = [
 # Cache Configuration
 # https://docs.djangoproject.com/en/5.2/topics/cache/
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
-        'LOCATION': os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
-        'OPTIONS': {
-            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
-        },
-        'KEY_PREFIX': 'winespa',
+# CACHE_BACKEND=locmem usa la caché en memoria del proceso (tests y desarrollo sin Redis);
+# en producción con varios procesos debe usarse Redis para que las invalidaciones se compartan
+if os.getenv('CACHE_BACKEND', 'redis') == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'winespa',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+            'KEY_PREFIX': 'winespa',
+        }
     }
-}
 
 # Cache timeout
 CACHE_TTL = 60 * 15  # 15 minutes
+ESTADISTICAS_CACHE_TTL = 30  # Estadísticas del dashboard (segundos)
+
+# Métricas de rendimiento por endpoint (/api/_metrics, formato Prometheus)
+METRICAS_HABILITADAS = os.getenv('METRICAS_HABILITADAS', 'False') == 'True'
+METRICAS_MUESTREO = float(os.getenv('METRICAS_MUESTREO', '1.0'))  # Fracción de peticiones medidas
+METRICAS_TOKEN = os.getenv('METRICAS_TOKEN')  # Bearer token exigido por /api/_metrics (opcional)
 
 # HTTPS/SSL Configuration
 # https://docs.djangoproject.com/en/5.2/topics/security/
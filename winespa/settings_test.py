@@ -0,0 +1,27 @@
+"""
+Configuración para correr los tests sin MySQL ni Redis:
+
+    python manage.py test api --settings=winespa.settings_test
+"""
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'test_db.sqlite3',
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'winespa-tests',
+    }
+}
+
+# Hash rápido: los datos de prueba crean muchos usuarios
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+METRICAS_HABILITADAS = False